@@ -0,0 +1,172 @@
+"""
+Armazenamento colunar (Parquet) dos pontos extraídos.
+
+Os CSV com utf-8-sig obrigam cada etapa a reconverter texto em float e
+strings soltas. Em Parquet as colunas mantêm o tipo: 'empresa' e 'codigo'
+viram categorias (dicionário), as coordenadas podem ser gravadas em float32
+e o arquivo carrega metadados da extração - hash SHA-256 de cada PDF de
+origem e data/hora da extração.
+
+Os metadados acompanham o DataFrame em df.attrs (chaves de METADADOS), de
+modo que a extração os preenche e salvar_pontos os grava sem parâmetros
+extras.
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Colunas gravadas como categoria (poucos valores distintos, muito repetidos)
+COLUNAS_CATEGORICAS = ('empresa', 'codigo')
+
+# Colunas que podem ser reduzidas a float32 (~0,4 m de resolução em Maceió)
+COLUNAS_COORDENADAS = ('latitude', 'longitude')
+
+# Chave dos metadados da extração no esquema do Parquet
+CHAVE_METADADOS = b'dmtt'
+
+# Metadados reconhecidos em df.attrs
+METADADOS = ('pdf_sha256', 'extraido_em', 'versao_extrator')
+
+COMPRESSAO_PARQUET = 'zstd'
+
+# ============================================================================
+# METADADOS
+# ============================================================================
+
+def marcar_extracao(df, empresa_nome, pdf_hash, versao_extrator=None):
+    """
+    Registra em df.attrs a origem e a data/hora da extração.
+
+    Retorna:
+    --------
+    pd.DataFrame
+        O próprio df (para encadear)
+    """
+    df.attrs['pdf_sha256'] = {empresa_nome: pdf_hash}
+    df.attrs['extraido_em'] = datetime.now().isoformat(timespec='seconds')
+    if versao_extrator is not None:
+        df.attrs['versao_extrator'] = versao_extrator
+    return df
+
+def juntar_metadados(lista_dfs):
+    """
+    Combina os metadados de várias extrações (ex: no consolidado).
+
+    Retorna:
+    --------
+    dict
+        pdf_sha256 de todas as empresas, a extração mais recente e a versão
+        do extrator (se for a mesma em todas)
+    """
+    metadados = {'pdf_sha256': {}}
+    datas = []
+    versoes = set()
+    for df in lista_dfs:
+        metadados['pdf_sha256'].update(df.attrs.get('pdf_sha256', {}))
+        if 'extraido_em' in df.attrs:
+            datas.append(df.attrs['extraido_em'])
+        if 'versao_extrator' in df.attrs:
+            versoes.add(df.attrs['versao_extrator'])
+    if datas:
+        metadados['extraido_em'] = max(datas)
+    if len(versoes) == 1:
+        metadados['versao_extrator'] = versoes.pop()
+    return metadados
+
+def ler_metadados(caminho):
+    """
+    Lê os metadados da extração sem carregar os dados.
+
+    Retorna:
+    --------
+    dict
+        Chaves de METADADOS presentes no arquivo
+    """
+    esquema = pq.read_schema(caminho)
+    bruto = (esquema.metadata or {}).get(CHAVE_METADADOS)
+    return json.loads(bruto) if bruto else {}
+
+# ============================================================================
+# LEITURA E GRAVAÇÃO
+# ============================================================================
+
+def salvar_pontos(df, caminho, float32=False, csv=None):
+    """
+    Grava os pontos em Parquet (e opcionalmente também em CSV).
+
+    Parâmetros:
+    -----------
+    df : pd.DataFrame
+        Pontos; os metadados vêm de df.attrs (ver marcar_extracao)
+    caminho : str
+        Arquivo .parquet de saída
+    float32 : bool
+        Grava latitude/longitude em float32 (arquivo menor, ~0,4 m de resolução)
+    csv : str, opcional
+        Se informado, exporta também um CSV (utf-8-sig, como antes)
+
+    Retorna:
+    --------
+    Path
+        Caminho do Parquet gravado
+    """
+    tabela = df.copy()
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in tabela:
+            tabela[coluna] = tabela[coluna].astype('category')
+    if float32:
+        for coluna in COLUNAS_COORDENADAS:
+            if coluna in tabela:
+                tabela[coluna] = tabela[coluna].astype('float32')
+
+    tabela_arrow = pa.Table.from_pandas(tabela, preserve_index=False)
+    metadados = {chave: df.attrs[chave] for chave in METADADOS if chave in df.attrs}
+    tabela_arrow = tabela_arrow.replace_schema_metadata({
+        **(tabela_arrow.schema.metadata or {}),
+        CHAVE_METADADOS: json.dumps(metadados).encode('utf-8'),
+    })
+
+    caminho = Path(caminho)
+    temporario = caminho.with_name(caminho.name + '.tmp')
+    pq.write_table(tabela_arrow, temporario, compression=COMPRESSAO_PARQUET)
+    temporario.replace(caminho)
+
+    if csv:
+        df.to_csv(csv, index=False, encoding='utf-8-sig')
+
+    return caminho
+
+def carregar_pontos(caminho):
+    """
+    Lê os pontos de um Parquet (ou de um CSV antigo).
+
+    Categorias e float32 são preservados; os metadados vão para df.attrs.
+
+    Retorna:
+    --------
+    pd.DataFrame
+    """
+    caminho = Path(caminho)
+    if caminho.suffix == '.csv':
+        return pd.read_csv(caminho, encoding='utf-8-sig')
+
+    df = pq.read_table(caminho).to_pandas()
+    df.attrs.update(ler_metadados(caminho))
+    return df
+
+def como_dataframe(origem):
+    """
+    Aceita um DataFrame ou o caminho de um arquivo de pontos.
+    """
+    if isinstance(origem, pd.DataFrame):
+        return origem
+    return carregar_pontos(origem)
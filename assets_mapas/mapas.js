@@ -0,0 +1,108 @@
+/*
+ * Código comum a todos os mapas gerados no modo 'pacote' (ver pacote_mapas.py).
+ *
+ * Os arquivos de dados chamam MapasDMTT.registrar(empresa, colunas) e a
+ * casca HTML chama MapasDMTT.criar(elemento, configuracao).
+ */
+var MapasDMTT = (function () {
+    var dados = {};
+
+    // {campo} ou {campo:.5f} - mesma sintaxe dos templates do modo 'marcadores'
+    var CAMPO = /\{(\w+)(?::\.(\d+)f)?\}/g;
+
+    function preencher(template, valores) {
+        return template.replace(CAMPO, function (_, campo, casas) {
+            var valor = valores[campo];
+            if (valor === undefined || valor === null) {
+                return '';
+            }
+            return casas === undefined ? String(valor) : Number(valor).toFixed(Number(casas));
+        });
+    }
+
+    function registrar(empresa, colunas) {
+        dados[empresa] = colunas;
+    }
+
+    function criarCamada(camada, configuracao, renderizador) {
+        var colunas = dados[camada.dados || camada.empresa];
+        var grupo = L.featureGroup();
+        if (!colunas) {
+            return {grupo: grupo, total: 0};
+        }
+
+        var nomes = Object.keys(colunas);
+        var total = colunas.latitude.length;
+        for (var i = 0; i < total; i++) {
+            var valores = {empresa: camada.empresa, cor: camada.cor};
+            for (var j = 0; j < nomes.length; j++) {
+                valores[nomes[j]] = colunas[nomes[j]][i];
+            }
+            L.circleMarker([valores.latitude, valores.longitude], {
+                renderer: renderizador,
+                radius: configuracao.raio,
+                color: 'white',
+                fillColor: camada.cor,
+                fillOpacity: configuracao.opacidade,
+                weight: configuracao.peso
+            })
+                .bindPopup(preencher(configuracao.popup, valores), {maxWidth: 300})
+                .bindTooltip(preencher(configuracao.tooltip, valores))
+                .addTo(grupo);
+        }
+        return {grupo: grupo, total: total};
+    }
+
+    function criarLegenda(titulo, linhas, total) {
+        var legenda = L.control({position: 'bottomleft'});
+        legenda.onAdd = function () {
+            var div = L.DomUtil.create('div', 'legenda-dmtt');
+            var html = '<h4>' + titulo + '</h4><hr><b>Total de Pontos:</b> ' + total;
+            if (linhas.length > 1) {
+                html += '<table>';
+                linhas.forEach(function (linha) {
+                    html += '<tr><td><span style="color: ' + linha.cor + ';">●</span></td>'
+                        + '<td>' + linha.empresa + '</td><td class="contagem">' + linha.total + '</td></tr>';
+                });
+                html += '</table>';
+            } else if (linhas.length === 1) {
+                html += '<br><b>Cor:</b> <span style="color: ' + linhas[0].cor + ';">●</span>';
+            }
+            div.innerHTML = html + '<hr><small><i>Clique nos pontos para detalhes</i></small>';
+            return div;
+        };
+        return legenda;
+    }
+
+    function criar(elemento, configuracao) {
+        var mapa = L.map(elemento, {preferCanvas: true})
+            .setView(configuracao.centro, configuracao.zoom);
+        L.control.scale().addTo(mapa);
+
+        var bases = {};
+        configuracao.tiles.forEach(function (tile, i) {
+            bases[tile.nome] = L.tileLayer(tile.url, {attribution: tile.atribuicao, maxZoom: 19});
+            if (i === 0) {
+                bases[tile.nome].addTo(mapa);
+            }
+        });
+
+        var renderizador = L.canvas();
+        var camadas = {};
+        var linhas = [];
+        var total = 0;
+        configuracao.camadas.forEach(function (camada) {
+            var resultado = criarCamada(camada, configuracao, renderizador);
+            resultado.grupo.addTo(mapa);
+            camadas[camada.empresa] = resultado.grupo;
+            linhas.push({empresa: camada.empresa, cor: camada.cor, total: resultado.total});
+            total += resultado.total;
+        });
+
+        L.control.layers(bases, camadas, {collapsed: false}).addTo(mapa);
+        criarLegenda(configuracao.titulo, linhas, total).addTo(mapa);
+        return mapa;
+    }
+
+    return {registrar: registrar, criar: criar, preencher: preencher};
+})();
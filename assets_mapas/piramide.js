@@ -0,0 +1,115 @@
+/*
+ * Visualizador da pirâmide de tiles (ver piramide_tiles.py).
+ *
+ * A cada movimento do mapa calcula os tiles z/x/y visíveis no zoom atual
+ * (limitado aos zooms gerados), baixa os que ainda não tem e redesenha as
+ * paradas - ou as células agregadas, nos zooms baixos. Cada tile é pedido
+ * com a sua versão (configuracao.versoes), para o cache do navegador valer
+ * entre execuções; tiles sem versão não existem e não são pedidos. Os já
+ * baixados ficam em memória.
+ *
+ * Mapa, legenda e desenho vêm de visor.js (VisorDMTT).
+ */
+var PiramideDMTT = (function () {
+
+    function tileX(longitude, n) {
+        return Math.floor((longitude + 180) / 360 * n);
+    }
+
+    function tileY(latitude, n) {
+        var radianos = Math.max(Math.min(latitude, 85.0511287798), -85.0511287798) * Math.PI / 180;
+        return Math.floor((1 - Math.log(Math.tan(radianos) + 1 / Math.cos(radianos)) / Math.PI) / 2 * n);
+    }
+
+    function criar(elemento, configuracao) {
+        var mapa = VisorDMTT.criarMapa(elemento, configuracao);
+        var cores = VisorDMTT.coresEmpresas(configuracao);
+        var renderizador = L.canvas();
+        var camada = L.featureGroup().addTo(mapa);
+        var baixados = {};
+        var empresa = '';
+        var geracao = 0;
+
+        var legenda = VisorDMTT.criarLegenda(configuracao, function (escolhida) {
+            empresa = escolhida;
+            atualizar();
+        }).addTo(mapa);
+
+        function visiveis() {
+            var zoom = Math.min(Math.max(Math.round(mapa.getZoom()), configuracao.zoomMinimo),
+                                configuracao.zoomMaximo);
+            var faixa = configuracao.faixas[zoom];
+            if (!faixa) {
+                return {zoom: zoom, chaves: []};
+            }
+            var n = Math.pow(2, zoom);
+            var limites = mapa.getBounds();
+            var xMin = Math.max(tileX(limites.getWest(), n), faixa[0]);
+            var xMax = Math.min(tileX(limites.getEast(), n), faixa[2]);
+            var yMin = Math.max(tileY(limites.getNorth(), n), faixa[1]);
+            var yMax = Math.min(tileY(limites.getSouth(), n), faixa[3]);
+
+            var chaves = [];
+            for (var x = xMin; x <= xMax; x++) {
+                for (var y = yMin; y <= yMax; y++) {
+                    chaves.push(zoom + '/' + x + '/' + y);
+                }
+            }
+            return {zoom: zoom, chaves: chaves};
+        }
+
+        function baixar(chave) {
+            if (!baixados[chave]) {
+                var versao = configuracao.versoes[chave];
+                if (!versao) {
+                    // Tile sem paradas não foi gravado
+                    baixados[chave] = Promise.resolve({features: []});
+                    return baixados[chave];
+                }
+                // Tile apagado depois da página aberta (404): vale como vazio
+                baixados[chave] = fetch(chave + '.json?v=' + versao)
+                    .then(function (resposta) {
+                        return resposta.ok ? resposta.json() : {features: []};
+                    })
+                    .catch(function () {
+                        return {features: []};
+                    });
+            }
+            return baixados[chave];
+        }
+
+        function atualizar() {
+            var atual = ++geracao;
+            var tiles = visiveis();
+
+            Promise.all(tiles.chaves.map(baixar)).then(function (conteudos) {
+                // Só desenha a resposta do último movimento
+                if (atual !== geracao) {
+                    return;
+                }
+                var feicoes = [];
+                conteudos.forEach(function (conteudo) {
+                    conteudo.features.forEach(function (feature) {
+                        if (!empresa || feature.properties.empresa === empresa) {
+                            feicoes.push(feature);
+                        }
+                    });
+                });
+                var agregado = tiles.zoom < configuracao.zoomPontos;
+                var total = 0;
+                feicoes.forEach(function (feature) {
+                    total += feature.properties.quantidade || 1;
+                });
+
+                VisorDMTT.desenhar(mapa, camada, feicoes, agregado, configuracao, cores, renderizador);
+                legenda.atualizar({features: feicoes, agregado: agregado, total: total}, cores);
+            });
+        }
+
+        mapa.on('moveend', atualizar);
+        atualizar();
+        return mapa;
+    }
+
+    return {criar: criar};
+})();
@@ -0,0 +1,183 @@
+/*
+ * Página do servidor local (ver servidor_mapas.py): a cada movimento do mapa
+ * busca em /stops só as paradas da área visível e redesenha a camada.
+ *
+ * Longe (zoom baixo) a resposta traz células com a quantidade de paradas de
+ * cada empresa; clicar numa célula aproxima o mapa. Os popups usam os
+ * templates do modo 'pacote' (MapasDMTT.preencher, de mapas.js).
+ *
+ * A pirâmide de tiles (piramide.js) usa o mesmo mapa, legenda e desenho.
+ */
+var VisorDMTT = (function () {
+
+    function criarLegenda(configuracao, aoEscolher) {
+        var legenda = L.control({position: 'bottomleft'});
+        var elementos = {};
+
+        legenda.onAdd = function () {
+            var div = L.DomUtil.create('div', 'legenda-dmtt');
+            var opcoes = '<option value="">Todas as empresas</option>';
+            configuracao.empresas.forEach(function (item) {
+                opcoes += '<option value="' + item.empresa + '">' + item.empresa + '</option>';
+            });
+            div.innerHTML = '<h4>' + configuracao.titulo + '</h4><hr>'
+                + '<select>' + opcoes + '</select>'
+                + '<table></table><hr><small><i></i></small>';
+            elementos.tabela = div.querySelector('table');
+            elementos.nota = div.querySelector('i');
+            div.querySelector('select').addEventListener('change', function (evento) {
+                aoEscolher(evento.target.value);
+            });
+            L.DomEvent.disableClickPropagation(div);
+            return div;
+        };
+
+        legenda.atualizar = function (resposta, cores) {
+            var totais = {};
+            resposta.features.forEach(function (feature) {
+                var empresa = feature.properties.empresa;
+                totais[empresa] = (totais[empresa] || 0) + (feature.properties.quantidade || 1);
+            });
+            var html = '';
+            Object.keys(totais).sort().forEach(function (empresa) {
+                html += '<tr><td><span style="color: ' + (cores[empresa] || '#000000') + ';">●</span></td>'
+                    + '<td>' + empresa + '</td><td class="contagem">' + totais[empresa] + '</td></tr>';
+            });
+            elementos.tabela.innerHTML = html;
+            elementos.nota.textContent = resposta.total + ' paradas na área'
+                + (resposta.agregado ? ' (agrupadas - aproxime para ver os pontos)'
+                                     : ' - clique nos pontos para detalhes');
+        };
+
+        return legenda;
+    }
+
+    function criarMapa(elemento, configuracao) {
+        var mapa = L.map(elemento, {preferCanvas: true})
+            .setView(configuracao.centro, configuracao.zoom);
+        L.control.scale().addTo(mapa);
+
+        var bases = {};
+        configuracao.tiles.forEach(function (tile, i) {
+            bases[tile.nome] = L.tileLayer(tile.url, {attribution: tile.atribuicao, maxZoom: 19});
+            if (i === 0) {
+                bases[tile.nome].addTo(mapa);
+            }
+        });
+        L.control.layers(bases).addTo(mapa);
+        return mapa;
+    }
+
+    function coresEmpresas(configuracao) {
+        var cores = {};
+        configuracao.empresas.forEach(function (item) {
+            cores[item.empresa] = item.cor;
+        });
+        return cores;
+    }
+
+    // Desenha pontos (popup e tooltip dos templates) ou células agregadas
+    // (círculo proporcional à quantidade; o clique aproxima o mapa)
+    function desenhar(mapa, camada, feicoes, agregado, configuracao, cores, renderizador) {
+        camada.clearLayers();
+        feicoes.forEach(function (feature) {
+            var valores = feature.properties;
+            var posicao = [feature.geometry.coordinates[1], feature.geometry.coordinates[0]];
+            var cor = cores[valores.empresa] || '#000000';
+
+            if (agregado) {
+                L.circleMarker(posicao, {
+                    renderer: renderizador,
+                    radius: Math.min(5 + 2 * Math.sqrt(valores.quantidade), 30),
+                    color: 'white',
+                    fillColor: cor,
+                    fillOpacity: 0.6,
+                    weight: 1
+                })
+                    .bindTooltip(valores.empresa + ': ' + valores.quantidade + ' paradas')
+                    .on('click', function () {
+                        mapa.setView(posicao, Math.max(mapa.getZoom() + 2, configuracao.zoomPontos));
+                    })
+                    .addTo(camada);
+                return;
+            }
+
+            valores.latitude = posicao[0];
+            valores.longitude = posicao[1];
+            valores.cor = cor;
+            L.circleMarker(posicao, {
+                renderer: renderizador,
+                radius: configuracao.raio || 8,
+                color: 'white',
+                fillColor: cor,
+                fillOpacity: configuracao.opacidade || 0.8,
+                weight: 2
+            })
+                .bindPopup(MapasDMTT.preencher(configuracao.popup, valores), {maxWidth: 300})
+                .bindTooltip(MapasDMTT.preencher(configuracao.tooltip, valores))
+                .addTo(camada);
+        });
+    }
+
+    function criar(elemento, configuracao) {
+        var mapa = criarMapa(elemento, configuracao);
+        var cores = coresEmpresas(configuracao);
+        var renderizador = L.canvas();
+        var camada = L.featureGroup().addTo(mapa);
+        var empresa = '';
+        var pendente = null;
+
+        var legenda = criarLegenda(configuracao, function (escolhida) {
+            empresa = escolhida;
+            carregar();
+        }).addTo(mapa);
+
+        function carregar() {
+            // Só a última requisição interessa: as anteriores são canceladas
+            if (pendente) {
+                pendente.abort();
+            }
+            pendente = new AbortController();
+
+            var limites = mapa.getBounds();
+            var parametros = new URLSearchParams({
+                bbox: [limites.getWest(), limites.getSouth(), limites.getEast(), limites.getNorth()]
+                    .map(function (valor) { return valor.toFixed(5); }).join(','),
+                zoom: mapa.getZoom()
+            });
+            if (empresa) {
+                parametros.set('empresa', empresa);
+            }
+
+            fetch('/stops?' + parametros.toString(), {signal: pendente.signal})
+                .then(function (resposta) {
+                    if (!resposta.ok) {
+                        throw new Error('HTTP ' + resposta.status);
+                    }
+                    return resposta.json();
+                })
+                .then(function (resposta) {
+                    desenhar(mapa, camada, resposta.features, resposta.agregado, configuracao,
+                             cores, renderizador);
+                    legenda.atualizar(resposta, cores);
+                })
+                .catch(function (erro) {
+                    if (erro.name !== 'AbortError') {
+                        console.error(erro);
+                    }
+                });
+        }
+
+        mapa.on('moveend', carregar);
+        carregar();
+        return mapa;
+    }
+
+    return {
+        criar: criar,
+        criarMapa: criarMapa,
+        coresEmpresas: coresEmpresas,
+        criarLegenda: criarLegenda,
+        desenhar: desenhar
+    };
+})();
@@ -0,0 +1,72 @@
+"""
+Benchmark dos motores de extração do pipeline "Ativo" (main(1).py).
+
+Roda o motor de regex e o de layout sobre o mesmo PDF, sem cache, e
+compara tempo por página e concordância dos pontos extraídos.
+
+Uso:
+    python benchmarks/bench_motores.py pontos_real.pdf [empresa]
+"""
+
+import contextlib
+import importlib.util
+import io
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import pdfplumber
+
+def carregar_pipeline_ativo():
+    """
+    Carrega main(1).py como módulo (o nome do arquivo não é importável).
+    """
+    spec = importlib.util.spec_from_file_location('pipeline_ativo', RAIZ / 'main(1).py')
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+def medir(funcao):
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado = funcao()
+    return resultado, time.perf_counter() - inicio
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    pdf_path = sys.argv[1]
+    empresa = sys.argv[2] if len(sys.argv) > 2 else 'Benchmark'
+
+    pipeline = carregar_pipeline_ativo()
+    with pdfplumber.open(pdf_path) as pdf:
+        total_paginas = len(pdf.pages)
+
+    resultados = {}
+    for motor in ('regex', 'layout'):
+        df, segundos = medir(lambda: pipeline.extrair_coordenadas_pdf_com_ativo(
+            pdf_path, empresa, usar_cache=False, motor=motor))
+        resultados[motor] = (df, segundos)
+
+    print(f"📄 {pdf_path} ({total_paginas} páginas)")
+    for motor, (df, segundos) in resultados.items():
+        print(f"   {motor:6}: {segundos:7.2f} s  "
+              f"({segundos / total_paginas * 1000:6.1f} ms/página)  {len(df)} pontos")
+
+    df_regex, _ = resultados['regex']
+    df_layout, _ = resultados['layout']
+    if not df_regex.empty and not df_layout.empty:
+        comuns = df_regex.merge(df_layout, on=['latitude', 'longitude'])
+        print(f"   Pontos em comum: {len(comuns)}")
+        # Códigos são categorias distintas em cada motor: compara como texto
+        mesmo_codigo = comuns['codigo_x'].astype(str) == comuns['codigo_y'].astype(str)
+        print(f"   Mesmo código:    {mesmo_codigo.mean():.1%}")
+        print(f"   Mesma página:    {(comuns['pagina_x'] == comuns['pagina_y']).mean():.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Benchmark de ponta a ponta sobre PDFs sintéticos (gerar_pdf_sintetico.py).
+
+Para cada tamanho (padrão: 10, 100 e 1000 páginas) gera um PDF no formato
+das empresas e mede, cada caso num processo novo (o pico de memória de um
+não contamina o do outro):
+
+- extracao:        main.extrair_coordenadas_pdf (texto + regex + deduplicação)
+- ativo_regex:     extrair_coordenadas_pdf_com_ativo de main(1).py, motor 'regex'
+- ativo_layout:    o mesmo, motor 'layout'
+- mapa_marcadores: criar_mapa_folium com um CircleMarker por ponto
+- mapa_geojson:    criar_mapa_folium com uma camada GeoJSON
+
+Cada caso registra o tempo total, ms por página, pontos, pico de RSS e as
+etapas medidas por instrumentacao.py (abrir_pdf, extrair_texto,
+interpretar, deduplicar, salvar, salvar_mapa...). Tudo vai para
+benchmarks/resultados/<data_hora>_<commit>.json, para comparar commits:
+
+Uso:
+    python benchmarks/bench_pipeline.py                        # 10, 100 e 1000 páginas
+    python benchmarks/bench_pipeline.py --paginas 10 100 --casos extracao ativo_regex
+    python benchmarks/bench_pipeline.py --comparar antes.json depois.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from gerar_pdf_sintetico import gerar_pdf
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+TAMANHOS_PADRAO = (10, 100, 1000)
+
+CASOS = ('extracao', 'ativo_regex', 'ativo_layout', 'mapa_marcadores', 'mapa_geojson')
+
+DIRETORIO_RESULTADOS = RAIZ / 'benchmarks' / 'resultados'
+
+EMPRESA = 'Sintetica'
+
+# ============================================================================
+# CASOS (cada um roda num processo novo)
+# ============================================================================
+
+def _rss_pico_mb():
+    import resource
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(pico / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10), 1)
+
+def executar_caso(caso, pdf_path, diretorio):
+    """
+    Roda um caso dentro de `diretorio` (onde ficam os arquivos gerados).
+
+    Os mapas usam os pontos gravados pelo caso 'extracao' do mesmo PDF.
+
+    Retorna:
+    --------
+    dict
+        caso, segundos, pontos, rss_inicial_mb, rss_pico_mb e etapas
+    """
+    os.chdir(diretorio)
+
+    # Importações fora da medição
+    import pandas as pd
+    import instrumentacao
+    import main
+    from bench_motores import carregar_pipeline_ativo
+    ativo = carregar_pipeline_ativo()
+    instrumentacao.configurar()
+
+    rss_inicial = _rss_pico_mb()
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), instrumentacao.contexto(EMPRESA):
+        if caso == 'extracao':
+            df = main.extrair_coordenadas_pdf(pdf_path, EMPRESA, workers=1, usar_cache=False,
+                                              incremental=False)
+        elif caso.startswith('ativo_'):
+            df = ativo.extrair_coordenadas_pdf_com_ativo(pdf_path, EMPRESA, usar_cache=False,
+                                                         motor=caso.split('_', 1)[1])
+        else:
+            df = pd.read_parquet(f"dados_{EMPRESA}.parquet")
+            with instrumentacao.etapa('desenhar', linhas=len(df)):
+                main.criar_mapa_folium(df, EMPRESA, f"{caso}.html", modo=caso.split('_', 1)[1])
+    segundos = time.perf_counter() - inicio
+
+    return {
+        'caso': caso,
+        'segundos': round(segundos, 4),
+        'pontos': len(df),
+        'rss_inicial_mb': rss_inicial,
+        'rss_pico_mb': _rss_pico_mb(),
+        'etapas': json.loads(instrumentacao.tabela_metricas().drop(
+            columns=['empresa', 'processo', 'inicio']).to_json(orient='records')),
+    }
+
+def medir_caso(caso, pdf_path, diretorio, repeticoes):
+    """
+    Melhor tempo de `repeticoes` execuções, cada uma num processo novo.
+    """
+    melhor = None
+    contexto_spawn = multiprocessing.get_context('spawn')
+    for _ in range(repeticoes):
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto_spawn) as pool:
+            resultado = pool.submit(executar_caso, caso, pdf_path, diretorio).result()
+        if melhor is None or resultado['segundos'] < melhor['segundos']:
+            melhor = resultado
+    return melhor
+
+# ============================================================================
+# EXECUÇÃO
+# ============================================================================
+
+def _commit_atual():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        alterado = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                  cwd=RAIZ, capture_output=True, text=True).stdout.strip()
+        return commit + ('-alterado' if alterado else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecido'
+
+def executar(tamanhos, casos, repeticoes=1, diretorio_pdfs=None, semente=0):
+    """
+    Roda os casos para cada tamanho de PDF.
+
+    Retorna:
+    --------
+    dict
+        Metadados da execução (commit, data, python, cpus) e 'resultados',
+        uma entrada por (paginas, caso)
+    """
+    execucao = {
+        'commit': _commit_atual(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'semente': semente,
+        'resultados': [],
+    }
+
+    # Os mapas precisam dos pontos do caso 'extracao', que roda antes deles
+    if any(caso.startswith('mapa_') for caso in casos) or 'extracao' in casos:
+        casos = ('extracao',) + tuple(caso for caso in casos if caso != 'extracao')
+
+    for paginas in tamanhos:
+        with tempfile.TemporaryDirectory(prefix='bench_pipeline_') as temporario:
+            pasta_pdfs = Path(diretorio_pdfs or temporario)
+            pasta_pdfs.mkdir(parents=True, exist_ok=True)
+            pdf_path = pasta_pdfs / f"sintetico_{paginas}p_s{semente}.pdf"
+            if not pdf_path.exists():
+                gerar_pdf(pdf_path, paginas, semente=semente)
+            tamanho_mb = pdf_path.stat().st_size / 2 ** 20
+            print(f"\n📄 {paginas} páginas ({tamanho_mb:.1f} MB)")
+
+            for caso in casos:
+                resultado = medir_caso(caso, str(pdf_path.resolve()), temporario, repeticoes)
+                resultado['paginas'] = paginas
+                resultado['ms_por_pagina'] = round(resultado['segundos'] / paginas * 1000, 2)
+                execucao['resultados'].append(resultado)
+                print(f"   {caso:16} {resultado['segundos']:9.2f} s "
+                      f"{resultado['ms_por_pagina']:9.1f} ms/página "
+                      f"{resultado['pontos']:7} pontos  RSS {resultado['rss_pico_mb']:7.1f} MB")
+
+    return execucao
+
+def salvar_resultados(execucao, diretorio=DIRETORIO_RESULTADOS):
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    arquivo = diretorio / f"{datetime.now():%Y%m%d_%H%M%S}_{execucao['commit']}.json"
+    arquivo.write_text(json.dumps(execucao, ensure_ascii=False, indent=2), encoding='utf-8')
+    return arquivo
+
+# ============================================================================
+# COMPARAÇÃO
+# ============================================================================
+
+def comparar(arquivo_antes, arquivo_depois):
+    """
+    Tabela de tempo e memória de dois arquivos de resultados, caso a caso.
+    """
+    antes, depois = (json.loads(Path(arquivo).read_text(encoding='utf-8'))
+                     for arquivo in (arquivo_antes, arquivo_depois))
+    indice_antes = {(r['paginas'], r['caso']): r for r in antes['resultados']}
+
+    print(f"⚖️  {antes['commit']} ({antes['data']}) → {depois['commit']} ({depois['data']})")
+    print(f"  {'Páginas':>7}  {'Caso':16}{'Antes':>10}{'Depois':>10}{'Razão':>8}"
+          f"{'RSS antes':>11}{'RSS depois':>12}")
+    for resultado in depois['resultados']:
+        anterior = indice_antes.get((resultado['paginas'], resultado['caso']))
+        if anterior is None:
+            continue
+        razao = resultado['segundos'] / anterior['segundos'] if anterior['segundos'] else float('nan')
+        print(f"  {resultado['paginas']:>7}  {resultado['caso']:16}"
+              f"{anterior['segundos']:>9.2f}s{resultado['segundos']:>9.2f}s{razao:>7.2f}x"
+              f"{anterior['rss_pico_mb']:>9.1f}MB{resultado['rss_pico_mb']:>10.1f}MB")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline com PDFs sintéticos")
+    parser.add_argument('--paginas', type=int, nargs='+', default=list(TAMANHOS_PADRAO),
+                        help="tamanhos dos PDFs (padrão: 10 100 1000)")
+    parser.add_argument('--casos', nargs='+', choices=CASOS, default=list(CASOS))
+    parser.add_argument('--repeticoes', type=int, default=1,
+                        help="execuções de cada caso (vale a mais rápida)")
+    parser.add_argument('--pdfs', help="pasta onde guardar/reaproveitar os PDFs gerados")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', default=str(DIRETORIO_RESULTADOS),
+                        help="pasta do arquivo de resultados")
+    parser.add_argument('--comparar', nargs=2, metavar=('ANTES', 'DEPOIS'),
+                        help="compara dois arquivos de resultados e sai")
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar(*args.comparar)
+        sys.exit(0)
+
+    execucao = executar(args.paginas, tuple(args.casos), args.repeticoes, args.pdfs, args.semente)
+    print(f"\n💾 Resultados: {salvar_resultados(execucao, args.saida)}")
@@ -0,0 +1,122 @@
+"""
+Microbenchmark da montagem dos popups/tooltips do modo 'marcadores'.
+
+Compara o laço antigo (iterrows() + um f-string multilinha por ponto) com
+renderizacao.montar_textos, que preenche o template coluna a coluna, e
+entrega ao construtor dos marcadores tuplas (lat, lon, popup, tooltip) -
+tirando do tempo só a criação dos objetos folium, que é igual nos dois.
+
+Uso:
+    python benchmarks/bench_popups.py              # 10 mil e 100 mil pontos
+    python benchmarks/bench_popups.py 50000        # tamanhos escolhidos
+"""
+
+import html
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from renderizacao import montar_textos
+
+# Mesmo popup do mapa consolidado de main(1).py
+POPUP = """
+            <div style="font-family: Arial; width: 250px;">
+                <h4 style="color: {cor}; margin: 5px 0;">{empresa}</h4>
+                <hr style="margin: 5px 0;">
+                <b>Código:</b> {codigo}<br>
+                <b>Latitude:</b> {latitude:.5f}<br>
+                <b>Longitude:</b> {longitude:.5f}<br>
+                <b>Seção:</b> {secao}<br>
+                <hr style="margin: 5px 0;">
+                <small><b>Endereço:</b><br>{endereco}</small>
+            </div>
+            """
+TOOLTIP = "{codigo} - {empresa}"
+
+CORES = {'Real': '#FF0000', 'SaoFrancisco': '#0000FF', 'CidadeMaceio': '#00FF00'}
+
+# ============================================================================
+# IMPLEMENTAÇÃO ANTIGA (REFERÊNCIA)
+# ============================================================================
+
+def montar_antigo(df):
+    """
+    Laço original com iterrows(), acrescido do escape dos textos.
+    """
+    resultado = []
+    for _, ponto in df.iterrows():
+        cor = CORES.get(ponto['empresa'], '#808080')
+        popup_html = f"""
+            <div style="font-family: Arial; width: 250px;">
+                <h4 style="color: {cor}; margin: 5px 0;">{html.escape(ponto['empresa'])}</h4>
+                <hr style="margin: 5px 0;">
+                <b>Código:</b> {html.escape(ponto['codigo'])}<br>
+                <b>Latitude:</b> {ponto['latitude']:.5f}<br>
+                <b>Longitude:</b> {ponto['longitude']:.5f}<br>
+                <b>Seção:</b> {ponto['secao']}<br>
+                <hr style="margin: 5px 0;">
+                <small><b>Endereço:</b><br>{html.escape(ponto['endereco'])}</small>
+            </div>
+            """
+        tooltip = f"{html.escape(ponto['codigo'])} - {html.escape(ponto['empresa'])}"
+        resultado.append((ponto['latitude'], ponto['longitude'], popup_html, tooltip))
+    return resultado
+
+def montar_vetorizado(df):
+    cores = df['empresa'].map(CORES).fillna('#808080')
+    popups = montar_textos(POPUP, df.assign(cor=cores))
+    tooltips = montar_textos(TOOLTIP, df)
+    return list(zip(df['latitude'].to_numpy(), df['longitude'].to_numpy(), popups, tooltips))
+
+# ============================================================================
+# DADOS DE ENTRADA
+# ============================================================================
+
+def pontos_sinteticos(n, semente=0):
+    """
+    Gera n pontos no formato do DataFrame das empresas.
+    """
+    rng = np.random.default_rng(semente)
+    empresas = np.array(list(CORES))
+    numeros = rng.integers(1, 2000, n)
+    return pd.DataFrame({
+        'empresa': empresas[rng.integers(0, len(empresas), n)],
+        'codigo': [f"PN{i}" for i in rng.integers(100, 9999, n)],
+        'endereco': [f"R. X & Y <{num}>, {num}-{num + 8} - Farol, Maceió - AL" for num in numeros],
+        'latitude': rng.uniform(-9.70, -9.50, n),
+        'longitude': rng.uniform(-35.80, -35.65, n),
+        'pagina': rng.integers(1, 200, n),
+        'secao': rng.integers(1, 500, n),
+    })
+
+# ============================================================================
+# EXECUÇÃO
+# ============================================================================
+
+def cronometrar(funcao, df):
+    inicio = time.perf_counter()
+    resultado = funcao(df)
+    return time.perf_counter() - inicio, resultado
+
+def main():
+    tamanhos = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+
+    for n in tamanhos:
+        df = pontos_sinteticos(n)
+
+        t_antigo, antigo = cronometrar(montar_antigo, df)
+        t_novo, novo = cronometrar(montar_vetorizado, df)
+        assert antigo == novo, "textos divergiram da implementação antiga"
+
+        print(f"📍 {n} pontos")
+        print(f"   iterrows + f-string: {t_antigo * 1000:9.1f} ms")
+        print(f"   Vetorizado:          {t_novo * 1000:9.1f} ms")
+        print(f"   Ganho:               {t_antigo / t_novo:9.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Microbenchmark do scanner de coordenadas.
+
+Compara, por página, o laço antigo de main.extrair_coordenadas_pdf (dois
+padrões recompilados por linha e busca de código repetida por coordenada)
+com a varredura de passada única de scanner_coordenadas.
+
+Uso:
+    python benchmarks/bench_scanner.py                 # páginas sintéticas
+    python benchmarks/bench_scanner.py pontos_real.pdf # páginas reais
+"""
+
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scanner_coordenadas import varrer_pagina
+
+# ============================================================================
+# IMPLEMENTAÇÃO ANTIGA (REFERÊNCIA)
+# ============================================================================
+
+def varrer_pagina_antigo(texto):
+    """
+    Cópia do laço original: dois padrões por linha, código buscado por match.
+    """
+    resultados = []
+    linhas = texto.split('\n')
+
+    for linha_num, linha in enumerate(linhas):
+        linha = linha.strip()
+
+        padroes = [
+            r'(-?\d{1,2}[,.]\d+)\s+(-?\d{1,2}[,.]\d+)',
+            r'(-?\d{1,2}\.\d+)\s+(-?\d{1,2}\.\d+)'
+        ]
+
+        for padrao in padroes:
+            for lat_str, lon_str in re.findall(padrao, linha):
+                lat = float(lat_str.replace(',', '.'))
+                lon = float(lon_str.replace(',', '.'))
+
+                if -9.8 < lat < -9.4 and -35.9 < lon < -35.6:
+                    codigo = "DESCONHECIDO"
+                    codigos = re.findall(r'([A-Z]{2,}\d+)', linha)
+                    if codigos:
+                        codigo = codigos[0]
+                    elif linha_num > 0:
+                        codigos_ant = re.findall(r'([A-Z]{2,}\d+)', linhas[linha_num - 1])
+                        if codigos_ant:
+                            codigo = codigos_ant[0]
+
+                    resultados.append((lat, lon, codigo, linha))
+
+    return resultados
+
+# ============================================================================
+# DADOS DE ENTRADA
+# ============================================================================
+
+def pagina_sintetica(num_linhas=45):
+    """
+    Gera o texto de uma página no formato das listagens das empresas.
+    """
+    linhas = ["Nome Nome Abrev. Endereço Ordem Vel. Limite Latitude Longitude"]
+    for i in range(num_linhas):
+        separador = ',' if i % 2 else '.'
+        lat = f"-9{separador}{53000 + i * 7}"
+        lon = f"-35{separador}{78000 + i * 11}"
+        linhas.append(f"PN{900 + i} PN{900 + i} R. X, {i * 10}-{i * 10 + 8} - "
+                      f"Cidade Universitária, Maceió - AL, Brasil {i + 1} 65 {lat} {lon}")
+        if i % 5 == 0:
+            linhas.append("Federativa do Brasil")
+    return '\n'.join(linhas)
+
+def carregar_paginas(pdf_path, max_paginas=20):
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        return [pagina.extract_text() or '' for pagina in pdf.pages[:max_paginas]]
+
+# ============================================================================
+# EXECUÇÃO
+# ============================================================================
+
+def main():
+    if len(sys.argv) > 1:
+        paginas = carregar_paginas(sys.argv[1])
+        origem = sys.argv[1]
+    else:
+        paginas = [pagina_sintetica() for _ in range(20)]
+        origem = "páginas sintéticas"
+
+    # Mesmos pontos depois da remoção de duplicatas (como no extrator)
+    for texto in paginas:
+        antigo = list(dict.fromkeys(varrer_pagina_antigo(texto)))
+        novo = list(dict.fromkeys(varrer_pagina(texto)))
+        assert antigo == novo, "scanner divergiu da implementação antiga"
+
+    repeticoes = 20
+    t_antigo = timeit.timeit(lambda: [varrer_pagina_antigo(t) for t in paginas], number=repeticoes)
+    t_novo = timeit.timeit(lambda: [list(varrer_pagina(t)) for t in paginas], number=repeticoes)
+
+    por_pagina_antigo = t_antigo / (repeticoes * len(paginas)) * 1e6
+    por_pagina_novo = t_novo / (repeticoes * len(paginas)) * 1e6
+
+    print(f"📄 Entrada: {origem} ({len(paginas)} páginas)")
+    print(f"   Antigo:  {por_pagina_antigo:8.1f} µs/página")
+    print(f"   Scanner: {por_pagina_novo:8.1f} µs/página")
+    print(f"   Ganho:   {por_pagina_antigo / por_pagina_novo:8.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Gerador de PDFs sintéticos no formato da "Listagem de Pontos" das empresas.
+
+Imita o layout dos PDFs reais (A4 paisagem, mesma posição das colunas):
+cabeçalho da listagem, seções com "Atendimento Principal:" / "Linha:",
+"Nome Ida:", "Ativo: Sim/Não", "Nome Volta:", a linha de títulos da tabela
+(Nome, Nome Abrev., Endereço, Ordem, Vel. Limite, Latitude, Longitude) e as
+paradas, com:
+
+- códigos como PN987 e PP52 (e terminais sem código);
+- coordenadas com vírgula ou ponto decimal (uma seção em cada
+  SECOES_COM_PONTO usa ponto);
+- endereços longos quebrados numa segunda linha ("Brasil");
+- seções que continuam na página seguinte;
+- as mesmas paradas repetidas em várias linhas (como nos PDFs reais), às
+  vezes com a última casa da coordenada diferente (para a deduplicação).
+
+O PDF é escrito à mão (Helvetica, WinAnsiEncoding), sem dependências, página
+a página - dá para gerar milhares de páginas sem guardar tudo em memória.
+
+Uso:
+    python benchmarks/gerar_pdf_sintetico.py saida.pdf --paginas 100 [--semente 1]
+"""
+
+import argparse
+import random
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# A4 paisagem, como os PDFs das empresas
+LARGURA_PAGINA = 841
+ALTURA_PAGINA = 595
+MARGEM_SUPERIOR = 60
+MARGEM_INFERIOR = 30
+
+TAMANHO_FONTE = 7
+ESPACO_LINHA = 12.5
+
+# Início (x) de cada coluna da tabela, medido nos PDFs reais
+COLUNAS_X = {
+    'nome': 12,
+    'abrev': 127,
+    'endereco': 236,
+    'ordem': 607,
+    'velocidade': 651,
+    'latitude': 716,
+    'longitude': 775,
+}
+
+# Caixa das paradas sintéticas (dentro de LIMITES_MACEIO)
+CAIXA_PARADAS = {'lat_min': -9.70, 'lat_max': -9.45, 'lon_min': -35.82, 'lon_max': -35.62}
+
+# Paradas por seção e proporção das seções inativas
+PARADAS_POR_SECAO = (12, 60)
+PROPORCAO_INATIVAS = 0.3
+
+# Uma seção a cada SECOES_COM_PONTO usa ponto como separador decimal
+SECOES_COM_PONTO = 5
+
+# Chance de uma parada repetida vir com a última casa da coordenada diferente
+CHANCE_VARIACAO = 0.1
+
+RUAS = ['Av. Fernandes Lima', 'R. Dr. Juraci Pereira', 'Av. Sen. Rui Palmeira', 'Rua Cabo Reis',
+        'Av. Durval de Góes Monteiro', 'R. Sá e Albuquerque', 'Av. Álvaro Otacílio', 'AL-101',
+        'R. Jangadeiros Alagoanos', 'Av. Menino Marcelo', 'R. Goiás', 'Av. Comendador Leão']
+BAIRROS = ['Farol', 'Ponta Verde', 'Jatiúca', 'Trapiche da Barra', 'Benedito Bentes', 'Pajuçara',
+           'Cidade Universitária', 'Tabuleiro do Martins', 'Ponta Grossa', 'Serraria', 'Jacintinho']
+TERMINAIS = ['Terminal Eustáquio Gomes', 'Terminal Sauchuy', 'Terminal Trapiche',
+             'Terminal Benedito Bentes']
+
+# ============================================================================
+# CONTEÚDO
+# ============================================================================
+
+def gerar_paradas(quantidade, rng):
+    """
+    Paradas sintéticas: código, endereço, latitude e longitude.
+    """
+    paradas = []
+    for numero in range(quantidade):
+        if numero % 40 == 0:
+            nome = abrev = rng.choice(TERMINAIS)
+        else:
+            nome = abrev = f"{rng.choice(('PN', 'PN', 'PN', 'PP'))}{numero + 1}"
+        endereco = (f"{rng.choice(RUAS)}, {rng.randint(1, 2000)} - {rng.choice(BAIRROS)}, "
+                    f"Maceió - AL, {rng.randint(57000, 57099)}-{rng.randint(0, 999):03d},")
+        paradas.append({
+            'nome': nome,
+            'abrev': abrev,
+            'endereco': endereco,
+            'latitude': rng.uniform(CAIXA_PARADAS['lat_min'], CAIXA_PARADAS['lat_max']),
+            'longitude': rng.uniform(CAIXA_PARADAS['lon_min'], CAIXA_PARADAS['lon_max']),
+        })
+    return paradas
+
+def _coordenada(valor, separador):
+    return f"{valor:.5f}".replace('.', separador)
+
+def gerar_linhas(paginas, empresa, rng):
+    """
+    Gera as páginas como listas de (x, y, negrito, texto).
+
+    Retorna:
+    --------
+    generator
+        Uma lista por página, exatamente `paginas` páginas
+    """
+    paradas = gerar_paradas(max(200, paginas * 12), rng)
+
+    pagina = [(376, ALTURA_PAGINA - 25, True, "Listagem de Pontos"),
+              (15, ALTURA_PAGINA - 45, True, "Filtros"),
+              (33, ALTURA_PAGINA - 55, False, f"Empresa: {empresa} Linha: Selecione um item")]
+    y = ALTURA_PAGINA - MARGEM_SUPERIOR
+    geradas = 0
+    numero_secao = 0
+
+    def nova_linha(itens):
+        # Acrescenta uma linha na página atual
+        nonlocal pagina, y
+        for x, negrito, texto in itens:
+            pagina.append((x, y, negrito, texto))
+        y -= ESPACO_LINHA
+
+    while True:
+        numero_secao += 1
+        ativa = rng.random() >= PROPORCAO_INATIVAS
+        principal = 'Sim' if rng.random() < 0.5 else 'Não'
+        separador = '.' if numero_secao % SECOES_COM_PONTO == 0 else ','
+        nome_linha = f"{rng.randint(100, 999)} - {rng.choice(BAIRROS)} / {rng.choice(BAIRROS)}"
+
+        cabecalho = [
+            [(129, True, "Atendimento"), (312, True, "Principal:"), (384, False, principal),
+             (459, True, "Linha:"), (530, False, nome_linha)],
+            [(12, True, "Nome Ida:"), (90, False, nome_linha)],
+            [(312, True, "Ativo:"), (384, False, 'Sim' if ativa else 'Não')],
+            [(12, True, "Nome Volta:"), (88, False, nome_linha)],
+            [(COLUNAS_X['nome'], True, "Nome"), (COLUNAS_X['abrev'], True, "Nome Abrev."),
+             (COLUNAS_X['endereco'], True, "Endereço"), (COLUNAS_X['ordem'], True, "Ordem"),
+             (COLUNAS_X['velocidade'], True, "Vel. Limite"),
+             (COLUNAS_X['latitude'], True, "Latitude"), (COLUNAS_X['longitude'], True, "Longitude")],
+        ]
+        # O cabeçalho da seção não é quebrado entre páginas
+        if y - len(cabecalho) * ESPACO_LINHA < MARGEM_INFERIOR:
+            yield pagina
+            geradas += 1
+            if geradas == paginas:
+                return
+            pagina, y = [], ALTURA_PAGINA - MARGEM_SUPERIOR
+        for itens in cabecalho:
+            nova_linha(itens)
+
+        # Trecho contíguo de paradas (um itinerário)
+        quantidade = rng.randint(*PARADAS_POR_SECAO)
+        inicio = rng.randrange(len(paradas))
+        velocidade = rng.choice((60, 65, 70))
+
+        for ordem in range(1, quantidade + 1):
+            parada = paradas[(inicio + ordem) % len(paradas)]
+            latitude, longitude = parada['latitude'], parada['longitude']
+            if rng.random() < CHANCE_VARIACAO:
+                latitude += rng.choice((-1, 1)) * 1e-5
+            quebra = rng.random() < 0.2
+
+            if y - (2 if quebra else 1) * ESPACO_LINHA < MARGEM_INFERIOR:
+                yield pagina
+                geradas += 1
+                if geradas == paginas:
+                    return
+                pagina, y = [], ALTURA_PAGINA - MARGEM_SUPERIOR
+
+            nova_linha([
+                (COLUNAS_X['nome'], False, parada['nome']),
+                (COLUNAS_X['abrev'], False, parada['abrev']),
+                (COLUNAS_X['endereco'], False, parada['endereco'] + ('' if quebra else ' Brasil')),
+                (COLUNAS_X['ordem'], False, str(ordem)),
+                (COLUNAS_X['velocidade'], False, str(velocidade)),
+                (COLUNAS_X['latitude'], False, _coordenada(latitude, separador)),
+                (COLUNAS_X['longitude'], False, _coordenada(longitude, separador)),
+            ])
+            if quebra:
+                nova_linha([(COLUNAS_X['endereco'], False, "Brasil")])
+
+# ============================================================================
+# ESCRITA DO PDF
+# ============================================================================
+
+def _texto_pdf(texto):
+    dados = texto.encode('cp1252', errors='replace')
+    return dados.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+def _conteudo_pagina(itens):
+    partes = [b'BT']
+    for x, y, negrito, texto in itens:
+        fonte = b'/F2' if negrito else b'/F1'
+        partes.append(b'%s %d Tf 1 0 0 1 %.2f %.2f Tm (%s) Tj'
+                      % (fonte, TAMANHO_FONTE, x, y, _texto_pdf(texto)))
+    partes.append(b'ET')
+    return b'\n'.join(partes)
+
+def gerar_pdf(caminho, paginas, empresa='Empresa Sintética', semente=0):
+    """
+    Grava um PDF sintético com exatamente `paginas` páginas.
+
+    Parâmetros:
+    -----------
+    caminho : str ou Path
+        Arquivo de saída
+    paginas : int
+        Número de páginas
+    empresa : str
+        Nome no cabeçalho "Empresa:"
+    semente : int
+        Semente do gerador aleatório (mesma semente = mesmo PDF)
+
+    Retorna:
+    --------
+    str
+        O caminho gravado
+    """
+    rng = random.Random(semente)
+    # Objetos: 1 catálogo, 2 árvore de páginas, 3 e 4 fontes, depois
+    # (página, conteúdo) para cada página
+    kids = b' '.join(b'%d 0 R' % (5 + 2 * i) for i in range(paginas))
+    deslocamentos = []
+
+    with open(caminho, 'wb') as arquivo:
+        def objeto(corpo):
+            deslocamentos.append(arquivo.tell())
+            arquivo.write(b'%d 0 obj\n' % len(deslocamentos) + corpo + b'\nendobj\n')
+
+        arquivo.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        objeto(b'<< /Type /Catalog /Pages 2 0 R >>')
+        objeto(b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, paginas))
+        for fonte in (b'Helvetica', b'Helvetica-Bold'):
+            objeto(b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>'
+                   % fonte)
+
+        for numero, itens in enumerate(gerar_linhas(paginas, empresa, rng)):
+            conteudo = _conteudo_pagina(itens)
+            objeto(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+                   b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>'
+                   % (LARGURA_PAGINA, ALTURA_PAGINA, 6 + 2 * numero))
+            objeto(b'<< /Length %d >>\nstream\n' % len(conteudo) + conteudo + b'\nendstream')
+
+        inicio_xref = arquivo.tell()
+        arquivo.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(deslocamentos) + 1))
+        arquivo.write(b''.join(b'%010d 00000 n \n' % deslocamento for deslocamento in deslocamentos))
+        arquivo.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                      % (len(deslocamentos) + 1, inicio_xref))
+
+    return str(caminho)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gera um PDF sintético de pontos de ônibus")
+    parser.add_argument('saida', help="arquivo PDF de saída")
+    parser.add_argument('--paginas', type=int, default=10)
+    parser.add_argument('--empresa', default='Empresa Sintética')
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"📄 {gerar_pdf(args.saida, args.paginas, args.empresa, args.semente)} "
+          f"({args.paginas} páginas)")
@@ -0,0 +1,127 @@
+"""
+Cache persistente da extração dos PDFs das empresas.
+
+A chave de cada entrada combina o hash do CONTEÚDO do PDF com a versão do
+extrator e o conjunto de regex usado. Assim, um PDF que não mudou desde a
+última execução nunca é reprocessado pelo pdfplumber, e qualquer mudança no
+extrator invalida automaticamente os resultados antigos.
+"""
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+# ============================================================================
+# CONFIGURAÇÕES DO CACHE
+# ============================================================================
+
+# Diretório onde as entradas do cache são gravadas
+DIRETORIO_CACHE = Path('.cache_extracao')
+
+# Tamanho máximo do cache em disco (entradas mais antigas são removidas)
+LIMITE_CACHE_BYTES = 256 * 1024 * 1024
+
+# ============================================================================
+# CHAVES
+# ============================================================================
+
+def hash_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    """
+    Calcula o SHA-256 do conteúdo de um arquivo, lendo em blocos.
+    """
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+def chave_cache(pdf_path, *partes):
+    """
+    Monta a chave de uma entrada do cache.
+
+    Parâmetros:
+    -----------
+    pdf_path : str
+        Caminho do PDF (apenas o conteúdo entra na chave, não o nome)
+    *partes :
+        Demais componentes da chave (versão do extrator, regex, empresa...)
+
+    Retorna:
+    --------
+    str
+        Chave hexadecimal
+    """
+    sha = hashlib.sha256(hash_arquivo(pdf_path).encode())
+    for parte in partes:
+        sha.update(repr(parte).encode('utf-8'))
+    return sha.hexdigest()
+
+# ============================================================================
+# LEITURA E ESCRITA
+# ============================================================================
+
+def _caminho_entrada(chave):
+    return DIRETORIO_CACHE / f"{chave}.pkl"
+
+def carregar_cache(chave):
+    """
+    Lê uma entrada do cache. Retorna None se não existir ou estiver corrompida.
+    """
+    caminho = _caminho_entrada(chave)
+    if not caminho.exists():
+        return None
+
+    try:
+        with open(caminho, 'rb') as arquivo:
+            valor = pickle.load(arquivo)
+    except Exception:
+        # Entrada corrompida (ex: execução interrompida) - descarta
+        caminho.unlink(missing_ok=True)
+        return None
+
+    # Atualiza a data de acesso para a política de remoção (LRU)
+    os.utime(caminho)
+    return valor
+
+def salvar_cache(chave, valor):
+    """
+    Grava uma entrada no cache e remove as mais antigas se passar do limite.
+    """
+    DIRETORIO_CACHE.mkdir(parents=True, exist_ok=True)
+    caminho = _caminho_entrada(chave)
+
+    # Escrita atômica: grava em arquivo temporário e depois renomeia
+    temporario = caminho.with_suffix(f'.{os.getpid()}.tmp')
+    with open(temporario, 'wb') as arquivo:
+        pickle.dump(valor, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporario, caminho)
+
+    podar_cache()
+
+def podar_cache(limite_bytes=None):
+    """
+    Remove as entradas usadas há mais tempo até o cache caber no limite.
+    """
+    if limite_bytes is None:
+        limite_bytes = LIMITE_CACHE_BYTES
+
+    if not DIRETORIO_CACHE.exists():
+        return
+
+    entradas = []
+    for caminho in DIRETORIO_CACHE.glob('*.pkl'):
+        try:
+            info = caminho.stat()
+        except FileNotFoundError:
+            continue
+        entradas.append((info.st_mtime, info.st_size, caminho))
+
+    total = sum(tamanho for _, tamanho, _ in entradas)
+
+    # Mais antigas primeiro
+    for _, tamanho, caminho in sorted(entradas):
+        if total <= limite_bytes:
+            break
+        caminho.unlink(missing_ok=True)
+        total -= tamanho
@@ -0,0 +1,245 @@
+"""
+Densidade e cobertura das paradas numa grade sobre Maceió.
+
+A caixa LIMITES_MACEIO é dividida em células quadradas de
+`tamanho_celula_metros` e tudo é calculado com NumPy, sem laço por parada:
+
+- paradas por célula, no total e por empresa (np.bincount sobre o índice
+  linear da célula);
+- cobertura a pé: uma célula é coberta por uma empresa se o CENTRO da
+  célula está a até `raio_caminhada_metros` de alguma parada dela (KD-tree
+  das paradas, distância de haversine - ver indice_paradas.py);
+- lacunas: células sem nenhuma parada de nenhuma empresa a pé, da mais
+  distante para a mais próxima.
+
+A caixa inclui mar e áreas desabitadas: as lacunas são candidatas a
+verificar, não falhas de atendimento por definição.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+from folium import plugins
+from scipy.spatial import cKDTree
+
+from deduplicacao_espacial import METROS_POR_GRAU
+from indice_paradas import corda_para_metros, metros_para_corda, vetores_unitarios
+from scanner_coordenadas import LIMITES_MACEIO
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Lado das células da grade
+TAMANHO_CELULA_METROS = 250.0
+
+# Distância de caminhada até uma parada (~5 minutos a pé)
+RAIO_CAMINHADA_METROS = 400.0
+
+# Lacunas mostradas no terminal (o arquivo _LACUNAS.parquet tem todas)
+LACUNAS_EXIBIDAS = 5
+
+# Camada de calor (desligada ao abrir o mapa)
+NOME_CAMADA_CALOR = 'Densidade de paradas'
+RAIO_CALOR = 18
+DESFOQUE_CALOR = 15
+
+# ============================================================================
+# GRADE
+# ============================================================================
+
+def montar_grade(limites=LIMITES_MACEIO, tamanho_celula_metros=TAMANHO_CELULA_METROS):
+    """
+    Grade regular sobre a caixa de limites.
+
+    Retorna:
+    --------
+    dict
+        lat_min, lon_min, passo_lat, passo_lon (graus), linhas, colunas e
+        tamanho_celula_metros
+    """
+    lat_media = (limites['lat_min'] + limites['lat_max']) / 2
+    passo_lat = tamanho_celula_metros / METROS_POR_GRAU
+    passo_lon = tamanho_celula_metros / (METROS_POR_GRAU * math.cos(math.radians(lat_media)))
+    return {
+        'lat_min': limites['lat_min'],
+        'lon_min': limites['lon_min'],
+        'passo_lat': passo_lat,
+        'passo_lon': passo_lon,
+        'linhas': math.ceil((limites['lat_max'] - limites['lat_min']) / passo_lat),
+        'colunas': math.ceil((limites['lon_max'] - limites['lon_min']) / passo_lon),
+        'tamanho_celula_metros': tamanho_celula_metros,
+    }
+
+def celulas_dos_pontos(latitudes, longitudes, grade):
+    """
+    Índice linear (linha * colunas + coluna) da célula de cada ponto.
+
+    Retorna:
+    --------
+    np.ndarray
+        Índices em int64; -1 para pontos fora da grade
+    """
+    linha = np.floor((np.asarray(latitudes, dtype=np.float64) - grade['lat_min'])
+                     / grade['passo_lat']).astype(np.int64)
+    coluna = np.floor((np.asarray(longitudes, dtype=np.float64) - grade['lon_min'])
+                      / grade['passo_lon']).astype(np.int64)
+    dentro = (linha >= 0) & (linha < grade['linhas']) & (coluna >= 0) & (coluna < grade['colunas'])
+    return np.where(dentro, linha * grade['colunas'] + coluna, -1)
+
+def centros_das_celulas(grade):
+    """
+    Latitude e longitude do centro de todas as células, na ordem do índice linear.
+    """
+    linhas, colunas = np.divmod(np.arange(grade['linhas'] * grade['colunas']), grade['colunas'])
+    return (grade['lat_min'] + (linhas + 0.5) * grade['passo_lat'],
+            grade['lon_min'] + (colunas + 0.5) * grade['passo_lon'])
+
+# ============================================================================
+# ANÁLISE
+# ============================================================================
+
+def analisar_cobertura(df, tamanho_celula_metros=TAMANHO_CELULA_METROS,
+                       raio_caminhada_metros=RAIO_CAMINHADA_METROS, limites=LIMITES_MACEIO):
+    """
+    Contagens e cobertura por célula da grade.
+
+    Parâmetros:
+    -----------
+    df : pd.DataFrame
+        Pontos com 'empresa', 'latitude' e 'longitude' - uma linha por
+        parada de cada empresa (uma parada compartilhada conta para todas)
+    tamanho_celula_metros : float
+        Lado das células
+    raio_caminhada_metros : float
+        Distância a pé que define a cobertura
+    limites : dict
+        Caixa analisada (lat_min, lat_max, lon_min, lon_max)
+
+    Retorna:
+    --------
+    pd.DataFrame
+        Uma linha por célula: celula, linha, coluna, latitude/longitude do
+        centro, paradas, paradas_<empresa>, coberta_<empresa>,
+        empresas_cobrindo e distancia_parada_m (da parada mais próxima de
+        qualquer empresa). tabela.attrs guarda a grade, o raio e as empresas.
+    """
+    grade = montar_grade(limites, tamanho_celula_metros)
+    total_celulas = grade['linhas'] * grade['colunas']
+    lat_centros, lon_centros = centros_das_celulas(grade)
+
+    empresas = df['empresa'].astype(str).to_numpy()
+    codigos, nomes = pd.factorize(empresas)
+    celulas = celulas_dos_pontos(df['latitude'].to_numpy(), df['longitude'].to_numpy(), grade)
+    dentro = celulas >= 0
+
+    # Contagem por (empresa, célula) numa única passada
+    contagens = np.bincount(codigos[dentro] * total_celulas + celulas[dentro],
+                            minlength=len(nomes) * total_celulas).reshape(len(nomes), total_celulas)
+
+    tabela = pd.DataFrame({
+        'celula': np.arange(total_celulas),
+        'linha': np.arange(total_celulas) // grade['colunas'],
+        'coluna': np.arange(total_celulas) % grade['colunas'],
+        'latitude': lat_centros,
+        'longitude': lon_centros,
+        'paradas': contagens.sum(axis=0),
+    })
+
+    # Cobertura a pé: centro da célula a até raio_caminhada_metros de uma parada
+    vetores_centros = vetores_unitarios(lat_centros, lon_centros)
+    vetores_paradas = vetores_unitarios(df['latitude'].to_numpy(), df['longitude'].to_numpy())
+    limite = metros_para_corda(raio_caminhada_metros)
+    empresas_cobrindo = np.zeros(total_celulas, dtype=np.int64)
+
+    for codigo, empresa in enumerate(nomes):
+        tabela[f'paradas_{empresa}'] = contagens[codigo]
+        arvore = cKDTree(vetores_paradas[codigos == codigo])
+        distancias, _ = arvore.query(vetores_centros, distance_upper_bound=limite)
+        coberta = np.isfinite(distancias)
+        tabela[f'coberta_{empresa}'] = coberta
+        empresas_cobrindo += coberta
+
+    tabela['empresas_cobrindo'] = empresas_cobrindo
+    if len(vetores_paradas):
+        distancias, _ = cKDTree(vetores_paradas).query(vetores_centros)
+        tabela['distancia_parada_m'] = corda_para_metros(distancias)
+    else:
+        tabela['distancia_parada_m'] = np.inf
+
+    tabela.attrs['grade'] = grade
+    tabela.attrs['raio_caminhada_metros'] = raio_caminhada_metros
+    tabela.attrs['empresas'] = list(nomes)
+    return tabela
+
+def resumo_cobertura(tabela):
+    """
+    Resumo por empresa (e de todas juntas) de uma tabela de analisar_cobertura.
+
+    Retorna:
+    --------
+    pd.DataFrame
+        Índice = empresa; colunas paradas, celulas_com_paradas,
+        max_paradas_celula, celulas_cobertas, area_coberta_km2 e
+        cobertura_pct (da caixa analisada)
+    """
+    area_celula_km2 = (tabela.attrs['grade']['tamanho_celula_metros'] / 1000) ** 2
+    total_celulas = len(tabela)
+
+    linhas = {}
+    for empresa in tabela.attrs['empresas'] + ['TODAS']:
+        if empresa == 'TODAS':
+            paradas = tabela['paradas']
+            coberta = tabela['empresas_cobrindo'] > 0
+        else:
+            paradas = tabela[f'paradas_{empresa}']
+            coberta = tabela[f'coberta_{empresa}']
+        celulas_cobertas = int(coberta.sum())
+        linhas[empresa] = {
+            'paradas': int(paradas.sum()),
+            'celulas_com_paradas': int((paradas > 0).sum()),
+            'max_paradas_celula': int(paradas.max()) if total_celulas else 0,
+            'celulas_cobertas': celulas_cobertas,
+            'area_coberta_km2': round(celulas_cobertas * area_celula_km2, 2),
+            'cobertura_pct': round(100 * celulas_cobertas / total_celulas, 1) if total_celulas else 0.0,
+        }
+    return pd.DataFrame.from_dict(linhas, orient='index')
+
+def lacunas(tabela, quantidade=None):
+    """
+    Células sem parada a pé de nenhuma empresa, da mais distante para a mais próxima.
+
+    quantidade=None devolve todas.
+    """
+    sem_cobertura = tabela[tabela['empresas_cobrindo'] == 0]
+    colunas = ['celula', 'latitude', 'longitude', 'distancia_parada_m']
+    if quantidade is None:
+        return sem_cobertura.sort_values('distancia_parada_m', ascending=False,
+                                         kind='stable')[colunas].reset_index(drop=True)
+    return sem_cobertura.nlargest(quantidade, 'distancia_parada_m')[colunas].reset_index(drop=True)
+
+# ============================================================================
+# MAPA DE CALOR
+# ============================================================================
+
+def adicionar_mapa_calor(mapa, tabela, nome=NOME_CAMADA_CALOR, mostrar=False):
+    """
+    Camada plugins.HeatMap com a densidade de paradas por célula.
+
+    Usa um ponto por célula ocupada (centro, peso = paradas), não um por
+    parada: o HTML fica do tamanho da grade ocupada.
+    """
+    ocupadas = tabela[tabela['paradas'] > 0]
+    # Pesos de 0 a 1 (o Leaflet.heat satura acima de 1)
+    pesos = ocupadas['paradas'] / ocupadas['paradas'].max() if len(ocupadas) else ocupadas['paradas']
+    dados = np.column_stack((ocupadas['latitude'].round(5), ocupadas['longitude'].round(5),
+                             pesos.round(3))).tolist()
+    plugins.HeatMap(
+        dados,
+        name=nome,
+        min_opacity=0.3,
+        radius=RAIO_CALOR,
+        blur=DESFOQUE_CALOR,
+        show=mostrar
+    ).add_to(mapa)
@@ -0,0 +1,161 @@
+"""
+Versões pré-comprimidas (.gz / .br) dos arquivos gerados.
+
+Servidores estáticos (nginx gzip_static/brotli_static, Caddy precompressed...)
+entregam o irmão comprimido direto, sem comprimir a cada requisição. A
+compressão roda num pool de threads (zlib e brotli liberam o GIL), em
+paralelo com a montagem do próximo mapa.
+
+Brotli é opcional: sem o pacote `brotli` instalado, só o .gz é gerado.
+"""
+
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Extensões dos arquivos que recebem versões comprimidas
+EXTENSOES_COMPRIMIVEIS = ('.html', '.csv', '.geojson', '.json', '.js', '.css')
+
+# Nível máximo: os arquivos são comprimidos uma vez e servidos muitas
+NIVEL_GZIP = 9
+QUALIDADE_BROTLI = 11
+
+# ============================================================================
+# COMPRESSÃO
+# ============================================================================
+
+def formatos_disponiveis():
+    """
+    Retorna as extensões geradas: ('.gz',) ou ('.gz', '.br').
+    """
+    return ('.gz', '.br') if brotli is not None else ('.gz',)
+
+def _comprimir(dados, formato):
+    if formato == '.gz':
+        # mtime=0: mesma entrada, mesmo .gz (não muda a cada execução)
+        return gzip.compress(dados, compresslevel=NIVEL_GZIP, mtime=0)
+    return brotli.compress(dados, quality=QUALIDADE_BROTLI)
+
+def comprimir_arquivo(caminho, formatos=None):
+    """
+    Grava os irmãos comprimidos de um arquivo (ex: mapa.html.gz).
+
+    Irmãos mais novos que o original são mantidos.
+
+    Retorna:
+    --------
+    dict
+        {formato: tamanho em bytes} de cada irmão
+    """
+    caminho = Path(caminho)
+    formatos = formatos or formatos_disponiveis()
+    mtime_original = caminho.stat().st_mtime
+    dados = None
+    tamanhos = {}
+
+    for formato in formatos:
+        destino = caminho.with_name(caminho.name + formato)
+        if not destino.exists() or destino.stat().st_mtime < mtime_original:
+            if dados is None:
+                dados = caminho.read_bytes()
+            destino.write_bytes(_comprimir(dados, formato))
+        tamanhos[formato] = destino.stat().st_size
+
+    return tamanhos
+
+def tamanhos_comprimidos(caminho):
+    """
+    Tamanhos dos irmãos comprimidos já existentes de um arquivo.
+
+    Retorna:
+    --------
+    dict
+        {formato: tamanho em bytes}
+    """
+    caminho = Path(caminho)
+    tamanhos = {}
+    for formato in ('.gz', '.br'):
+        destino = caminho.with_name(caminho.name + formato)
+        if destino.exists():
+            tamanhos[formato] = destino.stat().st_size
+    return tamanhos
+
+class CompressorArtefatos:
+    """
+    Pool de threads que comprime os arquivos à medida que são gerados.
+
+    Uso:
+        with CompressorArtefatos(ativo=True) as compressor:
+            ...grava mapa.html...
+            compressor.agendar('mapa.html')
+        # ao sair do with (ou após encerrar()), todas as compressões terminaram
+
+    Com ativo=False, agendar() não faz nada.
+    """
+
+    def __init__(self, ativo=True, workers=2, formatos=None):
+        self.ativo = ativo
+        self.formatos = formatos or formatos_disponiveis()
+        self._pool = ThreadPoolExecutor(max_workers=workers) if ativo else None
+        self._futuros = {}
+
+    def agendar(self, *caminhos):
+        """
+        Agenda a compressão dos arquivos (ignora os inexistentes e as
+        extensões fora de EXTENSOES_COMPRIMIVEIS).
+        """
+        if not self.ativo:
+            return
+        for caminho in caminhos:
+            caminho = Path(caminho)
+            if caminho.suffix not in EXTENSOES_COMPRIMIVEIS or not caminho.is_file():
+                continue
+            # O mesmo arquivo agendado de novo espera a compressão anterior
+            anterior = self._futuros.get(caminho)
+            self._futuros[caminho] = self._pool.submit(self._comprimir, caminho, anterior)
+
+    def _comprimir(self, caminho, anterior):
+        if anterior is not None:
+            anterior.result()
+        return comprimir_arquivo(caminho, self.formatos)
+
+    def aguardar(self):
+        """
+        Espera as compressões agendadas.
+
+        Retorna:
+        --------
+        dict
+            {caminho: {formato: tamanho em bytes}}
+        """
+        resultados = {caminho: futuro.result() for caminho, futuro in self._futuros.items()}
+        self._futuros = {}
+        return resultados
+
+    def encerrar(self):
+        """
+        Espera as compressões pendentes e libera as threads.
+        """
+        if self._pool is None:
+            return {}
+        try:
+            return self.aguardar()
+        finally:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.encerrar()
+        return False
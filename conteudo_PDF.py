@@ -1,6 +1,11 @@
 import pdfplumber
 import re
 
+from scanner_coordenadas import PADRAO_COORDENADAS, PADRAO_CODIGO
+
+# Cabeçalho da tabela
+PADRAO_CABECALHO = re.compile(r'Endereço.*Latitude')
+
 def analisar_pdf(pdf_path):
     print(f"\n🔍 ANALISANDO: {pdf_path}")
     
@@ -22,15 +27,15 @@ def analisar_pdf(pdf_path):
             
             # Procurar padrões específicos
             padroes = [
-                r'(-?\d{1,2}[,.]\d+)\s+(-?\d{1,2}[,.]\d+)',  # Coordenadas
-                r'[A-Z]{2}\d+',  # Códigos como PN987
-                r'Endereço.*Latitude',  # Cabeçalho da tabela
+                PADRAO_COORDENADAS,  # Coordenadas
+                PADRAO_CODIGO,  # Códigos como PN987
+                PADRAO_CABECALHO,  # Cabeçalho da tabela
             ]
             
             for padrao in padroes:
-                encontrados = re.findall(padrao, texto)
+                encontrados = padrao.findall(texto)
                 if encontrados:
-                    print(f"Padrão '{padrao}': {len(encontrados)} encontrados")
+                    print(f"Padrão '{padrao.pattern}': {len(encontrados)} encontrados")
                     print(f"Exemplo: {encontrados[:3]}")
 
 # Testar com UM PDF primeiro
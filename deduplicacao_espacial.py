@@ -0,0 +1,169 @@
+"""
+Remoção de pontos duplicados por PROXIMIDADE, não por igualdade exata.
+
+drop_duplicates(subset=['latitude', 'longitude']) só junta floats idênticos:
+o mesmo ponto impresso com outra precisão ou deslocado um metro sobrevive e
+vira outro marcador no mapa. Aqui os pontos são distribuídos numa grade de
+células do tamanho do raio (hash espacial); cada ponto só é comparado com os
+das 9 células vizinhas, o que mantém o custo quase linear. Pontos a menos de
+`raio_metros` uns dos outros são unidos (union-find) e cada grupo vira uma
+única linha, com o melhor código/endereço e a lista das linhas de origem.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Raio padrão para considerar dois pontos como o mesmo ponto físico
+RAIO_DEDUPLICACAO_METROS = 5.0
+
+# Metros por grau de latitude (aproximação esférica)
+METROS_POR_GRAU = 111_320.0
+
+# Códigos que não identificam o ponto (perdem para qualquer código real)
+CODIGOS_GENERICOS = ('DESCONHECIDO', 'Ponto_')
+
+# ============================================================================
+# UNION-FIND
+# ============================================================================
+
+def _raiz(pais, i):
+    while pais[i] != i:
+        pais[i] = pais[pais[i]]  # Compressão de caminho
+        i = pais[i]
+    return i
+
+def _unir(pais, a, b):
+    raiz_a, raiz_b = _raiz(pais, a), _raiz(pais, b)
+    if raiz_a != raiz_b:
+        pais[max(raiz_a, raiz_b)] = min(raiz_a, raiz_b)
+
+# ============================================================================
+# AGRUPAMENTO
+# ============================================================================
+
+def agrupar_proximos(latitudes, longitudes, raio_metros=RAIO_DEDUPLICACAO_METROS, chaves=None):
+    """
+    Agrupa pontos que estão a menos de raio_metros uns dos outros.
+
+    Parâmetros:
+    -----------
+    latitudes, longitudes : array-like
+        Coordenadas em graus
+    raio_metros : float
+        Distância máxima para juntar dois pontos
+    chaves : array-like, opcional
+        Só pontos com a mesma chave (ex: empresa) podem ser unidos
+
+    Retorna:
+    --------
+    np.ndarray
+        Rótulo do grupo de cada ponto (o menor índice do grupo)
+    """
+    lat = np.asarray(latitudes, dtype=np.float64)
+    lon = np.asarray(longitudes, dtype=np.float64)
+    n = len(lat)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    # Projeção local em metros (equiretangular - suficiente para alguns metros)
+    cos_lat = math.cos(math.radians(float(np.mean(lat))))
+    y = lat * METROS_POR_GRAU
+    x = lon * METROS_POR_GRAU * cos_lat
+
+    celula_x = np.floor(x / raio_metros).astype(np.int64)
+    celula_y = np.floor(y / raio_metros).astype(np.int64)
+    x, y = x.tolist(), y.tolist()  # Acesso escalar mais rápido no laço
+    if chaves is None:
+        chaves = np.zeros(n, dtype=np.int64)
+    else:
+        chaves = pd.factorize(np.asarray(chaves))[0]
+
+    # Hash espacial: (chave, célula) -> índices dos pontos
+    grade = {}
+    for i, celula in enumerate(zip(chaves.tolist(), celula_x.tolist(), celula_y.tolist())):
+        grade.setdefault(celula, []).append(i)
+
+    pais = list(range(n))
+    raio2 = raio_metros * raio_metros
+
+    for (chave, cx, cy), indices in grade.items():
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                vizinhos = grade.get((chave, cx + dx, cy + dy))
+                if not vizinhos:
+                    continue
+                for i in indices:
+                    for j in vizinhos:
+                        if j <= i:
+                            continue
+                        if (x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2 <= raio2:
+                            _unir(pais, i, j)
+
+    return np.array([_raiz(pais, i) for i in range(n)], dtype=np.int64)
+
+def _pontuacao(df):
+    """
+    Qualidade de cada linha: código real vale mais; depois, endereço maior.
+    """
+    codigos = df['codigo'].astype(str)
+    generico = codigos.str.startswith(CODIGOS_GENERICOS)
+    tamanho_endereco = df['endereco'].astype(str).str.len() if 'endereco' in df else 0
+    return (~generico).astype(np.int64) * 1000 + tamanho_endereco
+
+def deduplicar_espacial(df, raio_metros=RAIO_DEDUPLICACAO_METROS, por_empresa=True):
+    """
+    Junta pontos próximos, mantendo o melhor código/endereço de cada grupo.
+
+    Parâmetros:
+    -----------
+    df : pd.DataFrame
+        Pontos com 'latitude', 'longitude', 'codigo' (e opcionalmente
+        'endereco' e 'empresa')
+    raio_metros : float
+        Distância máxima para considerar dois pontos o mesmo
+    por_empresa : bool
+        Se True, só junta pontos da mesma empresa
+
+    Retorna:
+    --------
+    pd.DataFrame
+        Uma linha por grupo, na ordem da primeira ocorrência, com a coluna
+        'linhas_mescladas' listando os índices das linhas de origem
+    """
+    if df.empty:
+        return df
+
+    chaves = df['empresa'].to_numpy() if por_empresa and 'empresa' in df else None
+    grupos = agrupar_proximos(df['latitude'].to_numpy(), df['longitude'].to_numpy(),
+                              raio_metros, chaves)
+
+    trabalho = df.reset_index(drop=True)
+
+    # Linhas de origem: índices do df original (ou listas de uma dedup anterior)
+    if 'linhas_mescladas' in trabalho:
+        origens = trabalho['linhas_mescladas'].tolist()
+    else:
+        origens = [[indice] for indice in df.index.tolist()]
+
+    mescladas = {}
+    for grupo, origem in zip(grupos.tolist(), origens):
+        mescladas.setdefault(grupo, []).extend(origem)
+
+    # Melhor linha de cada grupo (empate: a primeira)
+    trabalho['_grupo'] = grupos
+    trabalho['_pontuacao'] = _pontuacao(trabalho).to_numpy()
+    melhores = (trabalho.sort_values(['_grupo', '_pontuacao'], ascending=[True, False],
+                                     kind='stable')
+                .drop_duplicates('_grupo'))
+
+    resultado = melhores.drop(columns=['_grupo', '_pontuacao'])
+    resultado['linhas_mescladas'] = [mescladas[grupo] for grupo in melhores['_grupo']]
+    resultado.index = df.index[resultado.index]
+
+    return resultado
@@ -0,0 +1,37 @@
+"""
+Aparência comum dos mapas: cores das empresas, centro de Maceió e os textos
+de popup/tooltip de cada ponto.
+
+Fica separado de main.py para que servidor_mapas.py use as mesmas cores e
+textos sem importar o extrator inteiro (pdfplumber, folium, pipeline...).
+"""
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+CORES_EMPRESAS = {
+    'Real': '#FF0000',           # Vermelho
+    'SaoFrancisco': '#0000FF',   # Azul
+    'CidadeMaceio': '#FFFF00'    # Amarelo
+}
+
+# Coordenadas do centro de Maceió
+MACEIO_CENTRO = [-9.6498, -35.7089]
+
+# ============================================================================
+# TEXTOS DOS PONTOS
+# ============================================================================
+
+# Popups e tooltips dos modos 'marcadores' e 'pacote' (sintaxe de montar_textos)
+POPUP_MAPA_EMPRESA = """
+            <div style="font-family: Arial; width: 200px;">
+                <h4 style="color: {cor}; margin: 0;">{empresa}</h4>
+                <hr style="margin: 5px 0;">
+                <b>Código:</b> {codigo}<br>
+                <b>Lat:</b> {latitude:.5f}<br>
+                <b>Lon:</b> {longitude:.5f}<br>
+                <small>{endereco}</small>
+            </div>
+            """
+TOOLTIP_MAPA_EMPRESA = "{codigo}"
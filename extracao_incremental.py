@@ -0,0 +1,216 @@
+"""
+Reextração incremental: só as páginas que mudaram são reprocessadas.
+
+Cada página do PDF tem uma impressão digital (SHA-256 do seu fluxo de
+conteúdo). Na execução seguinte, páginas com a mesma impressão reaproveitam
+os pontos já extraídos - mesmo que tenham mudado de posição no arquivo - e
+apenas as páginas novas ou editadas passam de novo pelo pdfplumber.
+
+O estado (impressões + pontos brutos por página, antes da remoção de
+duplicatas) fica em DIRETORIO_ESTADO, um arquivo por empresa.
+"""
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+import pandas as pd
+import pdfplumber
+from pdfminer.pdftypes import resolve1
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Diretório do estado incremental
+DIRETORIO_ESTADO = Path('.estado_incremental')
+
+# Códigos que não identificam um ponto (não servem para detectar "movidos")
+CODIGOS_GENERICOS = {'DESCONHECIDO'}
+
+# ============================================================================
+# IMPRESSÕES DIGITAIS
+# ============================================================================
+
+def _impressao_pagina(pagina):
+    sha = hashlib.sha256()
+    conteudos = pagina.page_obj.contents or []
+    if not isinstance(conteudos, list):
+        conteudos = [conteudos]
+    for conteudo in conteudos:
+        fluxo = resolve1(conteudo)
+        sha.update(fluxo.get_data() or b'')
+    return sha.hexdigest()
+
+def impressoes_paginas(pdf_path):
+    """
+    Calcula a impressão digital de cada página (hash do fluxo de conteúdo).
+
+    Não interpreta o texto, por isso é muito mais rápido que extract_text().
+
+    Retorna:
+    --------
+    list
+        Hash hexadecimal de cada página, em ordem
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        return [_impressao_pagina(pagina) for pagina in pdf.pages]
+
+# ============================================================================
+# ESTADO
+# ============================================================================
+
+def _caminho_estado(empresa_nome):
+    return DIRETORIO_ESTADO / f"{empresa_nome}.pkl"
+
+def carregar_estado(empresa_nome, versao):
+    """
+    Lê o estado da última extração da empresa (ou None se não houver).
+
+    Um estado gravado por outra versão do extrator é ignorado, já que os
+    pontos das páginas "inalteradas" poderiam ter sido extraídos de outra forma.
+
+    Retorna:
+    --------
+    dict or None
+        {'versao': str, 'impressoes': list, 'pontos': pd.DataFrame} -
+        pontos brutos, antes
+        da remoção de duplicatas, com a coluna 'pagina' (1 = primeira)
+    """
+    caminho = _caminho_estado(empresa_nome)
+    if not caminho.exists():
+        return None
+    try:
+        with open(caminho, 'rb') as arquivo:
+            estado = pickle.load(arquivo)
+    except Exception:
+        return None
+
+    if estado.get('versao') != versao:
+        return None
+    return estado
+
+def salvar_estado(empresa_nome, versao, impressoes, pontos):
+    """
+    Grava as impressões e os pontos brutos da extração atual.
+    """
+    DIRETORIO_ESTADO.mkdir(parents=True, exist_ok=True)
+    caminho = _caminho_estado(empresa_nome)
+    temporario = caminho.with_suffix(f'.{os.getpid()}.tmp')
+    with open(temporario, 'wb') as arquivo:
+        pickle.dump({'versao': versao, 'impressoes': impressoes, 'pontos': pontos}, arquivo,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporario, caminho)
+
+# ============================================================================
+# PLANEJAMENTO E JUNÇÃO
+# ============================================================================
+
+def planejar_paginas(impressoes_antigas, impressoes_novas):
+    """
+    Decide o que reaproveitar e o que reextrair.
+
+    Retorna:
+    --------
+    tuple
+        (reaproveitadas, alteradas): reaproveitadas é {indice_novo:
+        indice_antigo} para páginas com conteúdo idêntico; alteradas é a
+        lista de índices (0 = primeira) que precisam ser reextraídos
+    """
+    posicao_antiga = {}
+    for indice, impressao in enumerate(impressoes_antigas):
+        posicao_antiga.setdefault(impressao, indice)
+
+    reaproveitadas = {}
+    alteradas = []
+    for indice, impressao in enumerate(impressoes_novas):
+        if impressao in posicao_antiga:
+            reaproveitadas[indice] = posicao_antiga[impressao]
+        else:
+            alteradas.append(indice)
+
+    return reaproveitadas, alteradas
+
+def juntar_pontos(pontos_antigos, reaproveitadas, pontos_novos):
+    """
+    Junta os pontos reaproveitados (renumerando a página) com os novos.
+
+    Parâmetros:
+    -----------
+    pontos_antigos : pd.DataFrame
+        Pontos brutos da extração anterior
+    reaproveitadas : dict
+        {indice_novo: indice_antigo}, de planejar_paginas
+    pontos_novos : pd.DataFrame
+        Pontos extraídos das páginas alteradas
+
+    Retorna:
+    --------
+    pd.DataFrame
+        Pontos brutos de todas as páginas, em ordem de página
+    """
+    partes = []
+
+    if reaproveitadas and not pontos_antigos.empty:
+        # pagina antiga -> pagina nova (uma página antiga pode se repetir)
+        mapa = pd.DataFrame({
+            'pagina': [antigo + 1 for antigo in reaproveitadas.values()],
+            'pagina_nova': [novo + 1 for novo in reaproveitadas.keys()],
+        })
+        reaproveitados = pontos_antigos.merge(mapa, on='pagina')
+        reaproveitados['pagina'] = reaproveitados.pop('pagina_nova')
+        partes.append(reaproveitados)
+
+    if not pontos_novos.empty:
+        partes.append(pontos_novos)
+
+    if not partes:
+        return pd.DataFrame()
+
+    pontos = pd.concat(partes, ignore_index=True)
+    return pontos.sort_values('pagina', kind='stable').reset_index(drop=True)
+
+def comparar_pontos(df_antigo, df_novo):
+    """
+    Compara duas extrações e classifica as mudanças nos pontos.
+
+    Pontos com código conhecido são comparados pelo código (mesmo código em
+    outra coordenada = "movido"); os demais, pela coordenada.
+
+    Retorna:
+    --------
+    dict
+        {'adicionados': pd.DataFrame, 'removidos': pd.DataFrame,
+         'movidos': pd.DataFrame}
+    """
+    colunas = ['codigo', 'latitude', 'longitude']
+    vazio = pd.DataFrame(columns=colunas)
+    if df_antigo is None or df_antigo.empty:
+        return {'adicionados': df_novo[colunas] if not df_novo.empty else vazio,
+                'removidos': vazio, 'movidos': vazio}
+    if df_novo.empty:
+        return {'adicionados': vazio, 'removidos': df_antigo[colunas], 'movidos': vazio}
+
+    antigo = df_antigo[colunas].drop_duplicates()
+    novo = df_novo[colunas].drop_duplicates()
+
+    # Mesma coordenada e mesmo código: nada mudou
+    juncao = antigo.merge(novo, how='outer', on=colunas, indicator=True)
+    so_antigo = juncao[juncao['_merge'] == 'left_only'][colunas]
+    so_novo = juncao[juncao['_merge'] == 'right_only'][colunas]
+
+    # Mesmo código em coordenada diferente: ponto movido
+    identificados_antigo = so_antigo[~so_antigo['codigo'].isin(CODIGOS_GENERICOS)]
+    identificados_novo = so_novo[~so_novo['codigo'].isin(CODIGOS_GENERICOS)]
+    movidos = identificados_antigo.drop_duplicates('codigo').merge(
+        identificados_novo.drop_duplicates('codigo'),
+        on='codigo', suffixes=('_antiga', '_nova')
+    )
+
+    codigos_movidos = set(movidos['codigo'])
+    return {
+        'adicionados': so_novo[~so_novo['codigo'].isin(codigos_movidos)],
+        'removidos': so_antigo[~so_antigo['codigo'].isin(codigos_movidos)],
+        'movidos': movidos,
+    }
@@ -0,0 +1,330 @@
+"""
+Motor de extração por LAYOUT (geometria das palavras do pdfplumber).
+
+Em vez de reconstruir o texto da página e aplicar regex sobre ele, usa as
+palavras com suas posições (x0, top). As faixas de cada coluna da tabela
+(Nome, Nome Abrev., Endereço, Ordem, Vel. Limite, Latitude, Longitude) são
+aprendidas do primeiro cabeçalho encontrado e reaproveitadas em todas as
+páginas seguintes: cada palavra vai para uma coluna por busca binária no x.
+
+Os marcadores de seção ("Atendimento Principal:" / "Linha:") e o campo
+"Ativo:" continuam sendo respeitados, como no motor de regex.
+"""
+
+from bisect import bisect_right
+
+import pdfplumber
+from pdfminer.layout import LTChar, LTContainer
+
+from registros_pontos import BufferPontos
+from scanner_coordenadas import LIMITES_MACEIO, PADRAO_CODIGO
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Colunas da tabela, na ordem em que aparecem, e a palavra do cabeçalho
+# que marca o início de cada uma
+COLUNAS_TABELA = [
+    ('nome', 'Nome'),
+    ('abrev', 'Nome'),          # "Nome Abrev." - segundo "Nome" da linha
+    ('endereco', 'Endereço'),
+    ('ordem', 'Ordem'),
+    ('velocidade', 'Vel.'),
+    ('latitude', 'Latitude'),
+    ('longitude', 'Longitude'),
+]
+
+# Folga (em pontos) à esquerda do cabeçalho ao definir o início da coluna
+FOLGA_COLUNA = 4
+
+# Distância vertical máxima entre palavras da mesma linha da tabela
+TOLERANCIA_LINHA = 3
+
+# Distância horizontal máxima entre letras da mesma palavra
+TOLERANCIA_PALAVRA = 3
+
+# Distância vertical máxima entre uma linha da tabela e a continuação do seu
+# endereço (~12.8 no PDF; a próxima linha da tabela vem a ~18 e o rodapé
+# "Cadastro/Operacional/Atendimento <data>" a mais de 30)
+DISTANCIA_CONTINUACAO = 15
+
+# ============================================================================
+# GEOMETRIA
+# ============================================================================
+
+def _iterar_caracteres(objeto):
+    for filho in objeto:
+        if isinstance(filho, LTChar):
+            yield filho
+        elif isinstance(filho, LTContainer):
+            yield from _iterar_caracteres(filho)
+
+def extrair_palavras(pagina, tolerancia=TOLERANCIA_PALAVRA):
+    """
+    Monta as palavras da página direto dos objetos LTChar do pdfminer.
+
+    Equivale a pagina.extract_words(), mas evita a conversão de cada
+    caractere em dicionário feita pelo pdfplumber (a etapa mais cara depois
+    da interpretação do PDF) - só x0, x1 e top são necessários aqui.
+
+    Retorna:
+    --------
+    list
+        Dicionários com 'text', 'x0', 'x1' e 'top'
+    """
+    altura = pagina.layout.y1
+    palavras = []
+    atual = None
+
+    for char in _iterar_caracteres(pagina.layout):
+        texto = char.get_text()
+        top = altura - char.y1
+
+        continua = (
+            atual is not None
+            and not texto.isspace()
+            and abs(top - atual['top']) <= tolerancia
+            and -tolerancia <= char.x0 - atual['x1'] <= tolerancia
+        )
+
+        if continua:
+            atual['text'] += texto
+            atual['x1'] = char.x1
+        elif texto.isspace():
+            atual = None
+        else:
+            atual = {'text': texto, 'x0': char.x0, 'x1': char.x1, 'top': top}
+            palavras.append(atual)
+
+    return palavras
+
+def agrupar_linhas(palavras, tolerancia=TOLERANCIA_LINHA):
+    """
+    Agrupa as palavras em linhas visuais pela posição vertical (top).
+
+    Retorna:
+    --------
+    list
+        Lista de linhas; cada linha é uma lista de palavras ordenada por x0
+    """
+    linhas = []
+    topo_atual = None
+
+    for palavra in sorted(palavras, key=lambda p: (p['top'], p['x0'])):
+        if topo_atual is None or palavra['top'] - topo_atual > tolerancia:
+            linhas.append([])
+            topo_atual = palavra['top']
+        linhas[-1].append(palavra)
+
+    return [sorted(linha, key=lambda p: p['x0']) for linha in linhas]
+
+def aprender_colunas(linha):
+    """
+    Aprende o início (x) de cada coluna a partir da linha de cabeçalho.
+
+    Retorna:
+    --------
+    list or None
+        Posições x de início de cada coluna de COLUNAS_TABELA, ou None se
+        a linha não for o cabeçalho da tabela
+    """
+    textos = [palavra['text'] for palavra in linha]
+    if 'Latitude' not in textos or 'Longitude' not in textos:
+        return None
+
+    inicios = []
+    usadas = set()
+    for _, rotulo in COLUNAS_TABELA:
+        for i, palavra in enumerate(linha):
+            if i not in usadas and palavra['text'] == rotulo:
+                usadas.add(i)
+                inicios.append(palavra['x0'] - FOLGA_COLUNA)
+                break
+        else:
+            return None
+
+    return inicios
+
+def distribuir_colunas(linha, inicios):
+    """
+    Coloca cada palavra da linha na sua coluna (busca binária no x0).
+
+    Retorna:
+    --------
+    dict
+        {nome_coluna: texto}
+    """
+    celulas = {nome: [] for nome, _ in COLUNAS_TABELA}
+
+    for palavra in linha:
+        i = max(bisect_right(inicios, palavra['x0']) - 1, 0)
+        celulas[COLUNAS_TABELA[i][0]].append(palavra['text'])
+
+    return {nome: ' '.join(textos) for nome, textos in celulas.items()}
+
+def _converter_coordenada(texto):
+    try:
+        return float(texto.replace(',', '.'))
+    except ValueError:
+        return None
+
+# ============================================================================
+# EXTRAÇÃO
+# ============================================================================
+
+def extrair_pontos_layout(pdf_path, empresa_nome, apenas_ativos=True, limites=LIMITES_MACEIO):
+    """
+    Extrai os pontos do PDF por geometria das palavras.
+
+    Parâmetros:
+    -----------
+    pdf_path : str
+        Caminho do arquivo PDF
+    empresa_nome : str
+        Nome da empresa
+    apenas_ativos : bool
+        Se True, ignora seções sem "Ativo: Sim"
+    limites : dict
+        Limites geográficos aceitos
+
+    Retorna:
+    --------
+    tuple
+        (pontos, estatisticas): BufferPontos com as mesmas colunas do motor
+        de regex e dicionário com contagem de seções
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        return interpretar_paginas(_palavras_paginas(pdf), empresa_nome, apenas_ativos, limites)
+
+def _palavras_paginas(pdf):
+    for pagina_num, pagina in enumerate(pdf.pages, 1):
+        palavras = extrair_palavras(pagina)
+        pagina.close()
+        yield pagina_num, palavras
+
+def interpretar_paginas(paginas, empresa_nome, apenas_ativos=True, limites=LIMITES_MACEIO):
+    """
+    Interpreta as palavras de cada página (seções, "Ativo:", tabela).
+
+    Parâmetros:
+    -----------
+    paginas : iterable
+        Pares (pagina_num, palavras), com as palavras no formato de
+        extrair_palavras()
+    empresa_nome, apenas_ativos, limites
+        Como em extrair_pontos_layout()
+
+    Retorna:
+    --------
+    tuple
+        (pontos, estatisticas), como extrair_pontos_layout()
+    """
+    pontos = BufferPontos(com_secao=True)
+    inicios = None          # Faixas das colunas (aprendidas uma vez)
+    numero_secao = 0
+    secao_ativa = None
+    aguardando_ativo = False    # "Ativo:" sem valor na mesma linha
+    ativas = set()
+
+    for pagina_num, palavras in paginas:
+        # Linha do último ponto no buffer e topo da última linha dele
+        # (endereço não continua de uma página para outra)
+        ultimo_ponto = None
+        ultimo_topo = None
+
+        for linha in agrupar_linhas(palavras):
+            textos = [palavra['text'] for palavra in linha]
+
+            # Marcadores de seção (um por ocorrência, como no motor de regex)
+            marcadores = textos.count('Linha:') + sum(
+                1 for i, texto in enumerate(textos[1:], 1)
+                if texto == 'Principal:' and textos[i - 1] == 'Atendimento'
+            )
+            if marcadores:
+                numero_secao += marcadores
+                secao_ativa = None
+                aguardando_ativo = False
+                ultimo_ponto = None
+
+            # Valor de "Ativo:" que quebrou para a linha seguinte
+            if aguardando_ativo:
+                aguardando_ativo = False
+                if textos and textos[0].lower().startswith('sim'):
+                    secao_ativa = True
+                    ativas.add(numero_secao)
+                    continue
+                if textos and textos[0].lower().startswith(('não', 'nao')):
+                    continue
+
+            rotulos = [texto.lower() for texto in textos]
+            if 'ativo:' in rotulos:
+                i = rotulos.index('ativo:')
+                valor = rotulos[i + 1] if i + 1 < len(rotulos) else ''
+                secao_ativa = valor.startswith('sim')
+                if secao_ativa:
+                    ativas.add(numero_secao)
+                elif not valor:
+                    aguardando_ativo = True
+                continue
+
+            if inicios is None:
+                inicios = aprender_colunas(linha)
+                continue
+            if marcadores or 'Latitude' in textos:
+                continue  # Cabeçalhos repetidos
+            if apenas_ativos and not secao_ativa:
+                continue
+
+            celulas = distribuir_colunas(linha, inicios)
+            lat = _converter_coordenada(celulas['latitude'])
+            lon = _converter_coordenada(celulas['longitude'])
+            topo = linha[0]['top']
+
+            if lat is None or lon is None:
+                # Continuação do endereço da linha anterior: logo abaixo dela
+                # e só na coluna do endereço. Qualquer outra linha (rodapé,
+                # número da página) encerra o endereço.
+                continuacao = (
+                    ultimo_ponto is not None
+                    and topo - ultimo_topo <= DISTANCIA_CONTINUACAO
+                    and celulas['endereco']
+                    and celulas['endereco'] == ' '.join(textos)
+                )
+                if continuacao:
+                    endereco = f"{pontos.enderecos[ultimo_ponto]} {celulas['endereco']}"
+                    pontos.enderecos[ultimo_ponto] = endereco[:100]
+                    ultimo_topo = topo
+                else:
+                    ultimo_ponto = None
+                continue
+
+            if not (limites['lat_min'] < lat < limites['lat_max'] and
+                    limites['lon_min'] < lon < limites['lon_max']):
+                ultimo_ponto = None
+                continue
+
+            codigo = PADRAO_CODIGO.search(f"{celulas['abrev']} {celulas['nome']}")
+            if codigo:
+                codigo = codigo.group(0)
+            else:
+                codigo = f"Ponto_{int(lat*10000)}_{int(lon*10000)}"
+
+            ultimo_ponto = len(pontos)
+            ultimo_topo = topo
+            pontos.adicionar(
+                empresa_nome,
+                codigo,
+                (celulas['endereco'] or "Endereço não identificado")[:100],
+                lat,
+                lon,
+                pagina_num,
+                numero_secao
+            )
+
+    estatisticas = {
+        'total_secoes': numero_secao,
+        'secoes_ativas': len(ativas),
+        'secoes_inativas': numero_secao - len(ativas),
+    }
+    return pontos, estatisticas
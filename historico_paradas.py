@@ -0,0 +1,434 @@
+"""
+Histórico das extrações em SQLite, com índice espacial R-tree.
+
+Os arquivos de pontos (dados_<empresa>*.parquet/.csv, mapa_TODAS_*) são
+sobrescritos a cada execução. Aqui cada extração vira uma execução guardada
+para sempre em ARQUIVO_HISTORICO:
+
+- versoes_pdf: uma linha por versão (hash SHA-256) de cada PDF, com a
+  primeira e a última vez em que foi vista;
+- execucoes: uma linha por extração (empresa, conjunto, hash do PDF, versão
+  do extrator, data/hora); uma extração do mesmo PDF com o mesmo extrator
+  não grava os pontos de novo - seriam os mesmos. Se a versão voltou depois
+  de outra (A -> B -> A, publicação desfeita), entra uma nova execução que
+  aponta (paradas_de) para os pontos já gravados da primeira;
+- paradas: os pontos de cada execução;
+- paradas_rtree: tabela virtual R-tree com latitude, longitude e execução
+  de cada parada. A execução é a terceira dimensão da árvore: uma consulta
+  por retângulo no estado atual só visita as paradas das execuções
+  vigentes, por mais execuções antigas que o histórico tenha, e uma
+  consulta a todo o histórico só visita as paradas do retângulo.
+
+Os pontos de uma execução entram numa única transação, com executemany.
+As consultas devolvem DataFrames só com as linhas pedidas, sem carregar o
+histórico inteiro.
+
+O conjunto separa os pontos de main.py ('todos') dos de main(1).py
+('ativos'), que vêm dos mesmos PDFs.
+
+Uso pela linha de comando:
+    python historico_paradas.py execucoes [--empresa Real]
+    python historico_paradas.py caixa -9.67 -35.74 -9.65 -35.72 [--empresa Real] [--em 2025-01-01]
+"""
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Banco padrão (ao lado dos arquivos de pontos)
+ARQUIVO_HISTORICO = 'historico_paradas.sqlite'
+
+# Conjuntos de pontos gravados pelos scripts
+CONJUNTO_TODOS = 'todos'      # main.py
+CONJUNTO_ATIVOS = 'ativos'    # main(1).py
+
+# Versão do esquema (PRAGMA user_version)
+VERSAO_ESQUEMA = 1
+
+# Colunas de pontos guardadas (as que faltarem no DataFrame ficam NULL)
+COLUNAS_PARADAS = ('codigo', 'endereco', 'latitude', 'longitude', 'pagina', 'secao')
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS versoes_pdf (
+    pdf_sha256   TEXT PRIMARY KEY,
+    empresa      TEXT NOT NULL,
+    primeira_vez TEXT NOT NULL,
+    ultima_vez   TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS execucoes (
+    id              INTEGER PRIMARY KEY,
+    empresa         TEXT NOT NULL,
+    conjunto        TEXT NOT NULL,
+    pdf_sha256      TEXT NOT NULL REFERENCES versoes_pdf (pdf_sha256),
+    versao_extrator TEXT,
+    extraido_em     TEXT NOT NULL,
+    gravado_em      TEXT NOT NULL,
+    pontos          INTEGER NOT NULL,
+    paradas_de      INTEGER REFERENCES execucoes (id)
+);
+CREATE INDEX IF NOT EXISTS execucoes_empresa ON execucoes (conjunto, empresa, extraido_em);
+CREATE INDEX IF NOT EXISTS execucoes_pdf ON execucoes (pdf_sha256, versao_extrator, conjunto);
+
+CREATE TABLE IF NOT EXISTS paradas (
+    id        INTEGER PRIMARY KEY,
+    execucao  INTEGER NOT NULL REFERENCES execucoes (id),
+    empresa   TEXT NOT NULL,
+    codigo    TEXT,
+    endereco  TEXT,
+    latitude  REAL NOT NULL,
+    longitude REAL NOT NULL,
+    pagina    INTEGER,
+    secao     INTEGER
+);
+CREATE INDEX IF NOT EXISTS paradas_execucao ON paradas (execucao);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS paradas_rtree USING rtree (
+    id, lat_min, lat_max, lon_min, lon_max, execucao_min, execucao_max
+);
+"""
+
+# ============================================================================
+# HISTÓRICO
+# ============================================================================
+
+class HistoricoParadas:
+    """
+    Banco SQLite com todas as extrações.
+
+    Use como gerenciador de contexto (fecha a conexão ao sair):
+
+        with HistoricoParadas() as historico:
+            historico.registrar(lista_dfs, CONJUNTO_TODOS)
+            df = historico.na_caixa(-9.67, -35.74, -9.65, -35.72, empresa='Real')
+    """
+
+    def __init__(self, caminho=ARQUIVO_HISTORICO, entre_threads=False):
+        self.caminho = Path(caminho)
+        # entre_threads: a conexão é usada por várias threads, que cuidam
+        # de não usá-la ao mesmo tempo (ver servidor_mapas.py)
+        self.conexao = sqlite3.connect(self.caminho, check_same_thread=not entre_threads)
+        self.conexao.execute("PRAGMA journal_mode = WAL")
+        self.conexao.execute("PRAGMA synchronous = NORMAL")
+        self.conexao.execute("PRAGMA foreign_keys = ON")
+        if self.conexao.execute("PRAGMA user_version").fetchone()[0] != VERSAO_ESQUEMA:
+            with self.conexao:
+                self.conexao.executescript(ESQUEMA)
+                self.conexao.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+    def fechar(self):
+        self.conexao.close()
+
+    # ------------------------------------------------------------------------
+    # GRAVAÇÃO
+    # ------------------------------------------------------------------------
+
+    def registrar_execucao(self, df, conjunto):
+        """
+        Grava uma extração de UMA empresa (um DataFrame de extrair_*).
+
+        A origem vem de df.attrs (ver armazenamento.marcar_extracao).
+
+        Retorna:
+        --------
+        tuple
+            (id da execução, True se foi gravada agora ou False se a mesma
+            extração já era a vigente da empresa)
+        """
+        origem = df.attrs.get('pdf_sha256') or {}
+        if len(origem) != 1:
+            raise ValueError("o DataFrame precisa ser a extração de uma única empresa "
+                             "(df.attrs['pdf_sha256'] com um hash)")
+        (empresa, pdf_hash), = origem.items()
+        versao = df.attrs.get('versao_extrator')
+        agora = datetime.now().isoformat(timespec='seconds')
+        extraido_em = df.attrs.get('extraido_em', agora)
+
+        # Uma transação por execução: tudo ou nada
+        with self.conexao:
+            self.conexao.execute(
+                "INSERT INTO versoes_pdf (pdf_sha256, empresa, primeira_vez, ultima_vez) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (pdf_sha256) DO UPDATE SET ultima_vez = excluded.ultima_vez",
+                (pdf_hash, empresa, agora, agora))
+
+            existente = self.conexao.execute(
+                "SELECT COALESCE(paradas_de, id) FROM execucoes WHERE pdf_sha256 = ? "
+                "AND versao_extrator IS ? AND conjunto = ? AND empresa = ? ORDER BY id LIMIT 1",
+                (pdf_hash, versao, conjunto, empresa)).fetchone()
+            if existente is not None:
+                origem_pontos = existente[0]
+                vigente = self.conexao.execute(
+                    "SELECT id, COALESCE(paradas_de, id) FROM execucoes "
+                    "WHERE conjunto = ? AND empresa = ? ORDER BY extraido_em DESC, id DESC LIMIT 1",
+                    (conjunto, empresa)).fetchone()
+                if vigente[1] == origem_pontos:
+                    return vigente[0], False
+
+                # A versão voltou depois de outra: nova execução, mesmos pontos.
+                # A data é a de agora - a do df pode vir do cache da 1ª extração
+                cursor = self.conexao.execute(
+                    "INSERT INTO execucoes (empresa, conjunto, pdf_sha256, versao_extrator, "
+                    "extraido_em, gravado_em, pontos, paradas_de) "
+                    "SELECT empresa, conjunto, pdf_sha256, versao_extrator, ?, ?, pontos, id "
+                    "FROM execucoes WHERE id = ?",
+                    (agora, agora, origem_pontos))
+                return cursor.lastrowid, True
+
+            cursor = self.conexao.execute(
+                "INSERT INTO execucoes (empresa, conjunto, pdf_sha256, versao_extrator, "
+                "extraido_em, gravado_em, pontos) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (empresa, conjunto, pdf_hash, versao, extraido_em, agora, len(df)))
+            execucao = cursor.lastrowid
+
+            # Ids explícitos: os mesmos na tabela e na R-tree
+            primeiro = self.conexao.execute(
+                "SELECT COALESCE(MAX(id), 0) + 1 FROM paradas").fetchone()[0]
+            ids = range(primeiro, primeiro + len(df))
+            colunas = [df[coluna].astype(object).where(df[coluna].notna(), None).tolist()
+                       if coluna in df else [None] * len(df)
+                       for coluna in COLUNAS_PARADAS]
+            latitudes = df['latitude'].astype(float).tolist()
+            longitudes = df['longitude'].astype(float).tolist()
+
+            self.conexao.executemany(
+                "INSERT INTO paradas (id, execucao, empresa, codigo, endereco, latitude, "
+                "longitude, pagina, secao) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((identificador, execucao, empresa, *valores)
+                 for identificador, *valores in zip(ids, *colunas)))
+            self.conexao.executemany(
+                "INSERT INTO paradas_rtree (id, lat_min, lat_max, lon_min, lon_max, "
+                "execucao_min, execucao_max) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((identificador, lat, lat, lon, lon, execucao, execucao)
+                 for identificador, lat, lon in zip(ids, latitudes, longitudes)))
+
+        return execucao, True
+
+    def registrar(self, lista_dfs, conjunto):
+        """
+        Grava as extrações de várias empresas (uma transação por empresa).
+
+        DataFrames sem origem em df.attrs (extrações parciais, que falharam
+        no meio) são ignorados.
+
+        Retorna:
+        --------
+        int
+            Número de execuções novas gravadas
+        """
+        novas = 0
+        for df in lista_dfs:
+            if df.empty or not df.attrs.get('pdf_sha256'):
+                continue
+            _, nova = self.registrar_execucao(df, conjunto)
+            novas += nova
+        return novas
+
+    # ------------------------------------------------------------------------
+    # CONSULTAS
+    # ------------------------------------------------------------------------
+
+    def execucoes(self, empresa=None, conjunto=None):
+        """
+        Execuções gravadas, da mais recente para a mais antiga.
+        """
+        filtros, parametros = [], []
+        if empresa is not None:
+            filtros.append("empresa = ?")
+            parametros.append(empresa)
+        if conjunto is not None:
+            filtros.append("conjunto = ?")
+            parametros.append(conjunto)
+        onde = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+        return pd.read_sql_query(
+            f"SELECT * FROM execucoes {onde} ORDER BY extraido_em DESC, id DESC",
+            self.conexao, params=parametros)
+
+    def execucoes_vigentes(self, conjunto=CONJUNTO_TODOS, em=None, empresa=None):
+        """
+        A última execução de cada empresa até a data `em` (None = agora).
+
+        Retorna:
+        --------
+        list
+            Ids das execuções
+        """
+        em = em if em is not None else '9999'
+        consulta = """
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY empresa ORDER BY extraido_em DESC, id DESC) AS ordem
+                FROM execucoes
+                WHERE conjunto = ? AND extraido_em <= ? AND (? IS NULL OR empresa = ?)
+            ) WHERE ordem = 1
+        """
+        return [linha[0] for linha in self.conexao.execute(consulta, (conjunto, em, empresa, empresa))]
+
+    def na_caixa(self, lat_min, lon_min, lat_max, lon_max, empresa=None,
+                 conjunto=CONJUNTO_TODOS, em=None, execucoes=None):
+        """
+        Paradas dentro de um retângulo, pela R-tree.
+
+        Parâmetros:
+        -----------
+        lat_min, lon_min, lat_max, lon_max : float
+            Caixa da consulta
+        empresa : str, opcional
+            Só as paradas desta empresa
+        conjunto : str
+            CONJUNTO_TODOS ou CONJUNTO_ATIVOS
+        em : str, opcional
+            Data/hora ISO: o estado vigente naquele momento (padrão: o atual)
+        execucoes : list, opcional
+            Ids de execuções específicas (ignora conjunto e em)
+
+        Retorna:
+        --------
+        pd.DataFrame
+            Colunas de COLUNAS_PARADAS, mais empresa, execucao e extraido_em
+        """
+        if execucoes is None:
+            execucoes = self.execucoes_vigentes(conjunto, em, empresa)
+        if not execucoes:
+            return pd.DataFrame(columns=['empresa', *COLUNAS_PARADAS, 'execucao', 'extraido_em'])
+
+        # Execuções que reaproveitam pontos gravados: busca pelos da origem e
+        # devolve a execução pedida
+        origens = self._origens(execucoes)
+
+        # Uma busca na R-tree por faixa de execuções consecutivas. A árvore
+        # guarda as caixas em float32 (arredondadas para fora): o filtro
+        # exato é refeito nas colunas REAL
+        consulta = """
+            SELECT p.empresa, p.codigo, p.endereco, p.latitude, p.longitude, p.pagina, p.secao,
+                   p.execucao
+            FROM paradas_rtree r
+            CROSS JOIN paradas p ON p.id = r.id
+            WHERE r.lat_max >= ? AND r.lat_min <= ? AND r.lon_max >= ? AND r.lon_min <= ?
+              AND r.execucao_max >= ? AND r.execucao_min <= ?
+              AND p.latitude BETWEEN ? AND ? AND p.longitude BETWEEN ? AND ?
+              AND p.execucao BETWEEN ? AND ?
+              AND (? IS NULL OR p.empresa = ?)
+        """
+        partes = [
+            pd.read_sql_query(consulta, self.conexao, params=(
+                lat_min, lat_max, lon_min, lon_max, primeira, ultima,
+                lat_min, lat_max, lon_min, lon_max, primeira, ultima, empresa, empresa))
+            for primeira, ultima in _faixas(origens)
+        ]
+        resultado = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+
+        pedidas = pd.DataFrame(
+            [(origem, execucao, extraido_em) for origem, (execucao, extraido_em) in origens.items()],
+            columns=['origem', 'execucao', 'extraido_em'])
+        resultado = resultado.rename(columns={'execucao': 'origem'}).merge(
+            pedidas, on='origem', how='left', sort=False)
+        return resultado.drop(columns='origem')
+
+    def _origens(self, execucoes):
+        """
+        Execução que guarda os pontos de cada execução pedida.
+
+        Retorna:
+        --------
+        dict
+            {id com os pontos: (id pedido, extraido_em)}
+        """
+        marcadores = ', '.join('?' * len(execucoes))
+        linhas = self.conexao.execute(
+            f"SELECT COALESCE(paradas_de, id), id, extraido_em FROM execucoes "
+            f"WHERE id IN ({marcadores}) ORDER BY id", list(execucoes))
+        return {origem: (execucao, extraido_em) for origem, execucao, extraido_em in linhas}
+
+    def pontos_execucao(self, execucao):
+        """
+        Todos os pontos de uma execução, na ordem em que foram gravados.
+        """
+        return pd.read_sql_query(
+            "SELECT empresa, codigo, endereco, latitude, longitude, pagina, secao "
+            "FROM paradas WHERE execucao = (SELECT COALESCE(paradas_de, id) FROM execucoes "
+            "WHERE id = ?) ORDER BY id",
+            self.conexao, params=(execucao,))
+
+def _faixas(ids):
+    """
+    Agrupa ids em faixas consecutivas: [1, 2, 3, 7] -> [(1, 3), (7, 7)].
+    """
+    faixas = []
+    for identificador in sorted(set(ids)):
+        if faixas and identificador == faixas[-1][1] + 1:
+            faixas[-1][1] = identificador
+        else:
+            faixas.append([identificador, identificador])
+    return [tuple(faixa) for faixa in faixas]
+
+def registrar_extracoes(lista_dfs, conjunto, caminho=ARQUIVO_HISTORICO):
+    """
+    Abre o histórico, grava as extrações e fecha.
+
+    Retorna:
+    --------
+    int
+        Número de execuções novas gravadas
+    """
+    with HistoricoParadas(caminho) as historico:
+        return historico.registrar(lista_dfs, conjunto)
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Histórico das extrações - Maceió/AL")
+    parser.add_argument('--banco', default=ARQUIVO_HISTORICO,
+                        help=f"arquivo SQLite (padrão: {ARQUIVO_HISTORICO})")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    lista = comandos.add_parser('execucoes', help="lista as execuções gravadas")
+    lista.add_argument('--empresa', default=None)
+    lista.add_argument('--conjunto', default=None, choices=(CONJUNTO_TODOS, CONJUNTO_ATIVOS))
+
+    caixa = comandos.add_parser('caixa', help="paradas dentro de um retângulo")
+    for nome in ('lat_min', 'lon_min', 'lat_max', 'lon_max'):
+        caixa.add_argument(nome, type=float)
+    caixa.add_argument('--empresa', default=None)
+    caixa.add_argument('--conjunto', default=CONJUNTO_TODOS, choices=(CONJUNTO_TODOS, CONJUNTO_ATIVOS))
+    caixa.add_argument('--em', default=None,
+                       help="data/hora ISO (ex: 2025-01-01): o estado vigente naquele momento")
+    caixa.add_argument('--saida', default=None,
+                       help="grava o resultado em CSV em vez de imprimir")
+    args = parser.parse_args()
+
+    if not Path(args.banco).exists():
+        parser.error(f"histórico não encontrado: {args.banco} (rode main.py)")
+
+    with HistoricoParadas(args.banco) as historico:
+        if args.comando == 'execucoes':
+            print(historico.execucoes(args.empresa, args.conjunto).to_string(index=False))
+        else:
+            inicio = time.perf_counter()
+            resultado = historico.na_caixa(args.lat_min, args.lon_min, args.lat_max, args.lon_max,
+                                           empresa=args.empresa, conjunto=args.conjunto, em=args.em)
+            duracao = (time.perf_counter() - inicio) * 1000
+            if args.saida:
+                resultado.to_csv(args.saida, index=False, encoding='utf-8-sig')
+                print(f"📁 {len(resultado)} linhas salvas em {args.saida}")
+            else:
+                with pd.option_context('display.max_rows', None, 'display.width', 200):
+                    print(resultado.to_string(index=False))
+            print(f"⏱️  {len(resultado)} paradas em {duracao:.2f} ms")
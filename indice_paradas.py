@@ -0,0 +1,397 @@
+"""
+Índice espacial das paradas extraídas: "quais pontos estão perto daqui?".
+
+As paradas de todas as empresas vão para uma KD-tree (scipy.spatial.cKDTree)
+sobre vetores unitários em 3D: a distância em linha reta (corda) entre dois
+vetores cresce junto com a distância sobre a esfera, então as consultas de
+k vizinhos e de raio na árvore dão exatamente o resultado da fórmula de
+haversine, sem distorção de projeção. Cada consulta custa dezenas de
+microssegundos.
+
+O índice é gravado ao lado dos arquivos de pontos (ARQUIVO_INDICE) com os
+metadados da extração (hash dos PDFs), e é carregado sem reconstruir a
+árvore.
+
+Uso pela linha de comando:
+    python indice_paradas.py -9.6658 -35.7353 --raio 300 --empresa Real
+    python indice_paradas.py --csv consultas.csv -k 3 --saida vizinhos.csv
+"""
+
+import os
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from armazenamento import como_dataframe, juntar_metadados
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Raio médio da Terra (o mesmo da fórmula de haversine usual)
+RAIO_TERRA_METROS = 6_371_008.8
+
+# Arquivo padrão do índice (ao lado dos Parquet de pontos)
+ARQUIVO_INDICE = 'indice_paradas.pkl'
+
+# Colunas das paradas guardadas no índice e devolvidas nas consultas
+COLUNAS_INDICE = ('empresa', 'codigo', 'endereco', 'latitude', 'longitude')
+
+# Formato do arquivo gravado (mude ao alterar o conteúdo do pickle)
+VERSAO_INDICE = 1
+
+# ============================================================================
+# GEOMETRIA
+# ============================================================================
+
+def vetores_unitarios(latitudes, longitudes):
+    """
+    Converte coordenadas em graus para vetores unitários (x, y, z).
+
+    Retorna:
+    --------
+    np.ndarray
+        Matriz (n, 3) em float64
+    """
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+def corda_para_metros(corda):
+    """
+    Distância em linha reta entre vetores unitários -> metros sobre a esfera.
+    """
+    return 2.0 * RAIO_TERRA_METROS * np.arcsin(np.minimum(np.asarray(corda) / 2.0, 1.0))
+
+def metros_para_corda(metros):
+    """
+    Metros sobre a esfera -> distância em linha reta entre vetores unitários.
+    """
+    angulo = min(float(metros) / RAIO_TERRA_METROS, np.pi)
+    return 2.0 * np.sin(angulo / 2.0)
+
+# ============================================================================
+# ÍNDICE
+# ============================================================================
+
+class IndiceParadas:
+    """
+    Consultas de vizinhança (k mais próximas e raio) sobre as paradas.
+
+    Uso:
+        indice = IndiceParadas.de_extracoes(['dados_Real.parquet', df_saofran])
+        indice.mais_proximas(-9.6658, -35.7353, k=5)
+        indice.no_raio(-9.6658, -35.7353, 300, empresa='Real')
+        indice.salvar('indice_paradas.pkl')
+        indice = IndiceParadas.carregar('indice_paradas.pkl')
+
+    As consultas devolvem DataFrames com as colunas de COLUNAS_INDICE e
+    'distancia_m', em ordem crescente de distância.
+
+    Parâmetros:
+    -----------
+    df : pd.DataFrame
+        Paradas com 'latitude' e 'longitude' (demais colunas de
+        COLUNAS_INDICE são opcionais)
+    metadados : dict, opcional
+        Metadados da extração (ver armazenamento.juntar_metadados)
+    """
+
+    def __init__(self, df, metadados=None):
+        colunas = [coluna for coluna in COLUNAS_INDICE if coluna in df]
+        self.paradas = df[colunas].reset_index(drop=True)
+        self.metadados = metadados if metadados is not None else juntar_metadados([df])
+
+        vetores = vetores_unitarios(self.paradas['latitude'], self.paradas['longitude'])
+
+        # Uma árvore com todas as paradas e uma por empresa: o filtro por
+        # empresa não pode ser aplicado depois de um k-vizinhos global
+        self._arvores = {None: (cKDTree(vetores), np.arange(len(self.paradas)))}
+        if 'empresa' in self.paradas:
+            empresas = self.paradas['empresa'].astype(str).to_numpy()
+            for empresa in pd.unique(empresas):
+                linhas = np.flatnonzero(empresas == empresa)
+                self._arvores[empresa] = (cKDTree(vetores[linhas]), linhas)
+
+    @classmethod
+    def de_extracoes(cls, origens):
+        """
+        Monta o índice a partir de DataFrames e/ou caminhos de arquivos de pontos.
+        """
+        dfs = [como_dataframe(origem) for origem in origens]
+        dfs = [df for df in dfs if not df.empty]
+        if not dfs:
+            raise ValueError("Nenhuma parada para indexar")
+        df = pd.concat(dfs, ignore_index=True)
+        return cls(df, juntar_metadados(dfs))
+
+    def __len__(self):
+        return len(self.paradas)
+
+    @property
+    def empresas(self):
+        """
+        Empresas presentes no índice.
+        """
+        return [empresa for empresa in self._arvores if empresa is not None]
+
+    def _arvore(self, empresa):
+        try:
+            return self._arvores[empresa]
+        except KeyError:
+            raise ValueError(f"Empresa fora do índice: {empresa!r} "
+                             f"(disponíveis: {', '.join(self.empresas)})") from None
+
+    def _resultado(self, linhas, cordas, consultas=None):
+        resultado = self.paradas.take(linhas).reset_index(drop=True)
+        resultado['distancia_m'] = corda_para_metros(cordas)
+        if consultas is not None:
+            resultado.insert(0, 'consulta', consultas)
+        return resultado
+
+    # ------------------------------------------------------------------
+    # Consultas individuais
+    # ------------------------------------------------------------------
+
+    def mais_proximas(self, latitude, longitude, k=5, empresa=None):
+        """
+        As k paradas mais próximas de um ponto.
+
+        Parâmetros:
+        -----------
+        latitude, longitude : float
+            Ponto de consulta, em graus
+        k : int
+            Número de paradas (menos, se o índice tiver menos)
+        empresa : str, opcional
+            Restringe a busca às paradas da empresa
+
+        Retorna:
+        --------
+        pd.DataFrame
+            Paradas com a coluna 'distancia_m', da mais próxima à mais distante
+        """
+        arvore, linhas = self._arvore(empresa)
+        k = min(int(k), len(linhas))
+        if k <= 0:
+            return self._resultado([], [])
+        cordas, posicoes = arvore.query(vetores_unitarios([latitude], [longitude])[0], k=k)
+        return self._resultado(linhas[np.atleast_1d(posicoes)], np.atleast_1d(cordas))
+
+    def no_raio(self, latitude, longitude, raio_metros, empresa=None):
+        """
+        Todas as paradas a até raio_metros de um ponto.
+
+        Retorna:
+        --------
+        pd.DataFrame
+            Paradas com a coluna 'distancia_m', da mais próxima à mais distante
+        """
+        arvore, linhas = self._arvore(empresa)
+        vetor = vetores_unitarios([latitude], [longitude])[0]
+        posicoes = np.asarray(arvore.query_ball_point(vetor, metros_para_corda(raio_metros)),
+                              dtype=np.int64)
+        cordas = np.linalg.norm(arvore.data[posicoes] - vetor, axis=1)
+        ordem = np.argsort(cordas, kind='stable')
+        return self._resultado(linhas[posicoes[ordem]], cordas[ordem])
+
+    # ------------------------------------------------------------------
+    # Consultas em lote
+    # ------------------------------------------------------------------
+
+    def consultar_lote(self, latitudes, longitudes, k=None, raio_metros=None, empresa=None):
+        """
+        Consulta vários pontos de uma vez (uma única chamada à árvore).
+
+        Com k, devolve as k mais próximas de cada ponto; com raio_metros,
+        todas as paradas no raio; com os dois, as k mais próximas dentro do raio.
+
+        Retorna:
+        --------
+        pd.DataFrame
+            Coluna 'consulta' (posição do ponto na entrada), colunas das
+            paradas e 'distancia_m', ordenado por consulta e distância
+        """
+        if k is None and raio_metros is None:
+            raise ValueError("Informe k e/ou raio_metros")
+
+        arvore, linhas = self._arvore(empresa)
+        vetores = vetores_unitarios(latitudes, longitudes)
+
+        if k is not None:
+            k = min(int(k), len(linhas))
+            limite = metros_para_corda(raio_metros) if raio_metros is not None else np.inf
+            cordas, posicoes = arvore.query(vetores, k=k, distance_upper_bound=limite)
+            cordas = cordas.reshape(len(vetores), -1)
+            posicoes = posicoes.reshape(len(vetores), -1)
+            # Vizinhos além do limite vêm com distância infinita
+            validos = np.isfinite(cordas)
+            consultas = np.nonzero(validos)[0]
+            return self._resultado(linhas[posicoes[validos]], cordas[validos], consultas)
+
+        vizinhos = arvore.query_ball_point(vetores, metros_para_corda(raio_metros))
+        tamanhos = np.fromiter((len(v) for v in vizinhos), dtype=np.int64, count=len(vizinhos))
+        consultas = np.repeat(np.arange(len(vetores)), tamanhos)
+        posicoes = (np.concatenate([np.asarray(v, dtype=np.int64) for v in vizinhos])
+                    if tamanhos.sum() else np.empty(0, dtype=np.int64))
+        cordas = np.linalg.norm(arvore.data[posicoes] - vetores[consultas], axis=1)
+        ordem = np.lexsort((cordas, consultas))
+        return self._resultado(linhas[posicoes[ordem]], cordas[ordem], consultas[ordem])
+
+    def consultar_csv(self, caminho, k=None, raio_metros=None, empresa=None):
+        """
+        Consulta em lote os pontos de um CSV com colunas latitude/longitude
+        (ou lat/lon).
+
+        As demais colunas do CSV (ex: um nome ou endereço de referência) são
+        repetidas em cada linha do resultado, com o prefixo 'consulta_'.
+
+        Retorna:
+        --------
+        pd.DataFrame
+            Como consultar_lote, com as colunas do CSV à esquerda
+        """
+        consultas = pd.read_csv(caminho, encoding='utf-8-sig')
+        consultas = consultas.rename(columns={'lat': 'latitude', 'lon': 'longitude'})
+        if 'latitude' not in consultas or 'longitude' not in consultas:
+            raise ValueError(f"{caminho}: o CSV precisa das colunas latitude e longitude")
+
+        resultado = self.consultar_lote(consultas['latitude'], consultas['longitude'],
+                                        k=k, raio_metros=raio_metros, empresa=empresa)
+        origem = consultas.add_prefix('consulta_').take(resultado['consulta']).reset_index(drop=True)
+        return pd.concat([origem, resultado.drop(columns='consulta')], axis=1)
+
+    # ------------------------------------------------------------------
+    # Persistência
+    # ------------------------------------------------------------------
+
+    def salvar(self, caminho=ARQUIVO_INDICE):
+        """
+        Grava o índice (paradas, árvores e metadados) num pickle.
+        """
+        caminho = Path(caminho)
+        temporario = caminho.with_suffix(f'.{os.getpid()}.tmp')
+        with open(temporario, 'wb') as arquivo:
+            pickle.dump({'versao': VERSAO_INDICE, 'indice': self}, arquivo,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, caminho)
+        return caminho
+
+    @classmethod
+    def carregar(cls, caminho=ARQUIVO_INDICE):
+        """
+        Lê um índice gravado por salvar(). Retorna None se não existir, estiver
+        corrompido ou for de outro formato.
+        """
+        caminho = Path(caminho)
+        if not caminho.exists():
+            return None
+        try:
+            with open(caminho, 'rb') as arquivo:
+                conteudo = pickle.load(arquivo)
+        except Exception:
+            return None
+        if conteudo.get('versao') != VERSAO_INDICE:
+            return None
+        return conteudo['indice']
+
+    def atualizado(self, lista_dfs, parametros=None):
+        """
+        True se o índice foi montado a partir dos mesmos PDFs dos DataFrames,
+        com a mesma versão do extrator e os mesmos parâmetros de extração.
+        """
+        metadados = juntar_metadados(lista_dfs)
+        return (self.metadados.get('pdf_sha256') == metadados['pdf_sha256'] and
+                self.metadados.get('versao_extrator') == metadados.get('versao_extrator') and
+                self.metadados.get('parametros') == parametros)
+
+def atualizar_indice(lista_dfs, caminho=ARQUIVO_INDICE, parametros=None):
+    """
+    Carrega o índice gravado ou, se estiver desatualizado, remonta e grava.
+
+    Parâmetros:
+    -----------
+    lista_dfs : list
+        Extrações de cada empresa
+    caminho : str
+        Arquivo do índice
+    parametros : dict, opcional
+        Parâmetros que moldaram os pontos (ex: raio de deduplicação); se
+        mudarem, o índice é remontado mesmo com os mesmos PDFs
+
+    Retorna:
+    --------
+    IndiceParadas
+    """
+    indice = IndiceParadas.carregar(caminho)
+    if (indice is not None and indice.metadados.get('pdf_sha256') and
+            indice.atualizado(lista_dfs, parametros)):
+        return indice
+    indice = IndiceParadas.de_extracoes(lista_dfs)
+    indice.metadados['parametros'] = parametros
+    indice.salvar(caminho)
+    return indice
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Paradas próximas de um ponto - Maceió/AL")
+    parser.add_argument('latitude', type=float, nargs='?')
+    parser.add_argument('longitude', type=float, nargs='?')
+    parser.add_argument('-k', type=int, default=None,
+                        help="número de paradas mais próximas (padrão: 5 sem --raio)")
+    parser.add_argument('--raio', type=float, default=None,
+                        help="distância máxima em metros")
+    parser.add_argument('--empresa', default=None,
+                        help="só as paradas desta empresa")
+    parser.add_argument('--csv', default=None,
+                        help="CSV com colunas latitude/longitude para consulta em lote")
+    parser.add_argument('--saida', default=None,
+                        help="grava o resultado em CSV em vez de imprimir")
+    parser.add_argument('--indice', default=ARQUIVO_INDICE,
+                        help=f"arquivo do índice (padrão: {ARQUIVO_INDICE})")
+    parser.add_argument('--pontos', nargs='+', default=None,
+                        help="arquivos de pontos (.parquet/.csv) para (re)montar o índice")
+    args = parser.parse_args()
+
+    if args.csv is None and (args.latitude is None or args.longitude is None):
+        parser.error("informe latitude e longitude, ou --csv")
+
+    if args.pontos:
+        indice = IndiceParadas.de_extracoes(args.pontos)
+        indice.salvar(args.indice)
+        print(f"💾 Índice gravado: {args.indice} ({len(indice)} paradas)")
+    else:
+        indice = IndiceParadas.carregar(args.indice)
+        if indice is None:
+            parser.error(f"índice não encontrado: {args.indice} (rode main.py ou use --pontos)")
+
+    k = args.k if args.k is not None or args.raio is not None else 5
+
+    inicio = time.perf_counter()
+    if args.csv:
+        resultado = indice.consultar_csv(args.csv, k=k, raio_metros=args.raio, empresa=args.empresa)
+    elif k is not None:
+        resultado = indice.mais_proximas(args.latitude, args.longitude, k=k, empresa=args.empresa)
+        if args.raio is not None:
+            resultado = resultado[resultado['distancia_m'] <= args.raio]
+    else:
+        resultado = indice.no_raio(args.latitude, args.longitude, args.raio, empresa=args.empresa)
+    duracao = (time.perf_counter() - inicio) * 1000
+
+    if args.saida:
+        resultado.to_csv(args.saida, index=False, encoding='utf-8-sig')
+        print(f"📁 {len(resultado)} linhas salvas em {args.saida}")
+    else:
+        with pd.option_context('display.max_rows', None, 'display.width', 200):
+            print(resultado.round({'distancia_m': 1}).to_string(index=False))
+    print(f"⏱️  {len(resultado)} resultados em {duracao:.2f} ms ({len(indice)} paradas no índice)")
@@ -0,0 +1,330 @@
+"""
+Métricas por etapa, log e perfil das execuções.
+
+Cada etapa do processamento (abrir o PDF, extrair o texto, interpretar,
+deduplicar, desenhar o mapa, salvar) é medida com `etapa`:
+
+    with etapa('interpretar', paginas=len(textos)) as registro:
+        ...
+        registro['linhas'] = len(pontos)
+
+e vira um registro com o tempo de relógio, os contadores informados
+(paginas, linhas, correspondencias do regex...), linhas por segundo e o pico
+de memória. No fim da execução salvar_metricas grava tudo em
+metricas/<execução>.json e .csv.
+
+- O tempo de uma etapa é o próprio: etapas internas (ex: abrir o PDF dentro
+  da extração do texto) são descontadas da etapa de fora.
+- memoria_pico_mb vem do tracemalloc e só é medido com rastrear_memoria=True
+  (deixa o Python bem mais lento); rss_pico_mb, o pico de memória do
+  processo até o fim da etapa, é sempre registrado onde houver `resource`.
+- As extrações rodam em outros processos (ver pipeline.py): cada processo
+  registra as suas etapas e o pipeline as traz de volta ao principal.
+
+O log (logger LOGGER) substitui os prints feitos por ponto ou por seção:
+eles saem em DEBUG e só aparecem com --verbose.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Pasta dos arquivos de métricas de cada execução
+DIRETORIO_METRICAS = Path('metricas')
+
+# Nome do logger usado pelos scripts e módulos
+LOGGER = 'pontos_onibus'
+
+# Funções mostradas no resumo do cProfile
+LINHAS_PERFIL = 25
+
+# Colunas do CSV, nesta ordem (contadores extras vão para o final)
+COLUNAS_METRICAS = ['empresa', 'etapa', 'processo', 'inicio', 'segundos', 'paginas', 'linhas',
+                    'linhas_por_s', 'correspondencias', 'memoria_pico_mb', 'rss_pico_mb']
+
+log = logging.getLogger(LOGGER)
+
+# Estado do processo: registros das etapas, etapas abertas, empresa atual
+_registros = []
+_abertas = []
+_empresa_atual = None
+_rastrear_memoria = False
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+def configurar(verboso=False, rastrear_memoria=False):
+    """
+    Liga o log (INFO, ou DEBUG com verboso) e, se pedido, o tracemalloc.
+    """
+    global _rastrear_memoria
+
+    if not log.handlers:
+        saida = logging.StreamHandler(sys.stdout)
+        saida.setFormatter(logging.Formatter('%(message)s'))
+        log.addHandler(saida)
+        log.propagate = False
+    log.setLevel(logging.DEBUG if verboso else logging.INFO)
+
+    _rastrear_memoria = rastrear_memoria
+    if rastrear_memoria and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def configuracao():
+    """
+    Configuração atual, para repetir num processo filho (configurar(**...)).
+    """
+    return {'verboso': log.isEnabledFor(logging.DEBUG), 'rastrear_memoria': _rastrear_memoria}
+
+@contextmanager
+def contexto(empresa):
+    """
+    Etapas abertas dentro do bloco são atribuídas a `empresa`.
+    """
+    global _empresa_atual
+    anterior, _empresa_atual = _empresa_atual, empresa
+    try:
+        yield
+    finally:
+        _empresa_atual = anterior
+
+# ============================================================================
+# ETAPAS
+# ============================================================================
+
+def _rss_pico_mb():
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return round(pico / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10), 1)
+
+def _pico_tracemalloc():
+    return tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+
+def _registrar(registro, segundos):
+    registro['segundos'] = round(segundos, 6)
+    if registro.get('linhas') and segundos > 0:
+        registro['linhas_por_s'] = round(registro['linhas'] / segundos, 1)
+    registro['rss_pico_mb'] = _rss_pico_mb()
+    _registros.append(registro)
+
+def _novo_registro(nome, empresa, contadores):
+    return {'empresa': empresa if empresa is not None else _empresa_atual, 'etapa': nome,
+            'processo': os.getpid(), 'inicio': datetime.now().isoformat(timespec='milliseconds'),
+            **contadores}
+
+@contextmanager
+def etapa(nome, empresa=None, **contadores):
+    """
+    Mede o bloco como a etapa `nome`.
+
+    Parâmetros:
+    -----------
+    nome : str
+        Nome da etapa ('abrir_pdf', 'extrair_texto', 'interpretar',
+        'deduplicar', 'desenhar', 'salvar'...)
+    empresa : str, opcional
+        Padrão: a empresa do contexto atual
+    **contadores
+        Valores iniciais do registro (paginas, linhas...)
+
+    Retorna:
+    --------
+    dict
+        O registro da etapa: o bloco pode acrescentar ou alterar contadores
+        (ex: registro['linhas'] = len(df)). 'linhas' é usado em linhas_por_s.
+    """
+    registro = _novo_registro(nome, empresa, contadores)
+
+    # Pico do tracemalloc: guarda o da etapa de fora antes de zerá-lo
+    if _rastrear_memoria and tracemalloc.is_tracing():
+        if _abertas:
+            _abertas[-1]['_pico'] = max(_abertas[-1]['_pico'], _pico_tracemalloc())
+        tracemalloc.reset_peak()
+
+    aberta = {'_pico': 0, '_internas': 0.0}
+    _abertas.append(aberta)
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        decorrido = time.perf_counter() - inicio
+        _abertas.pop()
+
+        if _rastrear_memoria and tracemalloc.is_tracing():
+            pico = max(aberta['_pico'], _pico_tracemalloc())
+            registro['memoria_pico_mb'] = round(pico / 2 ** 20, 1)
+            if _abertas:
+                _abertas[-1]['_pico'] = max(_abertas[-1]['_pico'], pico)
+
+        # A etapa de fora não conta o tempo desta
+        if _abertas:
+            _abertas[-1]['_internas'] += decorrido
+        _registrar(registro, decorrido - aberta['_internas'])
+
+def cronometrar_iteracao(iteravel, nome, empresa=None, **contadores):
+    """
+    Gera os itens de `iteravel` registrando como a etapa `nome` só o tempo
+    gasto para produzi-los (ex: um gerador de páginas consumido aos poucos
+    pela etapa de interpretação, que não conta esse tempo).
+
+    O registro é gravado quando a iteração termina, com 'paginas' = itens
+    gerados (se não for informado).
+    """
+    registro = _novo_registro(nome, empresa, contadores)
+    iterador = iter(iteravel)
+    decorrido = 0.0
+    itens = 0
+
+    try:
+        while True:
+            inicio = time.perf_counter()
+            try:
+                item = next(iterador)
+            except StopIteration:
+                break
+            finally:
+                passo = time.perf_counter() - inicio
+                decorrido += passo
+                if _abertas:
+                    _abertas[-1]['_internas'] += passo
+            itens += 1
+            yield item
+    finally:
+        registro.setdefault('paginas', itens)
+        _registrar(registro, decorrido)
+
+# ============================================================================
+# REGISTROS
+# ============================================================================
+
+def marcar():
+    """
+    Posição atual da lista de registros (ver registros_desde).
+    """
+    return len(_registros)
+
+def registros_desde(marca):
+    """
+    Registros gravados depois de marcar() - os de um processo filho do pool.
+    """
+    return _registros[marca:]
+
+def incorporar(registros):
+    """
+    Acrescenta registros vindos de outro processo.
+    """
+    _registros.extend(registros)
+
+def tabela_metricas():
+    """
+    Registros da execução num DataFrame, uma linha por etapa.
+    """
+    # convert_dtypes: contadores ausentes em algumas etapas continuam inteiros
+    tabela = pd.DataFrame(_registros).convert_dtypes()
+    colunas = [coluna for coluna in COLUNAS_METRICAS if coluna in tabela]
+    return tabela[colunas + [coluna for coluna in tabela if coluna not in colunas]]
+
+def resumo_etapas():
+    """
+    Tempo, linhas e pico de memória somados por etapa, na ordem de aparição.
+    """
+    tabela = tabela_metricas()
+    if tabela.empty:
+        return tabela
+    grupos = tabela.groupby('etapa', sort=False)
+    resumo = pd.DataFrame({'empresas': grupos['empresa'].nunique(),
+                           'segundos': grupos['segundos'].sum().round(3)})
+    for coluna in ('paginas', 'linhas', 'correspondencias'):
+        if coluna in tabela:
+            resumo[coluna] = grupos[coluna].sum(min_count=1).astype('Int64')
+    if 'linhas' in resumo:
+        resumo['linhas_por_s'] = (resumo['linhas'] / resumo['segundos']).round(1)
+    for coluna in ('memoria_pico_mb', 'rss_pico_mb'):
+        if coluna in tabela:
+            resumo[coluna] = grupos[coluna].max()
+    return resumo
+
+def salvar_metricas(diretorio=DIRETORIO_METRICAS, extras=None):
+    """
+    Grava as métricas da execução em <diretorio>/execucao_<data_hora>.json e .csv.
+
+    Parâmetros:
+    -----------
+    diretorio : str ou Path
+        Pasta dos arquivos (criada se não existir)
+    extras : dict, opcional
+        Informações da execução gravadas junto no JSON (argumentos, tempos
+        do pipeline...)
+
+    Retorna:
+    --------
+    tuple
+        (caminho do JSON, caminho do CSV)
+    """
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    nome = f"execucao_{datetime.now():%Y%m%d_%H%M%S}"
+    arquivo_json = diretorio / f"{nome}.json"
+    arquivo_csv = diretorio / f"{nome}.csv"
+
+    tabela = tabela_metricas()
+    conteudo = {
+        'execucao': nome,
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'rastrear_memoria': _rastrear_memoria,
+        **(extras or {}),
+        'etapas': json.loads(tabela.to_json(orient='records', force_ascii=False)),
+    }
+    arquivo_json.write_text(json.dumps(conteudo, ensure_ascii=False, indent=2, default=str),
+                            encoding='utf-8')
+    tabela.to_csv(arquivo_csv, index=False)
+    return arquivo_json, arquivo_csv
+
+# ============================================================================
+# PERFIL
+# ============================================================================
+
+@contextmanager
+def perfilar(destino=None, linhas=LINHAS_PERFIL):
+    """
+    Roda o bloco sob o cProfile e grava as estatísticas em `destino`
+    (abrir com `python -m pstats` ou snakeviz). destino=None não faz nada.
+
+    Só mede o processo atual: para perfilar a extração, use --sequencial.
+    """
+    if destino is None:
+        yield
+        return
+
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield
+    finally:
+        perfil.disable()
+        perfil.dump_stats(destino)
+        print(f"\n🔬 PERFIL (cProfile): {destino}")
+        pstats.Stats(perfil).sort_stats('cumulative').print_stats(linhas)
@@ -9,16 +9,38 @@ import pdfplumber
 import pandas as pd
 import folium
 import re
+from bisect import bisect_right
 from pathlib import Path
 from folium import plugins
 
+from cache_extracao import carregar_cache, salvar_cache, chave_cache, hash_arquivo
+from scanner_coordenadas import PADRAO_COORDENADAS, PADRAO_CODIGO, iterar_coordenadas
+from extracao_layout import extrair_pontos_layout
+from deduplicacao_espacial import deduplicar_espacial, RAIO_DEDUPLICACAO_METROS
+from renderizacao import adicionar_pontos, montar_textos, MODOS_RENDERIZACAO
+from pacote_mapas import escrever_mapa_pacote, DIRETORIO_PACOTE
+from compressao import CompressorArtefatos, tamanhos_comprimidos, formatos_disponiveis
+from registros_pontos import BufferPontos
+from estilo_mapas import CORES_EMPRESAS, MACEIO_CENTRO
+from indice_paradas import atualizar_indice
+from historico_paradas import registrar_extracoes, ARQUIVO_HISTORICO, CONJUNTO_ATIVOS
+from piramide_tiles import gerar_piramide
+from paradas_compartilhadas import (unificar_paradas, resumo_compartilhamento,
+                                    RAIO_COMPARTILHAMENTO_METROS, CAMADA_COMPARTILHADAS,
+                                    COR_COMPARTILHADAS)
+from cobertura import (analisar_cobertura, resumo_cobertura, lacunas, adicionar_mapa_calor,
+                       LACUNAS_EXIBIDAS)
+from pipeline import executar_pipeline, reexecutar_empresas, imprimir_tempos
+from observador_pdfs import ObservadorPDFs, INTERVALO_SEGUNDOS
+from instrumentacao import (etapa, cronometrar_iteracao, log, configurar, perfilar,
+                            salvar_metricas, resumo_etapas)
+from armazenamento import (salvar_pontos, como_dataframe, marcar_extracao,
+                           juntar_metadados)
+
 # ============================================================================
 # CONFIGURAÇÕES DO SISTEMA
 # ============================================================================
 
-# Coordenadas do centro de Maceió
-MACEIO_CENTRO = [-9.6498, -35.7089]
-
 # Limites geográficos de Maceió (validação)
 LIMITES_MACEIO = {
     'lat_min': -9.8,
@@ -27,32 +49,62 @@ LIMITES_MACEIO = {
     'lon_max': -35.6
 }
 
-# Cores para cada empresa
-CORES_EMPRESAS = {
-    'Real': '#FF0000',        # Vermelho
-    'SaoFrancisco': '#0000FF', # Azul
-    'CidadeMaceio': '#FFFF00'  # Amarelo
-}
-
 # Configuração dos PDFs a serem processados
+# 'motor': 'regex' (texto + regex) ou 'layout' (colunas da tabela por posição)
 PDFS_PARA_PROCESSAR = [
     {
         'caminho': 'pontos_real.pdf',
         'empresa': 'Real',
-        'cor': CORES_EMPRESAS['Real']
+        'cor': CORES_EMPRESAS['Real'],
+        'motor': 'regex'
     },
     {
         'caminho': 'empresa_saoFran.pdf',
         'empresa': 'SaoFrancisco', 
-        'cor': CORES_EMPRESAS['SaoFrancisco']
+        'cor': CORES_EMPRESAS['SaoFrancisco'],
+        'motor': 'regex'
     },
     {
         'caminho': 'pontos_Maceio.pdf',
         'empresa': 'CidadeMaceio',
-        'cor': CORES_EMPRESAS['CidadeMaceio']
+        'cor': CORES_EMPRESAS['CidadeMaceio'],
+        'motor': 'regex'
     }
 ]
 
+# Índice de paradas próximas dos pontos ativos (ver indice_paradas.py)
+ARQUIVO_INDICE_ATIVAS = 'indice_paradas_ATIVAS.pkl'
+
+# Versão do extrator (entra na chave do cache - mude ao alterar a extração)
+VERSAO_EXTRATOR = '2.5'
+
+# Padrões para encontrar "Ativo: Sim"
+PADROES_ATIVO = [
+    r'Ativo:\s*Sim\s+Sim',    # Ativo: Sim Sim (dois Sim)
+    r'Ativo:\s*Sim',          # Ativo: Sim (um Sim)
+    r'Ativo:\s*SIM',          # Ativo: SIM (maiúsculo)
+    r'Ativo:\s*sim',          # Ativo: sim (minúsculo)
+]
+
+# "Ativo:" com valor negativo explícito na mesma linha (seção inativa)
+PADRAO_INATIVO = re.compile(r'Ativo:\s*N[ãa]o', re.IGNORECASE)
+
+# Padrão para identificar início de nova seção
+# Procura por "Atendimento Principal:" ou "Linha:"
+PADRAO_INICIO_SECAO = re.compile(r'(?:Atendimento Principal:|Linha:)')
+
+# Padrão para códigos de ponto (ex: PN987, PP52, BR6, PONTO123)
+# As alternativas ficam numa única regex para tokenizar a seção uma só vez
+PADRAO_CODIGO_SECAO = re.compile('|'.join([
+    PADRAO_CODIGO.pattern,          # PN987, PP52
+    r'PONTO\s*\d+',                 # PONTO 123
+    r'PP\s*\d+',                    # PP 52
+    r'PN\s*\d+',                    # PN 987
+]))
+
+# Números e caracteres especiais no início do endereço
+PADRAO_LIMPEZA_ENDERECO = re.compile(r'^[\d\s\-\.]+')
+
 # ============================================================================
 # FUNÇÕES DE EXTRACÇÃO COM VALIDAÇÃO "ATIVO"
 # ============================================================================
@@ -74,52 +126,123 @@ def validar_secao_ativa(texto_secao):
     bool
         True se a seção está ativa, False caso contrário
     """
-    # Padrões para encontrar "Ativo: Sim"
-    padroes = [
-        r'Ativo:\s*Sim\s+Sim',    # Ativo: Sim Sim (dois Sim)
-        r'Ativo:\s*Sim',          # Ativo: Sim (um Sim)
-        r'Ativo:\s*SIM',          # Ativo: SIM (maiúsculo)
-        r'Ativo:\s*sim',          # Ativo: sim (minúsculo)
-    ]
-    
-    for padrao in padroes:
+    for padrao in PADROES_ATIVO:
         if re.search(padrao, texto_secao, re.IGNORECASE):
             return True
     
     return False
 
-def extrair_secoes_pdf(texto_completo):
+def iterar_secoes_pdf(paginas):
     """
-    Divide o texto do PDF em seções baseado em marcadores.
+    Lê as páginas em sequência e gera as seções do PDF uma de cada vez.
+    
+    Uma seção começa em cada marcador "Atendimento Principal:" ou "Linha:".
+    O status "Ativo" é avaliado assim que o cabeçalho da seção aparece: as
+    linhas de uma seção marcada "Ativo: Não" são descartadas sem serem
+    guardadas, e apenas a seção atual fica em memória. Quando o valor não
+    está na mesma linha de "Ativo:", a seção é validada pelo texto completo.
     
     Parâmetros:
     -----------
-    texto_completo : str
-        Texto completo extraído do PDF
+    paginas : iterable
+        Tuplas (indice_pagina, texto), com índice iniciando em 0
     
     Retorna:
     --------
-    list
-        Lista de strings, cada uma é uma seção
+    generator
+        Dicionários com as chaves:
+        'numero' (int), 'ativa' (bool) e
+        'linhas' (lista de tuplas (pagina, linha); vazia se inativa)
     """
-    # Padrão para identificar início de nova seção
-    # Procura por "Atendimento Principal:" ou "Linha:"
-    padrao_inicio_secao = r'(?:Atendimento Principal:|Linha:)'
+    secao = None
+    numero = 0
+    
+    def adicionar(secao, pagina, trecho):
+        if secao['ativa'] is False:
+            return  # Seção inativa: não guarda nada
+        
+        secao['linhas'].append((pagina, trecho))
+        
+        # Decide o status assim que o cabeçalho "Ativo:" aparece; se o valor
+        # não estiver na mesma linha, a decisão fica para o texto da seção todo
+        if secao['ativa'] is None:
+            if validar_secao_ativa(trecho):
+                secao['ativa'] = True
+            elif PADRAO_INATIVO.search(trecho):
+                secao['ativa'] = False
+                secao['linhas'] = []
     
-    # Divide o texto em seções
-    secoes = re.split(padrao_inicio_secao, texto_completo)
+    def finalizar(secao):
+        if secao['ativa'] is None:
+            # Cabeçalho sem "Ativo:" - mantém a validação sobre o texto todo
+            texto = '\n'.join(linha for _, linha in secao['linhas'])
+            secao['ativa'] = validar_secao_ativa(texto)
+        if not secao['ativa']:
+            secao['linhas'] = []
+        return secao
     
-    # A primeira parte geralmente é cabeçalho/pré-texto
-    # Adiciona o marcador de volta ao início de cada seção
-    secoes_validas = []
-    for i, secao in enumerate(secoes):
-        if i == 0:
-            continue  # Pula o texto antes da primeira seção
-        secoes_validas.append(secao.strip())
+    for pagina_num, texto in paginas:
+        if not texto:
+            continue
+        
+        for linha in texto.split('\n'):
+            inicio = 0
+            
+            for marcador in PADRAO_INICIO_SECAO.finditer(linha):
+                # Texto antes do marcador pertence à seção atual
+                if secao is not None:
+                    trecho = linha[inicio:marcador.start()]
+                    if trecho.strip():
+                        adicionar(secao, pagina_num + 1, trecho)
+                    yield finalizar(secao)
+                
+                numero += 1
+                secao = {'numero': numero, 'ativa': None, 'linhas': []}
+                inicio = marcador.end()
+            
+            # Texto antes da primeira seção é cabeçalho/pré-texto
+            if secao is not None:
+                trecho = linha[inicio:]
+                if trecho.strip():
+                    adicionar(secao, pagina_num + 1, trecho)
     
-    return secoes_validas
+    if secao is not None:
+        yield finalizar(secao)
 
-def extrair_coordenadas_pdf_com_ativo(pdf_path, empresa_nome):
+def extrair_textos_paginas(pdf_path, usar_cache=True):
+    """
+    Gera o texto de cada página do PDF, reaproveitando o cache se o
+    conteúdo do arquivo não mudou.
+    
+    Retorna:
+    --------
+    generator
+        Tuplas (indice_pagina, texto), com índice iniciando em 0
+    """
+    chave = None
+    if usar_cache:
+        chave = chave_cache(pdf_path, 'textos', pdfplumber.__version__)
+        textos = carregar_cache(chave)
+        if textos is not None:
+            yield from textos
+            return
+    
+    textos = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for pagina_num, pagina in enumerate(pdf.pages):
+            texto = pagina.extract_text()
+            pagina.close()
+            
+            # Só acumula as páginas se for gravar o cache no final
+            if chave:
+                textos.append((pagina_num, texto))
+            yield pagina_num, texto
+    
+    if chave:
+        salvar_cache(chave, textos)
+
+def extrair_coordenadas_pdf_com_ativo(pdf_path, empresa_nome, usar_cache=True, motor='regex',
+                                      raio_deduplicacao=RAIO_DEDUPLICACAO_METROS):
     """
     Extrai coordenadas de um PDF, filtrando apenas seções ATIVAS.
     
@@ -129,6 +252,13 @@ def extrair_coordenadas_pdf_com_ativo(pdf_path, empresa_nome):
         Caminho do arquivo PDF
     empresa_nome : str
         Nome da empresa
+    usar_cache : bool
+        Reaproveita a extração anterior se o PDF não mudou
+    motor : str
+        'regex' (texto da página + regex) ou 'layout' (colunas da tabela
+        pela posição das palavras, ver extracao_layout)
+    raio_deduplicacao : float
+        Pontos a menos desta distância (em metros) viram um só
     
     Retorna:
     --------
@@ -138,180 +268,232 @@ def extrair_coordenadas_pdf_com_ativo(pdf_path, empresa_nome):
     print(f"\n{'='*60}")
     print(f"📊 PROCESSANDO: {pdf_path}")
     print(f"🏢 EMPRESA: {empresa_nome}")
+    print(f"⚙️ MOTOR: {motor}")
     print(f"{'='*60}")
     
-    dados = []
+    chave = None
+    if usar_cache:
+        chave = chave_cache(pdf_path, 'resultado_ativo', VERSAO_EXTRATOR,
+                            PADROES_ATIVO, PADRAO_INICIO_SECAO.pattern,
+                            PADRAO_COORDENADAS.pattern,
+                            PADRAO_CODIGO_SECAO.pattern, motor,
+                            raio_deduplicacao, empresa_nome)
+        with etapa('cache') as registro:
+            df = carregar_cache(chave)
+            registro['linhas'] = len(df) if df is not None else 0
+        if df is not None:
+            print(f"⚡ PDF inalterado - {len(df)} pontos recuperados do cache")
+            return df
+    
+    dados = BufferPontos(com_secao=True)
     total_secoes = 0
     secoes_ativas = 0
     secoes_inativas = 0
     
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            # Extrai texto de TODAS as páginas
-            texto_completo = ""
-            for pagina_num, pagina in enumerate(pdf.pages, 1):
-                texto_pagina = pagina.extract_text()
-                if texto_pagina:
-                    texto_completo += texto_pagina + "\n"
+        with etapa('interpretar') as registro:
+            if motor == 'layout':
+                # Motor de layout: colunas da tabela pela geometria das palavras
+                dados, estatisticas = extrair_pontos_layout(pdf_path, empresa_nome)
+                total_secoes = estatisticas['total_secoes']
+                secoes_ativas = estatisticas['secoes_ativas']
+                secoes_inativas = estatisticas['secoes_inativas']
+            else:
+                # Lê o PDF página a página, uma seção por vez (o tempo de
+                # leitura das páginas fica na etapa 'extrair_texto')
+                paginas = cronometrar_iteracao(extrair_textos_paginas(pdf_path, usar_cache),
+                                               'extrair_texto')
+                registro['correspondencias'] = 0
+                
+                for secao in iterar_secoes_pdf(paginas):
+                    total_secoes += 1
+                    idx = secao['numero']
+                    log.debug(f"\n  🔍 Analisando seção {idx}...")
+                    
+                    # Valida se a seção está ATIVA
+                    if secao['ativa']:
+                        secoes_ativas += 1
+                        log.debug(f"    ✅ SEÇÃO ATIVA - Extraindo pontos...")
+                        
+                        # Extrai coordenadas desta seção ativa
+                        pontos_secao = extrair_coordenadas_secao(secao['linhas'], empresa_nome, idx,
+                                                                 dados, registro)
+                        
+                        if pontos_secao:
+                            log.debug(f"    📍 {pontos_secao} pontos extraídos desta seção")
+                        else:
+                            log.debug(f"    ⚠️ Nenhum ponto válido encontrado nesta seção ativa")
+                    else:
+                        secoes_inativas += 1
+                        log.debug(f"    ❌ SEÇÃO INATIVA - Ignorando...")
             
-            if not texto_completo:
-                print("⚠️ Nenhum texto encontrado no PDF")
-                return pd.DataFrame()
+            # Pontos dentro dos limites (correspondencias: todos os pares do
+            # regex nas seções ativas; o motor de layout não usa regex)
+            registro['linhas'] = len(dados)
+            registro['secoes'] = total_secoes
+            registro['secoes_ativas'] = secoes_ativas
+        
+        if total_secoes == 0:
+            print("⚠️ Nenhuma seção encontrada no PDF")
+            return pd.DataFrame()
+        
+        # Cria DataFrame (sem copiar as colunas do buffer)
+        if len(dados):
+            df = dados.para_dataframe()
             
-            # Divide o PDF em seções
-            secoes = extrair_secoes_pdf(texto_completo)
-            total_secoes = len(secoes)
+            # Remove duplicatas por proximidade (mesmo ponto com outra precisão)
+            with etapa('deduplicar', linhas=len(df)) as registro:
+                df = deduplicar_espacial(df, raio_deduplicacao)
+                registro['removidas'] = registro['linhas'] - len(df)
             
-            print(f"📑 Total de seções encontradas: {total_secoes}")
+            # Origem (hash do PDF) e data/hora da extração, gravadas no Parquet
+            marcar_extracao(df, empresa_nome, hash_arquivo(pdf_path), VERSAO_EXTRATOR)
             
-            # Processa cada seção
-            for idx, secao in enumerate(secoes, 1):
-                print(f"\n  🔍 Analisando seção {idx}/{total_secoes}...")
-                
-                # Valida se a seção está ATIVA
-                if validar_secao_ativa(secao):
-                    secoes_ativas += 1
-                    print(f"    ✅ SEÇÃO ATIVA - Extraindo pontos...")
-                    
-                    # Extrai coordenadas desta seção ativa
-                    pontos_secao = extrair_coordenadas_secao(secao, empresa_nome, idx)
-                    
-                    if pontos_secao:
-                        dados.extend(pontos_secao)
-                        print(f"    📍 {len(pontos_secao)} pontos extraídos desta seção")
-                    else:
-                        print(f"    ⚠️ Nenhum ponto válido encontrado nesta seção ativa")
-                else:
-                    secoes_inativas += 1
-                    print(f"    ❌ SEÇÃO INATIVA - Ignorando...")
+            # Estatísticas
+            print(f"\n{'='*60}")
+            print(f"📈 RESULTADO FINAL:")
+            print(f"   Total de seções: {total_secoes}")
+            print(f"   Seções ATIVAS: {secoes_ativas}")
+            print(f"   Seções INATIVAS: {secoes_inativas}")
+            print(f"   Pontos válidos extraídos: {len(df)}")
+            print(f"{'='*60}")
+        else:
+            print("⚠️ Nenhum ponto válido encontrado em seções ativas")
+            df = pd.DataFrame()
+        
+        if chave:
+            salvar_cache(chave, df)
+        
+        return df
             
-            # Cria DataFrame
-            if dados:
-                df = pd.DataFrame(dados, columns=[
-                    'empresa', 'codigo', 'endereco', 
-                    'latitude', 'longitude', 'pagina', 'secao'
-                ])
-                
-                # Remove duplicatas baseadas em coordenadas
-                df = df.drop_duplicates(subset=['latitude', 'longitude'])
-                
-                # Estatísticas
-                print(f"\n{'='*60}")
-                print(f"📈 RESULTADO FINAL:")
-                print(f"   Total de seções: {total_secoes}")
-                print(f"   Seções ATIVAS: {secoes_ativas}")
-                print(f"   Seções INATIVAS: {secoes_inativas}")
-                print(f"   Pontos válidos extraídos: {len(df)}")
-                print(f"{'='*60}")
-                
-                return df
-            else:
-                print("⚠️ Nenhum ponto válido encontrado em seções ativas")
-                return pd.DataFrame()
-                
     except Exception as e:
         print(f"❌ ERRO ao processar PDF: {e}")
         return pd.DataFrame()
 
-def extrair_coordenadas_secao(texto_secao, empresa_nome, num_secao):
+def extrair_coordenadas_secao(linhas_secao, empresa_nome, num_secao, pontos, contagem=None):
     """
     Extrai coordenadas de uma seção específica do PDF.
     
     Parâmetros:
     -----------
-    texto_secao : str
-        Texto de uma seção do PDF
+    linhas_secao : list
+        Linhas da seção, como tuplas (pagina, linha)
     empresa_nome : str
         Nome da empresa
     num_secao : int
         Número da seção
+    pontos : BufferPontos
+        Buffer (com_secao=True) que recebe os pontos encontrados
+    contagem : dict, opcional
+        Recebe as correspondências do regex (ver scanner_coordenadas)
     
     Retorna:
     --------
-    list
-        Lista de dicionários com pontos encontrados
+    int
+        Número de pontos acrescentados ao buffer
     """
-    pontos = []
+    antes = len(pontos)
     
-    # Padrões para encontrar coordenadas
-    padroes_coordenadas = [
-        # Padrão 1: -9,53802 -35,78683 (vírgula como separador decimal)
-        r'(-?\d{1,2}[,.]\d+)\s+(-?\d{1,2}[,.]\d+)',
-        
-        # Padrão 2: -9.53802 -35.78683 (ponto como separador decimal)
-        r'(-?\d{1,2}\.\d+)\s+(-?\d{1,2}\.\d+)'
-    ]
+    # Junta as linhas guardando onde cada uma começa, para achar a página
+    texto_secao = '\n'.join(linha for _, linha in linhas_secao)
+    paginas = [pagina for pagina, _ in linhas_secao]
+    inicios = []
+    posicao = 0
+    for _, linha in linhas_secao:
+        inicios.append(posicao)
+        posicao += len(linha) + 1
     
-    # Procura por todas as coordenadas no texto da seção
-    for padrao in padroes_coordenadas:
-        matches = re.findall(padrao, texto_secao)
+    # Índice de códigos (ex: PN987, PP52) construído uma vez por seção
+    indice_codigos = indexar_codigos_secao(texto_secao)
+    fim_anterior = 0
+    
+    # Uma única passada por todas as coordenadas da seção
+    for lat, lon, match in iterar_coordenadas(texto_secao, LIMITES_MACEIO, contagem):
+        # Código mais próximo antes desta coordenada
+        codigo = extrair_codigo_ponto(indice_codigos, match.start(), fim_anterior, lat, lon)
+        fim_anterior = match.end()
         
-        for match in matches:
-            try:
-                lat_str, lon_str = match
-                
-                # Converte para float (substitui vírgula por ponto se necessário)
-                lat = float(lat_str.replace(',', '.'))
-                lon = float(lon_str.replace(',', '.'))
-                
-                # Valida se está dentro dos limites de Maceió
-                if (LIMITES_MACEIO['lat_min'] < lat < LIMITES_MACEIO['lat_max'] and
-                    LIMITES_MACEIO['lon_min'] < lon < LIMITES_MACEIO['lon_max']):
-                    
-                    # Tenta extrair código do ponto (ex: PN987, PP52)
-                    codigo = extrair_codigo_ponto(texto_secao, lat, lon)
-                    
-                    # Tenta extrair endereço (pega contexto antes da coordenada)
-                    endereco = extrair_endereco(texto_secao, lat_str, lon_str)
-                    
-                    ponto = {
-                        'empresa': empresa_nome,
-                        'codigo': codigo,
-                        'endereco': endereco[:100],  # Limita a 100 caracteres
-                        'latitude': lat,
-                        'longitude': lon,
-                        'pagina': 1,  # Como estamos processando texto completo, usamos 1
-                        'secao': num_secao
-                    }
-                    
-                    pontos.append(ponto)
-                    
-            except (ValueError, TypeError) as e:
-                continue  # Ignora coordenadas que não podem ser convertidas
+        # Tenta extrair endereço (pega contexto antes da coordenada)
+        endereco = extrair_endereco(texto_secao, match.start())
+        
+        pontos.adicionar(
+            empresa_nome,
+            codigo,
+            endereco[:100],  # Limita a 100 caracteres
+            lat,
+            lon,
+            paginas[bisect_right(inicios, match.start()) - 1],
+            num_secao
+        )
     
-    return pontos
+    return len(pontos) - antes
 
-def extrair_codigo_ponto(texto_secao, lat, lon):
+def indexar_codigos_secao(texto_secao):
     """
-    Tenta extrair o código do ponto (ex: PN987) próximo à coordenada.
+    Tokeniza a seção uma única vez e monta o índice de códigos de ponto.
+    
+    Parâmetros:
+    -----------
+    texto_secao : str
+        Texto de uma seção do PDF
+    
+    Retorna:
+    --------
+    tuple
+        (posicoes, codigos): posições (ordenadas) onde cada código começa
+        no texto e os códigos correspondentes, sem espaços
+    """
+    posicoes = []
+    codigos = []
+    
+    for match in PADRAO_CODIGO_SECAO.finditer(texto_secao):
+        posicoes.append(match.start())
+        codigos.append(match.group(0).replace(' ', ''))  # Remove espaços
+    
+    return posicoes, codigos
+
+def extrair_codigo_ponto(indice_codigos, inicio_coordenada, fim_anterior, lat, lon):
+    """
+    Encontra o código do ponto mais próximo ANTES da coordenada.
+    
+    Busca binária no índice da seção; só vale um código que esteja depois
+    da coordenada anterior, para não herdar o código da linha de cima.
+    
+    Parâmetros:
+    -----------
+    indice_codigos : tuple
+        Índice gerado por indexar_codigos_secao
+    inicio_coordenada : int
+        Posição da coordenada no texto da seção
+    fim_anterior : int
+        Posição onde termina a coordenada anterior (0 se for a primeira)
+    lat, lon : float
+        Coordenadas, usadas para gerar um código quando nada é encontrado
+    
+    Retorna:
+    --------
+    str
+        Código do ponto
     """
-    # Padrão para códigos de ponto (ex: PN987, PP52, BR6, PONTO123)
-    padroes_codigo = [
-        r'([A-Z]{2,}\d+)',          # PN987, PP52
-        r'(PONTO\s*\d+)',           # PONTO 123
-        r'(PP\s*\d+)',              # PP 52
-        r'(PN\s*\d+)',              # PN 987
-    ]
-    
-    for padrao in padroes_codigo:
-        matches = re.findall(padrao, texto_secao)
-        if matches:
-            return matches[0].replace(' ', '')  # Remove espaços
+    posicoes, codigos = indice_codigos
+    
+    i = bisect_right(posicoes, inicio_coordenada) - 1
+    if i >= 0 and posicoes[i] >= fim_anterior:
+        return codigos[i]
     
     return f"Ponto_{int(lat*10000)}_{int(lon*10000)}"  # Código gerado
 
-def extrair_endereco(texto_secao, lat_str, lon_str):
+def extrair_endereco(texto_secao, inicio_coordenada):
     """
-    Tenta extrair endereço próximo à coordenada.
+    Tenta extrair endereço a partir do texto da linha antes da coordenada.
     """
-    # Procura o contexto antes da coordenada
-    padrao_coord = re.escape(f"{lat_str} {lon_str}")
-    match = re.search(f'(.{{0,100}}){padrao_coord}', texto_secao)
+    # Contexto: até 100 caracteres antes da coordenada, na mesma linha
+    inicio_linha = texto_secao.rfind('\n', 0, inicio_coordenada) + 1
+    contexto = texto_secao[max(inicio_linha, inicio_coordenada - 100):inicio_coordenada].strip()
     
-    if match:
-        contexto = match.group(1).strip()
+    if contexto:
         # Remove números e caracteres especiais do início
-        contexto_limpo = re.sub(r'^[\d\s\-\.]+', '', contexto)
+        contexto_limpo = PADRAO_LIMPEZA_ENDERECO.sub('', contexto)
         if contexto_limpo:
             return contexto_limpo
     
@@ -321,10 +503,73 @@ def extrair_endereco(texto_secao, lat_str, lon_str):
 # FUNÇÕES DE MAPEAMENTO (MANTIDAS DO CÓDIGO ANTERIOR)
 # ============================================================================
 
-def criar_mapa_folium(df, empresa_nome, output_file):
+# Popup e tooltip do modo 'marcadores' (preenchidos coluna a coluna por montar_textos)
+POPUP_MARCADOR = """
+            <div style="font-family: Arial; width: 250px;">
+                <h4 style="color: {cor}; margin: 5px 0;">{empresa}</h4>
+                <hr style="margin: 5px 0;">
+                <b>Código:</b> {codigo}<br>
+                <b>Latitude:</b> {latitude:.5f}<br>
+                <b>Longitude:</b> {longitude:.5f}<br>
+                <b>Seção:</b> {secao}<br>
+                <hr style="margin: 5px 0;">
+                <small><b>Endereço:</b><br>{endereco}</small>
+            </div>
+            """
+TOOLTIP_MARCADOR = "{codigo} - {empresa}"
+
+# Popup e tooltip dos modos de camada (montados no navegador, ver renderizacao.py)
+POPUP_GEOJSON = """
+        <div style="font-family: Arial; width: 250px;">
+            <h4 style="color: {cor}; margin: 5px 0;">{empresa}</h4>
+            <hr style="margin: 5px 0;">
+            <b>Código:</b> ${{p.codigo}}<br>
+            <b>Latitude:</b> ${{lat.toFixed(5)}}<br>
+            <b>Longitude:</b> ${{lon.toFixed(5)}}<br>
+            <b>Seção:</b> ${{p.secao}}<br>
+            <hr style="margin: 5px 0;">
+            <small><b>Endereço:</b><br>${{p.endereco}}</small>
+        </div>
+        """
+TOOLTIP_GEOJSON = "${{p.codigo}} - {empresa}"
+
+# Consolidado: o título é a coluna 'empresas' (todas as empresas de uma
+# parada compartilhada - ver paradas_compartilhadas.py)
+POPUP_CONSOLIDADO = POPUP_MARCADOR.replace('{empresa}', '{empresas}')
+TOOLTIP_CONSOLIDADO = "{codigo} - {empresas}"
+POPUP_GEOJSON_CONSOLIDADO = POPUP_GEOJSON.replace('{empresa}', '${{p.empresas}}')
+TOOLTIP_GEOJSON_CONSOLIDADO = "${{p.codigo}} - ${{p.empresas}}"
+
+def _adicionar_pontos_camada(destino, df, empresa, cor, modo, raio, peso, consolidado=False):
+    if consolidado:
+        propriedades = ['codigo', 'secao', 'endereco', 'empresas']
+        popup_template, tooltip_template = POPUP_GEOJSON_CONSOLIDADO, TOOLTIP_GEOJSON_CONSOLIDADO
+    else:
+        propriedades = ['codigo', 'secao', 'endereco']
+        popup_template, tooltip_template = POPUP_GEOJSON, TOOLTIP_GEOJSON
+    adicionar_pontos(
+        destino, df, cor, modo,
+        propriedades=propriedades,
+        popup_template=popup_template.format(cor=cor, empresa=empresa),
+        tooltip_template=tooltip_template.format(empresa=empresa),
+        raio=raio,
+        peso=peso
+    )
+
+def criar_mapa_folium(df, empresa_nome, output_file, modo='marcadores'):
     """
     Cria um mapa HTML interativo com os pontos de UMA empresa.
+    
+    modo='geojson' desenha todos os pontos numa única camada GeoJSON
+    (HTML bem menor e mais rápido de abrir que um marcador por ponto);
+    'canvas' pinta essa camada num <canvas> e 'cluster' agrupa os pontos.
+    modo='pacote' grava só uma casca HTML que usa o código comum e o arquivo
+    de dados da empresa (ver pacote_mapas.py) - o retorno é None.
+    
+    df pode ser também o caminho de um arquivo de pontos (.parquet ou .csv).
     """
+    df = como_dataframe(df)
+    
     if df.empty:
         print(f"⚠️ Nenhum dado para {empresa_nome}. Mapa não criado.")
         return None
@@ -332,12 +577,26 @@ def criar_mapa_folium(df, empresa_nome, output_file):
     print(f"\n🗺️ CRIANDO MAPA INDIVIDUAL: {empresa_nome}")
     print(f"   📍 Total de pontos no mapa: {len(df)}")
     
+    if modo == 'pacote':
+        # Casca HTML + dados da empresa + código compartilhado
+        escrever_mapa_pacote(
+            output_file, [(empresa_nome, df, CORES_EMPRESAS.get(empresa_nome, '#808080'))],
+            titulo=empresa_nome,
+            popup_template=POPUP_MARCADOR,
+            tooltip_template=TOOLTIP_MARCADOR,
+            centro=MACEIO_CENTRO,
+            raio=8, peso=2
+        )
+        print(f"   ✅ Mapa salvo (pacote): {output_file}")
+        return None
+    
     # Cria o mapa centrado em Maceió
     mapa = folium.Map(
         location=MACEIO_CENTRO,
         zoom_start=12,
         tiles='OpenStreetMap',
-        control_scale=True
+        control_scale=True,
+        prefer_canvas=(modo == 'canvas')
     )
     
     # Adiciona plugin de tela cheia
@@ -346,33 +605,27 @@ def criar_mapa_folium(df, empresa_nome, output_file):
     # Cor da empresa
     cor = CORES_EMPRESAS.get(empresa_nome, '#808080')  # Cinza se não encontrado
     
-    # Adiciona cada ponto ao mapa
-    for _, ponto in df.iterrows():
-        # Cria popup HTML
-        popup_html = f"""
-        <div style="font-family: Arial; width: 250px;">
-            <h4 style="color: {cor}; margin: 5px 0;">{ponto['empresa']}</h4>
-            <hr style="margin: 5px 0;">
-            <b>Código:</b> {ponto['codigo']}<br>
-            <b>Latitude:</b> {ponto['latitude']:.5f}<br>
-            <b>Longitude:</b> {ponto['longitude']:.5f}<br>
-            <b>Seção:</b> {ponto['secao']}<br>
-            <hr style="margin: 5px 0;">
-            <small><b>Endereço:</b><br>{ponto['endereco']}</small>
-        </div>
-        """
+    # Adiciona os pontos ao mapa
+    if modo != 'marcadores':
+        _adicionar_pontos_camada(mapa, df, empresa_nome, cor, modo, raio=8, peso=2)
+    else:
+        popups = montar_textos(POPUP_MARCADOR, df, cor=cor)
+        tooltips = montar_textos(TOOLTIP_MARCADOR, df)
         
-        # Cria marcador circular
-        folium.CircleMarker(
-            location=[ponto['latitude'], ponto['longitude']],
-            radius=8,
-            popup=folium.Popup(popup_html, max_width=300),
-            tooltip=f"{ponto['codigo']} - {ponto['empresa']}",
-            color='white',
-            fillColor=cor,
-            fillOpacity=0.8,
-            weight=2
-        ).add_to(mapa)
+        for lat, lon, popup_html, tooltip in zip(df['latitude'].to_numpy(),
+                                                 df['longitude'].to_numpy(),
+                                                 popups, tooltips):
+            # Cria marcador circular
+            folium.CircleMarker(
+                location=[lat, lon],
+                radius=8,
+                popup=folium.Popup(popup_html, max_width=300),
+                tooltip=tooltip,
+                color='white',
+                fillColor=cor,
+                fillOpacity=0.8,
+                weight=2
+            ).add_to(mapa)
     
     # Adiciona legenda
     legenda_html = f"""
@@ -401,37 +654,139 @@ def criar_mapa_folium(df, empresa_nome, output_file):
     mapa.get_root().html.add_child(folium.Element(legenda_html))
     
     # Salva o mapa
-    mapa.save(output_file)
+    with etapa('salvar_mapa', linhas=len(df)):
+        mapa.save(output_file)
     print(f"   ✅ Mapa salvo: {output_file}")
     
     return mapa
 
-def criar_mapa_consolidado(lista_dfs, output_file_html, output_file_csv):
+def criar_mapa_consolidado(lista_dfs, output_file_html, output_file_csv=None,
+                           raio_deduplicacao=RAIO_DEDUPLICACAO_METROS, modo='marcadores',
+                           output_file_dados=None, float32=False,
+                           raio_compartilhamento=RAIO_COMPARTILHAMENTO_METROS, mapa_calor=False,
+                           piramide=False):
     """
     Cria um mapa HTML consolidado com TODAS as empresas.
+    
+    Pontos da mesma empresa a menos de raio_deduplicacao metros viram um só.
+    Pontos de empresas diferentes a menos de raio_compartilhamento metros são
+    a mesma parada física: aparecem uma vez, na camada "Compartilhadas", e a
+    tabela unificada das paradas é gravada em <dados>_PARADAS.parquet.
+    
+    A densidade e a cobertura a pé das paradas numa grade sobre
+    LIMITES_MACEIO vão para <dados>_COBERTURA.parquet (ver cobertura.py), e
+    as células sem parada a pé para <dados>_LACUNAS.parquet; com mapa_calor=True o mapa ganha a camada de densidade (plugins.HeatMap,
+    fora do modo 'pacote').
+    Com todas as empresas ligadas, prefira modo='canvas' ou 'cluster'
+    (ver criar_mapa_folium).
+    
+    Com piramide=True as paradas também são cortadas numa pirâmide de tiles
+    z/x/y em <HTML>_TILES/, com um visualizador que só baixa os tiles da
+    área visível (ver piramide_tiles.py).
+    
+    Os pontos consolidados são gravados em Parquet (output_file_dados,
+    padrão: o nome do HTML com .parquet) e, se output_file_csv for
+    informado, também em CSV. lista_dfs aceita DataFrames ou caminhos de
+    arquivos de pontos.
     """
     print(f"\n{'='*60}")
     print("🗺️ CRIANDO MAPA CONSOLIDADO COM TODAS EMPRESAS")
     print(f"{'='*60}")
     
-    # Combina todos os DataFrames
+    # Combina todos os DataFrames (e a origem de cada um)
+    lista_dfs = [como_dataframe(df) for df in lista_dfs]
+    metadados = juntar_metadados(lista_dfs)
     df_consolidado = pd.concat(lista_dfs, ignore_index=True)
     
     if df_consolidado.empty:
         print("⚠️ Nenhum dado para consolidar. Mapa não criado.")
         return None
     
-    # Salva CSV consolidado
-    df_consolidado.to_csv(output_file_csv, index=False, encoding='utf-8-sig')
-    print(f"📁 CSV consolidado salvo: {output_file_csv}")
+    # Remove pontos repetidos de cada empresa (por proximidade)
+    total_antes = len(df_consolidado)
+    with etapa('deduplicar', linhas=total_antes) as registro:
+        df_consolidado = deduplicar_espacial(df_consolidado, raio_deduplicacao, por_empresa=True)
+        registro['removidas'] = total_antes - len(df_consolidado)
+    if len(df_consolidado) < total_antes:
+        print(f"🧹 {total_antes - len(df_consolidado)} pontos duplicados removidos")
+    
+    # Salva os pontos consolidados (Parquet + CSV opcional)
+    df_consolidado.attrs.update(metadados)
+    output_file_dados = output_file_dados or str(Path(output_file_html).with_suffix('.parquet'))
+    with etapa('salvar', linhas=len(df_consolidado)):
+        salvar_pontos(df_consolidado, output_file_dados, float32=float32, csv=output_file_csv)
+    print(f"📁 Pontos consolidados salvos: {output_file_dados}")
+    if output_file_csv:
+        print(f"📁 CSV consolidado salvo: {output_file_csv}")
     print(f"📍 Total de pontos no consolidado: {len(df_consolidado)}")
     
+    # Densidade e cobertura a pé por célula (cada empresa com as suas paradas)
+    with etapa('cobertura', linhas=len(df_consolidado)) as registro:
+        cobertura = analisar_cobertura(df_consolidado, limites=LIMITES_MACEIO)
+        output_file_cobertura = output_file_dados.replace('.parquet', '_COBERTURA.parquet')
+        cobertura.to_parquet(output_file_cobertura, index=False)
+        registro['celulas'] = len(cobertura)
+        # Células sem parada a pé, da mais distante para a mais próxima
+        df_lacunas = lacunas(cobertura)
+        output_file_lacunas = output_file_dados.replace('.parquet', '_LACUNAS.parquet')
+        df_lacunas.to_parquet(output_file_lacunas, index=False)
+        registro['lacunas'] = len(df_lacunas)
+    print(f"📐 Cobertura a pé ({cobertura.attrs['raio_caminhada_metros']:.0f} m): {output_file_cobertura}")
+    print(resumo_cobertura(cobertura).to_string())
+    print(f"🕳️ {len(df_lacunas)} células sem parada a pé: {output_file_lacunas}")
+    if len(df_lacunas):
+        print(df_lacunas.head(LACUNAS_EXIBIDAS).round(5).to_string(index=False))
+    
+    # Uma linha por parada física, com as empresas que a atendem
+    with etapa('compartilhadas', linhas=len(df_consolidado)) as registro:
+        df_paradas = unificar_paradas(df_consolidado, raio_compartilhamento)
+        resumo = resumo_compartilhamento(df_paradas)
+        registro['compartilhadas'] = resumo['compartilhadas']
+    output_file_paradas = output_file_dados.replace('.parquet', '_PARADAS.parquet')
+    with etapa('salvar', linhas=len(df_paradas)):
+        salvar_pontos(df_paradas, output_file_paradas, float32=float32,
+                      csv=output_file_csv.replace('.csv', '_PARADAS.csv') if output_file_csv else None)
+    print(f"🔗 {resumo['compartilhadas']} paradas atendidas por mais de uma empresa "
+          f"({resumo['pontos'] - resumo['paradas']} pontos a menos no mapa): {output_file_paradas}")
+    cores_camadas = {**CORES_EMPRESAS, CAMADA_COMPARTILHADAS: COR_COMPARTILHADAS}
+    
+    # Pirâmide de tiles: o navegador baixa só os tiles da área visível
+    if piramide:
+        diretorio_tiles = str(Path(output_file_html).with_suffix('')) + '_TILES'
+        with etapa('piramide', linhas=len(df_paradas)) as registro:
+            descricao = gerar_piramide(df_paradas, diretorio_tiles, cores=cores_camadas,
+                                       titulo="MACEIÓ - TODAS EMPRESAS",
+                                       popup_template=POPUP_CONSOLIDADO,
+                                       tooltip_template=TOOLTIP_CONSOLIDADO)
+            registro['tiles'] = descricao['arquivos']
+        print(f"🧱 Pirâmide de tiles (zoom {descricao['zoomMinimo']}-{descricao['zoomMaximo']}): "
+              f"{diretorio_tiles}/ ({descricao['arquivos']} tiles)")
+    
+    if modo == 'pacote':
+        # Casca HTML com arquivos de dados próprios (as camadas das empresas
+        # aqui não têm as paradas compartilhadas)
+        escrever_mapa_pacote(
+            output_file_html,
+            [(empresa, df_empresa, cores_camadas.get(empresa, '#808080'))
+             for empresa, df_empresa in df_paradas.groupby('empresa', sort=False)],
+            titulo="MACEIÓ - TODAS EMPRESAS",
+            popup_template=POPUP_CONSOLIDADO,
+            tooltip_template=TOOLTIP_CONSOLIDADO,
+            centro=MACEIO_CENTRO,
+            raio=7, peso=1.5,
+            prefixo_dados='TODAS_'
+        )
+        print(f"🗺️ Mapa consolidado salvo (pacote): {output_file_html}")
+        print(f"{'='*60}")
+        return None, df_consolidado
+    
     # Cria o mapa
     mapa = folium.Map(
         location=MACEIO_CENTRO,
         zoom_start=12,
         tiles='OpenStreetMap',
-        control_scale=True
+        control_scale=True,
+        prefer_canvas=(modo == 'canvas')
     )
     
     # Plugin tela cheia
@@ -440,58 +795,61 @@ def criar_mapa_consolidado(lista_dfs, output_file_html, output_file_csv):
     # Cria grupos para cada empresa (para controle de camadas)
     grupos = {}
     
-    for empresa in CORES_EMPRESAS.keys():
+    for empresa in cores_camadas.keys():
         grupos[empresa] = folium.FeatureGroup(name=empresa)
     
     # Adiciona pontos ao mapa
     empresas_no_mapa = set()
     
-    for _, ponto in df_consolidado.iterrows():
-        empresa = ponto['empresa']
-        empresas_no_mapa.add(empresa)
-        
-        cor = CORES_EMPRESAS.get(empresa, '#808080')
-        
-        # Popup HTML
-        popup_html = f"""
-        <div style="font-family: Arial; width: 250px;">
-            <h4 style="color: {cor}; margin: 5px 0;">{empresa}</h4>
-            <hr style="margin: 5px 0;">
-            <b>Código:</b> {ponto['codigo']}<br>
-            <b>Latitude:</b> {ponto['latitude']:.5f}<br>
-            <b>Longitude:</b> {ponto['longitude']:.5f}<br>
-            <b>Seção:</b> {ponto['secao']}<br>
-            <hr style="margin: 5px 0;">
-            <small><b>Endereço:</b><br>{ponto['endereco']}</small>
-        </div>
-        """
+    if modo != 'marcadores':
+        # Uma camada por empresa, dentro do grupo da empresa
+        for empresa, df_empresa in df_paradas.groupby('empresa', sort=False):
+            empresas_no_mapa.add(empresa)
+            cor = cores_camadas.get(empresa, '#808080')
+            _adicionar_pontos_camada(grupos[empresa], df_empresa, empresa, cor, modo, raio=7, peso=1.5,
+                                     consolidado=True)
+    else:
+        # Cor de cada ponto e textos montados coluna a coluna
+        cores = df_paradas['empresa'].map(cores_camadas).fillna('#808080')
+        popups = montar_textos(POPUP_CONSOLIDADO, df_paradas.assign(cor=cores))
+        tooltips = montar_textos(TOOLTIP_CONSOLIDADO, df_paradas)
+        empresas_no_mapa.update(df_paradas['empresa'].unique())
         
-        # Cria marcador
-        marker = folium.CircleMarker(
-            location=[ponto['latitude'], ponto['longitude']],
-            radius=7,
-            popup=folium.Popup(popup_html, max_width=300),
-            tooltip=f"{ponto['codigo']} - {empresa}",
-            color='white',
-            fillColor=cor,
-            fillOpacity=0.8,
-            weight=1.5
-        )
-        
-        marker.add_to(grupos[empresa])
+        for empresa, lat, lon, cor, popup_html, tooltip in zip(
+                df_paradas['empresa'].to_numpy(), df_paradas['latitude'].to_numpy(),
+                df_paradas['longitude'].to_numpy(), cores.to_numpy(), popups, tooltips):
+            # Cria marcador
+            marker = folium.CircleMarker(
+                location=[lat, lon],
+                radius=7,
+                popup=folium.Popup(popup_html, max_width=300),
+                tooltip=tooltip,
+                color='white',
+                fillColor=cor,
+                fillOpacity=0.8,
+                weight=1.5
+            )
+            
+            marker.add_to(grupos[empresa])
     
     # Adiciona grupos ao mapa
     for empresa, grupo in grupos.items():
         grupo.add_to(mapa)
     
+    # Camada de densidade (desligada ao abrir)
+    if mapa_calor:
+        adicionar_mapa_calor(mapa, cobertura)
+    
     # Adiciona controle de camadas
     folium.LayerControl(collapsed=False).add_to(mapa)
     
-    # Estatísticas por empresa
+    # Estatísticas por empresa: cada empresa conta também as paradas que
+    # divide com outras (as mesmas contagens de antes da unificação)
+    contagens = {**resumo['por_empresa'], CAMADA_COMPARTILHADAS: resumo['compartilhadas']}
     stats_html = ""
     for empresa in sorted(empresas_no_mapa):
-        count = len(df_consolidado[df_consolidado['empresa'] == empresa])
-        cor = CORES_EMPRESAS.get(empresa, '#808080')
+        count = contagens.get(empresa, 0)
+        cor = cores_camadas.get(empresa, '#808080')
         stats_html += f"""
         <tr>
             <td style="padding: 2px 5px;">
@@ -520,20 +878,22 @@ def criar_mapa_consolidado(lista_dfs, output_file_html, output_file_csv):
     ">
         <h4 style="margin-top: 0;">MACEIÓ - TODAS EMPRESAS</h4>
         <hr>
-        <b>Total de Pontos:</b> {len(df_consolidado)}<br>
+        <b>Total de Pontos:</b> {resumo['pontos']} ({resumo['paradas']} paradas)<br>
         <b>Pontos por Empresa:</b>
         <table style="width: 100%; margin-top: 5px;">
             {stats_html}
         </table>
         <hr>
-        <small><i>Use o controle no canto superior direito para ligar/desligar empresas</i></small>
+        <small><i>Use o controle no canto superior direito para ligar/desligar empresas.
+        As paradas compartilhadas continuam visíveis ao desligar uma empresa</i></small>
     </div>
     """
     
     mapa.get_root().html.add_child(folium.Element(legenda_html))
     
     # Salva o mapa
-    mapa.save(output_file_html)
+    with etapa('salvar_mapa', linhas=len(df_paradas)):
+        mapa.save(output_file_html)
     print(f"🗺️ Mapa consolidado salvo: {output_file_html}")
     print(f"{'='*60}")
     
@@ -543,55 +903,158 @@ def criar_mapa_consolidado(lista_dfs, output_file_html, output_file_csv):
 # FUNÇÃO PRINCIPAL
 # ============================================================================
 
-def main():
+def main(usar_cache=True, modo_mapa='marcadores', comprimir=False, exportar_csv=False,
+         float32=False, mapa_calor=False, paralelo=True, metricas=True, verboso=False,
+         rastrear_memoria=False, piramide=False, observar=False, intervalo=INTERVALO_SEGUNDOS):
     """
     Função principal que orquestra todo o processo.
+    
+    Parâmetros:
+    -----------
+    usar_cache : bool
+        False força a reextração de todos os PDFs (--no-cache)
+    modo_mapa : str
+        Renderização dos pontos nos mapas, um de MODOS_RENDERIZACAO (--modo-mapa)
+    comprimir : bool
+        Grava irmãos .gz/.br de cada HTML/CSV gerado (--comprimir), em
+        threads, enquanto os próximos mapas são montados
+    exportar_csv : bool
+        Além do Parquet, grava os pontos também em CSV (--csv)
+    float32 : bool
+        Grava as coordenadas dos Parquet em float32 (--float32)
+    mapa_calor : bool
+        Camada de densidade de paradas no mapa consolidado (--mapa-calor)
+    paralelo : bool
+        Extrai todos os PDFs ao mesmo tempo, cada um num processo, e desenha
+        o mapa de cada empresa assim que ela fica pronta (False = um PDF por
+        vez, --sequencial)
+    metricas : bool
+        Grava o tempo, as contagens e a memória de cada etapa em
+        metricas/execucao_<data_hora>.json e .csv (False = --sem-metricas)
+    verboso : bool
+        Mostra o resultado de cada seção do PDF (log em DEBUG, --verbose)
+    rastrear_memoria : bool
+        Mede o pico de memória de cada etapa com o tracemalloc (mais lento,
+        --tracemalloc)
+    piramide : bool
+        Grava a pirâmide de tiles do mapa consolidado (--piramide)
+    observar : bool
+        Depois do processamento, continua observando os PDFs de
+        PDFS_PARA_PROCESSAR e, quando um deles muda, reextrai só aquela
+        empresa e refaz o mapa dela e o consolidado (--watch, até Ctrl+C)
+    intervalo : float
+        Segundos entre duas consultas aos PDFs no modo observar (--intervalo)
     """
+    configurar(verboso=verboso, rastrear_memoria=rastrear_memoria)
+    
     print("🚀 INICIANDO SISTEMA DE MAPEAMENTO COM VALIDAÇÃO 'ATIVO'")
     print("=" * 60)
     
-    todos_dfs = []
+    compressor = CompressorArtefatos(ativo=comprimir)
+    if comprimir:
+        print(f"🗜️ Compressão ativa: {', '.join(formatos_disponiveis())}")
+    
+    def tarefa_pdf(config):
+        return {
+            'empresa': config['empresa'],
+            'caminho': config['caminho'],
+            'kwargs': {'usar_cache': usar_cache, 'motor': config.get('motor', 'regex')}
+        }
     
-    # Processa cada PDF
+    # PDFs existentes (extraídos ao mesmo tempo, ver pipeline.py)
+    tarefas = []
     for config in PDFS_PARA_PROCESSAR:
-        pdf_path = config['caminho']
-        empresa = config['empresa']
-        
-        # Verifica se o arquivo existe
-        if not Path(pdf_path).exists():
-            print(f"❌ Arquivo não encontrado: {pdf_path}")
+        if not Path(config['caminho']).exists():
+            print(f"❌ Arquivo não encontrado: {config['caminho']}")
             continue
+        tarefas.append(tarefa_pdf(config))
+    
+    # Estado dos PDFs antes da extração: mudanças durante ela também contam
+    configs_pdfs = {config['caminho']: config for config in PDFS_PARA_PROCESSAR}
+    observador = ObservadorPDFs(list(configs_pdfs), intervalo=intervalo) if observar else None
+    
+    def processar_empresa(empresa, df):
+        """
+        Salva os pontos e cria o mapa individual assim que a empresa fica pronta.
+        """
+        if df.empty:
+            print(f"⚠️ Nenhum ponto ativo encontrado para {empresa}")
+            return
         
-        # Extrai dados do PDF (com validação de seções ativas)
-        df = extrair_coordenadas_pdf_com_ativo(pdf_path, empresa)
+        # Salva os pontos (Parquet + CSV opcional)
+        dados_file = f"dados_{empresa}_ATIVOS.parquet"
+        csv_file = f"dados_{empresa}_ATIVOS.csv" if exportar_csv else None
+        with etapa('salvar', linhas=len(df)):
+            salvar_pontos(df, dados_file, float32=float32, csv=csv_file)
+        print(f"💾 Dados salvos: {dados_file}" + (f" e {csv_file}" if csv_file else ""))
         
-        if not df.empty:
-            # Salva CSV individual
-            csv_file = f"dados_{empresa}_ATIVOS.csv"
-            df.to_csv(csv_file, index=False, encoding='utf-8-sig')
-            print(f"💾 Dados salvos: {csv_file}")
-            
-            # Cria mapa individual
-            html_file = f"mapa_{empresa}_ATIVOS_FOLIUM.html"
-            criar_mapa_folium(df, empresa, html_file)
-            
-            # Adiciona à lista para consolidação
-            todos_dfs.append(df)
-        else:
-            print(f"⚠️ Nenhum ponto ativo encontrado para {empresa}")
+        # Cria mapa individual
+        html_file = f"mapa_{empresa}_ATIVOS_FOLIUM.html"
+        with etapa('desenhar', linhas=len(df)):
+            criar_mapa_folium(df, empresa, html_file, modo=modo_mapa)
+        compressor.agendar(html_file, *([csv_file] if csv_file else []))
     
-    # Cria mapa consolidado se houver dados
-    if todos_dfs:
-        criar_mapa_consolidado(
-            todos_dfs,
-            "mapa_TODAS_EMPRESAS_ATIVAS_FOLIUM.html",
-            "mapa_TODAS_EMPRESAS_ATIVAS_FOLIUM.csv"
-        )
+    def consolidar(todos_dfs):
+        """
+        Mapa consolidado e índice de paradas, com todas as empresas prontas.
+        """
+        with etapa('desenhar', linhas=sum(len(df) for df in todos_dfs)):
+            criar_mapa_consolidado(
+                todos_dfs,
+                "mapa_TODAS_EMPRESAS_ATIVAS_FOLIUM.html",
+                "mapa_TODAS_EMPRESAS_ATIVAS_FOLIUM.csv" if exportar_csv else None,
+                modo=modo_mapa,
+                output_file_dados="mapa_TODAS_EMPRESAS_ATIVAS.parquet",
+                float32=float32,
+                mapa_calor=mapa_calor,
+                piramide=piramide
+            )
+        compressor.agendar("mapa_TODAS_EMPRESAS_ATIVAS_FOLIUM.html")
+        if piramide:
+            compressor.agendar(*Path("mapa_TODAS_EMPRESAS_ATIVAS_FOLIUM_TILES").rglob('*'))
+        if exportar_csv:
+            compressor.agendar("mapa_TODAS_EMPRESAS_ATIVAS_FOLIUM.csv",
+                               "mapa_TODAS_EMPRESAS_ATIVAS_FOLIUM_PARADAS.csv")
+        
+        # Índice de paradas próximas (só é remontado se algum PDF ou a extração mudou)
+        indice = atualizar_indice(todos_dfs, ARQUIVO_INDICE_ATIVAS, parametros={
+            'raio_deduplicacao': RAIO_DEDUPLICACAO_METROS,
+            'motores': {config['empresa']: config.get('motor', 'regex')
+                        for config in PDFS_PARA_PROCESSAR},
+        })
+        print(f"🔎 Índice de paradas: {ARQUIVO_INDICE_ATIVAS} ({len(indice)} paradas)")
+        
+        # Histórico das extrações (SQLite); PDFs já gravados não entram de novo
+        with etapa('historico', linhas=sum(len(df) for df in todos_dfs)):
+            novas = registrar_extracoes(todos_dfs, CONJUNTO_ATIVOS)
+        print(f"🗃️ Histórico: {ARQUIVO_HISTORICO} ({novas} extrações novas)")
+    
+    resultados, tempos = executar_pipeline(tarefas, extrair_coordenadas_pdf_com_ativo,
+                                           processar_empresa, consolidar, paralelo=paralelo)
+    
+    # Código e dados compartilhados do modo 'pacote'
+    if modo_mapa == 'pacote':
+        compressor.agendar(*Path(DIRETORIO_PACOTE).rglob('*'))
+    
+    # Espera as compressões pendentes antes do resumo (no modo observar as
+    # threads continuam para as próximas atualizações)
+    if observar:
+        compressor.aguardar()
+    else:
+        compressor.encerrar()
     
     print("\n" + "=" * 60)
     print("✅ PROCESSAMENTO CONCLUÍDO!")
     print("=" * 60)
     
+    imprimir_tempos(tempos)
+    
+    if metricas:
+        print("\n📏 MÉTRICAS POR ETAPA")
+        print(resumo_etapas().to_string())
+        arquivo_json, arquivo_csv = salvar_metricas(extras={'script': 'main(1).py', 'tempos': tempos})
+        print(f"💾 Métricas: {arquivo_json} e {arquivo_csv}")
+    
     # Resumo final
     print("\n📋 RESUMO DOS ARQUIVOS GERADOS:")
     print("-" * 40)
@@ -600,28 +1063,101 @@ def main():
     
     for config in PDFS_PARA_PROCESSAR:
         empresa = config['empresa']
+        dados_file = f"dados_{empresa}_ATIVOS.parquet"
         csv_file = f"dados_{empresa}_ATIVOS.csv"
         html_file = f"mapa_{empresa}_ATIVOS_FOLIUM.html"
         
-        if Path(csv_file).exists():
+        if Path(dados_file).exists():
+            arquivos_gerados.append(dados_file)
+        if exportar_csv and Path(csv_file).exists():
             arquivos_gerados.append(csv_file)
         if Path(html_file).exists():
             arquivos_gerados.append(html_file)
     
     arquivos_gerados.extend([
         "mapa_TODAS_EMPRESAS_ATIVAS_FOLIUM.html",
-        "mapa_TODAS_EMPRESAS_ATIVAS_FOLIUM.csv"
+        "mapa_TODAS_EMPRESAS_ATIVAS.parquet",
+        "mapa_TODAS_EMPRESAS_ATIVAS_PARADAS.parquet",
+        "mapa_TODAS_EMPRESAS_ATIVAS_COBERTURA.parquet",
+        "mapa_TODAS_EMPRESAS_ATIVAS_LACUNAS.parquet",
+        ARQUIVO_INDICE_ATIVAS,
+        ARQUIVO_HISTORICO
     ])
+    if exportar_csv:
+        arquivos_gerados.extend(["mapa_TODAS_EMPRESAS_ATIVAS_FOLIUM.csv",
+                                 "mapa_TODAS_EMPRESAS_ATIVAS_FOLIUM_PARADAS.csv"])
+    if piramide:
+        arquivos_gerados.append("mapa_TODAS_EMPRESAS_ATIVAS_FOLIUM_TILES/index.html")
+    
+    # Por formato: só os arquivos que têm aquele irmão comprimido entram no
+    # total original (Parquet, índice e histórico não são comprimidos)
+    total_bruto = {}
+    total_comprimido = {}
     
     for arquivo in arquivos_gerados:
         if Path(arquivo).exists():
             tamanho = Path(arquivo).stat().st_size / 1024  # Tamanho em KB
-            print(f"📄 {arquivo} ({tamanho:.1f} KB)")
+            comprimidos = tamanhos_comprimidos(arquivo) if comprimir else {}
+            if comprimidos:
+                detalhes = ", ".join(f"{formato} {bytes_ / 1024:.1f} KB"
+                                     for formato, bytes_ in comprimidos.items())
+                print(f"📄 {arquivo} ({tamanho:.1f} KB → {detalhes})")
+            else:
+                print(f"📄 {arquivo} ({tamanho:.1f} KB)")
+            
+            for formato, bytes_ in comprimidos.items():
+                total_bruto[formato] = total_bruto.get(formato, 0) + tamanho
+                total_comprimido[formato] = total_comprimido.get(formato, 0) + bytes_ / 1024
+    
+    if total_comprimido:
+        print("-" * 40)
+        for formato, tamanho in total_comprimido.items():
+            print(f"🗜️ Total: {total_bruto[formato]:.1f} KB → {formato} {tamanho:.1f} KB "
+                  f"({tamanho / total_bruto[formato]:.1%} do original)")
     
     print("\n🎯 Para visualizar os mapas:")
     print("   1. Abra qualquer arquivo .html no navegador")
     print("   2. Clique nos pontos para ver detalhes")
     print("   3. Use zoom e arraste para navegar")
+    print(f"   4. Paradas próximas: python indice_paradas.py LAT LON --raio 300 --indice {ARQUIVO_INDICE_ATIVAS}")
+    print(f"   5. Histórico por região: python historico_paradas.py caixa LAT_MIN LON_MIN LAT_MAX LON_MAX "
+          f"--conjunto {CONJUNTO_ATIVOS}")
+    print(f"   6. Mapa por área visível: python servidor_mapas.py --conjunto {CONJUNTO_ATIVOS}")
+    if piramide:
+        print("   7. Pirâmide de tiles: python -m http.server -d mapa_TODAS_EMPRESAS_ATIVAS_FOLIUM_TILES")
+    
+    if not observar:
+        return
+    
+    # Modo observar: só a empresa do PDF alterado é reextraída; as outras
+    # entram no consolidado com os dados que já estão em memória
+    def atualizar(alterados):
+        tarefas_alteradas = [tarefa_pdf(configs_pdfs[caminho]) for caminho in alterados]
+        print(f"\n{'=' * 60}")
+        print(f"🔄 PDF atualizado: {', '.join(alterados)} → reprocessando "
+              f"{', '.join(tarefa['empresa'] for tarefa in tarefas_alteradas)}")
+        print("=" * 60)
+        try:
+            tempos = reexecutar_empresas(tarefas_alteradas, resultados,
+                                         extrair_coordenadas_pdf_com_ativo, processar_empresa,
+                                         consolidar, paralelo=paralelo)
+        except Exception as erro:
+            print(f"❌ Falha ao reprocessar: {erro}")
+            return
+        if modo_mapa == 'pacote':
+            compressor.agendar(*Path(DIRETORIO_PACOTE).rglob('*'))
+        compressor.aguardar()
+        imprimir_tempos(tempos)
+        print(f"\n👀 Aguardando novas alterações nos PDFs...")
+    
+    print(f"\n👀 Observando {len(configs_pdfs)} PDFs a cada {intervalo:g}s "
+          f"(espera de {observador.espera:g}s após a última mudança; Ctrl+C para sair)")
+    try:
+        observador.observar(atualizar)
+    except KeyboardInterrupt:
+        print("\n👋 Observação encerrada")
+    finally:
+        compressor.encerrar()
 
 # ============================================================================
 # EXECUÇÃO
@@ -642,5 +1178,50 @@ if __name__ == "__main__":
         print("   pip install folium pandas pdfplumber")
         exit(1)
     
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Mapeamento de pontos ATIVOS - Maceió/AL")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="ignora o cache e reextrai todos os PDFs")
+    parser.add_argument('--modo-mapa', choices=MODOS_RENDERIZACAO, default='marcadores',
+                        help="'geojson' desenha cada empresa numa única camada (HTML menor); "
+                             "'canvas' e 'cluster' aguentam muitos pontos no mapa consolidado; "
+                             "'pacote' grava cascas HTML + código e dados compartilhados")
+    parser.add_argument('--comprimir', action='store_true',
+                        help="grava versões .gz (e .br, se o pacote brotli estiver instalado) "
+                             "de cada arquivo gerado")
+    parser.add_argument('--csv', action='store_true',
+                        help="além do Parquet, exporta os pontos em CSV")
+    parser.add_argument('--float32', action='store_true',
+                        help="grava as coordenadas dos Parquet em float32 (arquivos menores)")
+    parser.add_argument('--mapa-calor', action='store_true',
+                        help="camada de densidade de paradas (HeatMap) no mapa consolidado")
+    parser.add_argument('--piramide', action='store_true',
+                        help="corta o mapa consolidado numa pirâmide de tiles z/x/y em JSON "
+                             "(mapa_TODAS_EMPRESAS_ATIVAS_FOLIUM_TILES/)")
+    parser.add_argument('--sequencial', action='store_true',
+                        help="extrai um PDF por vez (padrão: todos ao mesmo tempo)")
+    parser.add_argument('--sem-metricas', action='store_true',
+                        help="não grava metricas/execucao_*.json e .csv")
+    parser.add_argument('--verbose', action='store_true',
+                        help="mostra o resultado de cada seção do PDF")
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help="mede o pico de memória de cada etapa (mais lento)")
+    parser.add_argument('--perfil', metavar='ARQUIVO',
+                        help="roda sob o cProfile e grava as estatísticas em ARQUIVO "
+                             "(use com --sequencial para incluir a extração)")
+    parser.add_argument('--watch', action='store_true',
+                        help="continua rodando e reprocessa a empresa cujo PDF mudar "
+                             "(consulta periódica, Ctrl+C para sair)")
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_SEGUNDOS,
+                        help=f"segundos entre duas consultas aos PDFs no --watch "
+                             f"(padrão: {INTERVALO_SEGUNDOS:g})")
+    args = parser.parse_args()
+    
     # Executa o sistema
-    main()
\ No newline at end of file
+    with perfilar(args.perfil):
+        main(usar_cache=not args.no_cache, modo_mapa=args.modo_mapa, comprimir=args.comprimir,
+             exportar_csv=args.csv, float32=args.float32, mapa_calor=args.mapa_calor,
+             paralelo=not args.sequencial, metricas=not args.sem_metricas,
+             verboso=args.verbose, rastrear_memoria=args.tracemalloc, piramide=args.piramide,
+             observar=args.watch, intervalo=args.intervalo)
\ No newline at end of file
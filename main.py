@@ -6,115 +6,283 @@ Versão: 2.0 - Com mapa base real do OpenStreetMap
 
 import pandas as pd
 import pdfplumber
-import re
+import os
+import logging
 import folium
 from folium import plugins
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
-# ============ CONFIGURAÇÕES ============
-CORES_EMPRESAS = {
-    'Real': '#FF0000',           # Vermelho
-    'SaoFrancisco': '#0000FF',   # Azul
-    'CidadeMaceio': '#FFFF00'    # Amarelo
-}
+from cache_extracao import carregar_cache, salvar_cache, chave_cache, hash_arquivo
+from scanner_coordenadas import PADRAO_COORDENADAS, PADRAO_CODIGO, varrer_pagina
+from deduplicacao_espacial import deduplicar_espacial, RAIO_DEDUPLICACAO_METROS
+from renderizacao import adicionar_pontos, montar_textos, MODOS_RENDERIZACAO
+from pacote_mapas import escrever_mapa_pacote, DIRETORIO_PACOTE
+from compressao import CompressorArtefatos
+from registros_pontos import BufferPontos
+from estilo_mapas import CORES_EMPRESAS, MACEIO_CENTRO, POPUP_MAPA_EMPRESA, TOOLTIP_MAPA_EMPRESA
+from indice_paradas import atualizar_indice, ARQUIVO_INDICE
+from historico_paradas import registrar_extracoes, ARQUIVO_HISTORICO, CONJUNTO_TODOS
+from piramide_tiles import gerar_piramide
+from paradas_compartilhadas import (unificar_paradas, resumo_compartilhamento,
+                                    RAIO_COMPARTILHAMENTO_METROS, CAMADA_COMPARTILHADAS,
+                                    COR_COMPARTILHADAS)
+from cobertura import (analisar_cobertura, resumo_cobertura, lacunas, adicionar_mapa_calor,
+                       LACUNAS_EXIBIDAS)
+from pipeline import executar_pipeline, reexecutar_empresas, imprimir_tempos, workers_por_pdf
+from observador_pdfs import ObservadorPDFs, INTERVALO_SEGUNDOS
+from instrumentacao import etapa, log, configurar, perfilar, salvar_metricas, resumo_etapas
+from armazenamento import salvar_pontos, como_dataframe, marcar_extracao, juntar_metadados
+from extracao_incremental import (impressoes_paginas, carregar_estado, salvar_estado,
+                                  planejar_paginas, juntar_pontos, comparar_pontos)
 
-# Coordenadas do centro de Maceió
-MACEIO_CENTRO = [-9.6498, -35.7089]
+# ============ CONFIGURAÇÕES ============
+# Versão do extrator (entra na chave do cache - mude ao alterar a extração)
+VERSAO_EXTRATOR = '2.3'
 
 # ============ EXTRAÇÃO DE DADOS DOS PDFs ============
-def extrair_coordenadas_pdf(pdf_path, empresa_nome):
+def _extrair_pontos_pagina(texto, pagina_num, empresa_nome, pontos, contagem=None):
+    """
+    Extrai os pontos de uma página já convertida em texto para o buffer
+    
+    contagem: recebe as correspondências do regex (ver scanner_coordenadas)
+    
+    Retorna o número de pontos acrescentados
+    """
+    antes = len(pontos)
+    
+    for lat, lon, codigo, linha in varrer_pagina(texto, contagem=contagem):
+        pontos.adicionar(empresa_nome, codigo, linha[:100], lat, lon, pagina_num + 1)
+    
+    return len(pontos) - antes
+
+def _extrair_textos_paginas(pdf_path, indices):
+    """
+    Extrai o texto das páginas indicadas de um PDF.
+    Executada dentro dos processos do pool: cada worker abre o PDF por conta própria.
+    """
+    textos = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for pagina_num in indices:
+            pagina = pdf.pages[pagina_num]
+            textos.append((pagina_num, pagina.extract_text()))
+            pagina.close()  # Libera o cache de objetos da página
+    return textos
+
+def _dividir_paginas(indices, workers):
+    """
+    Divide as páginas em fatias contíguas para distribuir entre os workers
+    """
+    # Mais fatias que workers para equilibrar páginas "pesadas" e "leves"
+    num_fatias = min(len(indices), workers * 4)
+    tamanho = -(-len(indices) // num_fatias)
+    return [indices[inicio:inicio + tamanho]
+            for inicio in range(0, len(indices), tamanho)]
+
+def extrair_textos_pdf(pdf_path, workers=None, usar_cache=True, paginas=None):
+    """
+    Extrai o texto das páginas, em paralelo quando workers > 1.
+    Retorna lista de (pagina_num, texto) em ordem de página.
+    
+    paginas: índices (0 = primeira) a extrair; None = todas
+    """
+    # O cache de textos só vale para o PDF inteiro
+    chave = None
+    if usar_cache and paginas is None:
+        chave = chave_cache(pdf_path, 'textos', pdfplumber.__version__)
+        textos = carregar_cache(chave)
+        if textos is not None:
+            return textos
+    
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    if paginas is None:
+        with etapa('abrir_pdf') as registro, pdfplumber.open(pdf_path) as pdf:
+            paginas = list(range(len(pdf.pages)))
+            registro['paginas'] = len(paginas)
+    
+    if workers <= 1 or len(paginas) < 2:
+        textos = _extrair_textos_paginas(pdf_path, paginas)
+    else:
+        fatias = _dividir_paginas(paginas, workers)
+        print(f"  ⚙️  {len(paginas)} páginas em {len(fatias)} fatias ({workers} processos)")
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futuros = [executor.submit(_extrair_textos_paginas, pdf_path, fatia)
+                       for fatia in fatias]
+            # Resultados na mesma ordem das fatias -> ordem original das páginas
+            textos = []
+            for futuro in futuros:
+                textos.extend(futuro.result())
+    
+    if chave:
+        salvar_cache(chave, textos)
+    
+    return textos
+
+def extrair_coordenadas_pdf(pdf_path, empresa_nome, workers=None, usar_cache=True,
+                            incremental=True, raio_deduplicacao=RAIO_DEDUPLICACAO_METROS,
+                            exportar_csv=False, float32=False):
     """
     Extrai coordenadas geográficas dos PDFs
+    
+    workers: número de processos para extrair as páginas em paralelo
+             (None = número de CPUs, 1 = execução sequencial)
+    usar_cache: reaproveita a extração anterior se o PDF não mudou (False
+                também ignora o estado incremental: todas as páginas são reextraídas)
+    incremental: se o PDF mudou, reextrai só as páginas alteradas
+    raio_deduplicacao: pontos a menos desta distância (m) viram um só
+    exportar_csv: além de dados_<empresa>.parquet, grava dados_<empresa>.csv
+    float32: grava as coordenadas do Parquet em float32
     """
     print(f"\n📊 PROCESSANDO: {Path(pdf_path).name}")
     
-    dados = []
-    
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for pagina_num, pagina in enumerate(pdf.pages):
-                texto = pagina.extract_text()
-                if not texto:
-                    continue
-                
-                linhas = texto.split('\n')
+    chave = None
+    df = None
+    if usar_cache:
+        chave = chave_cache(pdf_path, 'resultado', VERSAO_EXTRATOR,
+                            PADRAO_COORDENADAS.pattern, PADRAO_CODIGO.pattern,
+                            raio_deduplicacao, empresa_nome)
+        with etapa('cache') as registro:
+            df = carregar_cache(chave)
+            registro['linhas'] = len(df) if df is not None else 0
+        if df is not None:
+            print(f"  ⚡ PDF inalterado - resultado recuperado do cache")
+    
+    if df is None:
+        pontos = BufferPontos()
+        erro = False
+        estado = None
+        impressoes = None
+        reaproveitadas = {}
+        paginas = None
+        
+        try:
+            if incremental:
+                with etapa('abrir_pdf') as registro:
+                    impressoes = impressoes_paginas(pdf_path)
+                    registro['paginas'] = len(impressoes)
+                # Sem cache nada é reaproveitado, mas o estado novo é gravado
+                if usar_cache:
+                    estado = carregar_estado(empresa_nome, VERSAO_EXTRATOR)
                 
-                for linha_num, linha in enumerate(linhas):
-                    linha = linha.strip()
-                    
-                    # Padrões de coordenadas
-                    padroes = [
-                        r'(-?\d{1,2}[,.]\d+)\s+(-?\d{1,2}[,.]\d+)',  # -9,12345 -35,67890
-                        r'(-?\d{1,2}\.\d+)\s+(-?\d{1,2}\.\d+)'        # -9.12345 -35.67890
-                    ]
+                if estado is not None:
+                    reaproveitadas, paginas = planejar_paginas(estado['impressoes'], impressoes)
+                    print(f"  ♻️  {len(reaproveitadas)} páginas inalteradas, "
+                          f"{len(paginas)} páginas para reextrair")
+            
+            with etapa('extrair_texto') as registro:
+                textos = extrair_textos_pdf(pdf_path, workers, usar_cache, paginas)
+                registro['paginas'] = len(textos)
+            
+            with etapa('interpretar', paginas=len(textos), correspondencias=0) as registro:
+                for pagina_num, texto in textos:
+                    if not texto:
+                        continue
                     
-                    for padrao in padroes:
-                        matches = re.findall(padrao, linha)
-                        
-                        for lat_str, lon_str in matches:
-                            try:
-                                lat = float(lat_str.replace(',', '.'))
-                                lon = float(lon_str.replace(',', '.'))
-                                
-                                # Validar coordenadas de Maceió
-                                if -9.8 < lat < -9.4 and -35.9 < lon < -35.6:
-                                    
-                                    # Procurar código do ponto
-                                    codigo = "DESCONHECIDO"
-                                    codigos_encontrados = re.findall(r'([A-Z]{2,}\d+)', linha)
-                                    
-                                    if codigos_encontrados:
-                                        codigo = codigos_encontrados[0]
-                                    elif linha_num > 0:
-                                        linha_anterior = linhas[linha_num - 1]
-                                        codigos_ant = re.findall(r'([A-Z]{2,}\d+)', linha_anterior)
-                                        if codigos_ant:
-                                            codigo = codigos_ant[0]
-                                    
-                                    dados.append({
-                                        'empresa': empresa_nome,
-                                        'codigo': codigo,
-                                        'endereco': linha[:100],
-                                        'latitude': lat,
-                                        'longitude': lon,
-                                        'pagina': pagina_num + 1
-                                    })
-                                    
-                                    print(f"  ✅ {codigo} → ({lat:.5f}, {lon:.5f})")
-                                    
-                            except Exception:
-                                continue
-    
-    except Exception as e:
-        print(f"  ❌ Erro ao processar PDF: {e}")
-    
-    if dados:
-        df = pd.DataFrame(dados)
-        df = df.drop_duplicates(subset=['latitude', 'longitude'])
+                    novos = _extrair_pontos_pagina(texto, pagina_num, empresa_nome, pontos, registro)
+                    if log.isEnabledFor(logging.DEBUG):
+                        for linha in range(len(pontos) - novos, len(pontos)):
+                            log.debug(f"  ✅ {pontos.codigos[linha]} → "
+                                      f"({pontos.latitudes[linha]:.5f}, {pontos.longitudes[linha]:.5f})")
+                # Pontos dentro dos limites (correspondencias: todos os pares do regex)
+                registro['linhas'] = len(pontos)
+        
+        except Exception as e:
+            erro = True
+            print(f"  ❌ Erro ao processar PDF: {e}")
+        
+        df = pontos.para_dataframe()
+        if estado is not None and not erro:
+            # Junta os pontos das páginas reaproveitadas com os reextraídos
+            df = juntar_pontos(estado['pontos'], reaproveitadas, df)
+        
+        if incremental and not erro:
+            salvar_estado(empresa_nome, VERSAO_EXTRATOR, impressoes, df)
+        
+        if not df.empty:
+            with etapa('deduplicar', linhas=len(df)) as registro:
+                df = deduplicar_espacial(df, raio_deduplicacao)
+                registro['removidas'] = registro['linhas'] - len(df)
+        
+        if estado is not None and not erro:
+            df_anterior = estado['pontos']
+            if not df_anterior.empty:
+                df_anterior = deduplicar_espacial(df_anterior, raio_deduplicacao)
+            _relatar_mudancas(comparar_pontos(df_anterior, df))
         
-        # Salvar CSV
-        csv_file = f"dados_{empresa_nome}.csv"
-        df.to_csv(csv_file, index=False, encoding='utf-8-sig')
+        # Origem (hash do PDF) e data/hora da extração, gravadas no Parquet.
+        # Uma extração parcial fica sem origem: não entra no histórico nem
+        # passa pelo índice como se fosse a desse PDF
+        if not erro:
+            marcar_extracao(df, empresa_nome, hash_arquivo(pdf_path), VERSAO_EXTRATOR)
+        
+        # Só guarda no cache extrações completas
+        if chave and not erro:
+            salvar_cache(chave, df)
+    
+    if not df.empty:
+        # Salvar pontos (Parquet + CSV opcional)
+        dados_file = f"dados_{empresa_nome}.parquet"
+        csv_file = f"dados_{empresa_nome}.csv" if exportar_csv else None
+        with etapa('salvar', linhas=len(df)):
+            salvar_pontos(df, dados_file, float32=float32, csv=csv_file)
         
         print(f"\n  📈 RESULTADO: {len(df)} pontos extraídos")
-        print(f"  💾 Salvo em: {csv_file}")
+        print(f"  💾 Salvo em: {dados_file}" + (f" e {csv_file}" if csv_file else ""))
         
         return df
     else:
         print(f"  ⚠️  Nenhum ponto encontrado!")
         return pd.DataFrame()
 
+def _relatar_mudancas(mudancas):
+    """
+    Mostra os pontos adicionados, removidos e movidos desde a última extração
+    """
+    print(f"\n  🔄 MUDANÇAS DESDE A ÚLTIMA EXTRAÇÃO:")
+    print(f"     ➕ Adicionados: {len(mudancas['adicionados'])}")
+    print(f"     ➖ Removidos:   {len(mudancas['removidos'])}")
+    print(f"     ↔️  Movidos:     {len(mudancas['movidos'])}")
+    
+    for _, ponto in mudancas['movidos'].head(10).iterrows():
+        print(f"        {ponto['codigo']}: ({ponto['latitude_antiga']:.5f}, {ponto['longitude_antiga']:.5f})"
+              f" → ({ponto['latitude_nova']:.5f}, {ponto['longitude_nova']:.5f})")
+
 # ============ CRIAR MAPA FOLIUM INDIVIDUAL ============
-def criar_mapa_folium(df, empresa_nome, output_file):
+def criar_mapa_folium(df, empresa_nome, output_file, modo='marcadores'):
     """
     Cria mapa interativo com Folium (igual à imagem de referência)
+    
+    modo: 'marcadores' (um CircleMarker por ponto) ou um dos modos de camada
+          de renderizacao.py: 'geojson' (uma camada GeoJSON por empresa - HTML
+          bem menor), 'canvas' (GeoJSON pintado em <canvas>) ou 'cluster';
+          'pacote' grava só uma casca HTML que usa os arquivos compartilhados
+          de pacote_mapas.py
+    df: DataFrame ou caminho de um arquivo de pontos (.parquet ou .csv)
     """
+    df = como_dataframe(df)
+    
     if df.empty:
         print(f"  ⚠️  Sem dados para {empresa_nome}")
         return
     
     print(f"\n🗺️  CRIANDO MAPA: {output_file}")
     
+    if modo == 'pacote':
+        # Casca HTML + dados da empresa + código compartilhado
+        escrever_mapa_pacote(
+            output_file, [(empresa_nome, df, CORES_EMPRESAS.get(empresa_nome, '#000000'))],
+            titulo=empresa_nome,
+            popup_template=POPUP_MAPA_EMPRESA,
+            tooltip_template=TOOLTIP_MAPA_EMPRESA,
+            raio=8, opacidade=0.8, peso=2
+        )
+        print(f"  ✅ Mapa salvo (pacote): {output_file}")
+        print(f"  📍 {len(df)} pontos no mapa")
+        return
+    
     # Calcular centro do mapa
     lat_centro = df['latitude'].mean()
     lon_centro = df['longitude'].mean()
@@ -124,7 +292,8 @@ def criar_mapa_folium(df, empresa_nome, output_file):
         location=[lat_centro, lon_centro],
         zoom_start=12,
         tiles='OpenStreetMap',
-        control_scale=True
+        control_scale=True,
+        prefer_canvas=(modo == 'canvas')
     )
     
     # Adicionar tiles alternativos
@@ -134,30 +303,44 @@ def criar_mapa_folium(df, empresa_nome, output_file):
     # Cor da empresa
     cor = CORES_EMPRESAS.get(empresa_nome, '#000000')
     
-    # Adicionar marcadores
-    for idx, ponto in df.iterrows():
-        # Popup com informações
-        popup_html = f"""
-        <div style="font-family: Arial; width: 200px;">
-            <h4 style="color: {cor}; margin: 0;">{empresa_nome}</h4>
-            <hr style="margin: 5px 0;">
-            <b>Código:</b> {ponto['codigo']}<br>
-            <b>Lat:</b> {ponto['latitude']:.5f}<br>
-            <b>Lon:</b> {ponto['longitude']:.5f}<br>
-            <small>{ponto['endereco'][:80]}</small>
-        </div>
-        """
+    if modo != 'marcadores':
+        # Uma única camada por empresa, popups montados no navegador
+        adicionar_pontos(
+            mapa, df.assign(endereco=df['endereco'].str[:80]), cor, modo,
+            propriedades=['codigo', 'endereco'],
+            popup_template=f"""
+            <div style="font-family: Arial; width: 200px;">
+                <h4 style="color: {cor}; margin: 0;">{empresa_nome}</h4>
+                <hr style="margin: 5px 0;">
+                <b>Código:</b> ${{p.codigo}}<br>
+                <b>Lat:</b> ${{lat.toFixed(5)}}<br>
+                <b>Lon:</b> ${{lon.toFixed(5)}}<br>
+                <small>${{p.endereco}}</small>
+            </div>
+            """,
+            tooltip_template="${p.codigo}",
+            raio=8, opacidade=0.8, peso=2
+        )
+    else:
+        # Popups com informações, montados coluna a coluna
+        popups = montar_textos(POPUP_MAPA_EMPRESA, df.assign(endereco=df['endereco'].str[:80]),
+                               cor=cor, empresa=empresa_nome)
+        tooltips = montar_textos(TOOLTIP_MAPA_EMPRESA, df)
         
-        folium.CircleMarker(
-            location=[ponto['latitude'], ponto['longitude']],
-            radius=8,
-            popup=folium.Popup(popup_html, max_width=300),
-            tooltip=f"{ponto['codigo']}",
-            color='white',
-            fillColor=cor,
-            fillOpacity=0.8,
-            weight=2
-        ).add_to(mapa)
+        # Adicionar marcadores
+        for lat, lon, popup_html, tooltip in zip(df['latitude'].to_numpy(),
+                                                 df['longitude'].to_numpy(),
+                                                 popups, tooltips):
+            folium.CircleMarker(
+                location=[lat, lon],
+                radius=8,
+                popup=folium.Popup(popup_html, max_width=300),
+                tooltip=tooltip,
+                color='white',
+                fillColor=cor,
+                fillOpacity=0.8,
+                weight=2
+            ).add_to(mapa)
     
     # Adicionar legenda
     legenda_html = f"""
@@ -184,36 +367,143 @@ def criar_mapa_folium(df, empresa_nome, output_file):
     plugins.Fullscreen().add_to(mapa)
     
     # Salvar
-    mapa.save(output_file)
+    with etapa('salvar_mapa', linhas=len(df)):
+        mapa.save(output_file)
     print(f"  ✅ Mapa salvo: {output_file}")
     print(f"  📍 {len(df)} pontos no mapa")
     
     return mapa
 
 # ============ CRIAR MAPA CONSOLIDADO ============
-def criar_mapa_consolidado(lista_dfs, output_file):
+POPUP_MAPA_CONSOLIDADO = """
+            <div style="font-family: Arial; width: 200px;">
+                <h4 style="color: {cor}; margin: 0;">{empresas}</h4>
+                <hr style="margin: 5px 0;">
+                <b>Código:</b> {codigo}<br>
+                <b>Coordenadas:</b><br>
+                {latitude:.5f}, {longitude:.5f}
+            </div>
+            """
+TOOLTIP_MAPA_CONSOLIDADO = "{empresas}: {codigo}"
+
+def criar_mapa_consolidado(lista_dfs, output_file, raio_deduplicacao=RAIO_DEDUPLICACAO_METROS,
+                           modo='marcadores', exportar_csv=False, float32=False,
+                           raio_compartilhamento=RAIO_COMPARTILHAMENTO_METROS, mapa_calor=False,
+                           piramide=False):
     """
     Cria mapa com todas as empresas juntas
+    
+    raio_deduplicacao: pontos da mesma empresa a menos desta distância (m) viram um só
+    raio_compartilhamento: pontos de empresas diferentes a menos desta distância (m)
+                           são a mesma parada - desenhada uma vez, na camada
+                           "Compartilhadas" (tabela em <saída>_PARADAS.parquet)
+    modo: ver criar_mapa_folium ('canvas' ou 'cluster' para muitos pontos)
+    exportar_csv, float32: como em extrair_coordenadas_pdf (o Parquet fica ao
+                           lado do HTML, com o mesmo nome)
+    mapa_calor: acrescenta a camada de densidade de paradas (não vale no modo 'pacote');
+                a tabela de cobertura é gravada sempre (<saída>_COBERTURA.parquet), com
+                as células sem parada a pé em <saída>_LACUNAS.parquet
+    piramide: também corta as paradas numa pirâmide de tiles z/x/y em <saída>_TILES/,
+              com o visualizador (ver piramide_tiles.py)
     """
     print(f"\n🌍 CRIANDO MAPA CONSOLIDADO: {output_file}")
     
-    # Juntar todos os dados
+    # Juntar todos os dados (e a origem de cada um)
+    lista_dfs = [como_dataframe(df) for df in lista_dfs]
+    metadados = juntar_metadados(lista_dfs)
     df_total = pd.concat(lista_dfs, ignore_index=True)
     
     if df_total.empty:
         print("  ⚠️  Nenhum dado para consolidar!")
         return
     
+    # Remover pontos repetidos de cada empresa (por proximidade)
+    total_antes = len(df_total)
+    with etapa('deduplicar', linhas=total_antes) as registro:
+        df_total = deduplicar_espacial(df_total, raio_deduplicacao, por_empresa=True)
+        registro['removidas'] = total_antes - len(df_total)
+    if len(df_total) < total_antes:
+        print(f"  🧹 {total_antes - len(df_total)} pontos duplicados removidos")
+    
+    # Salvar pontos consolidados (Parquet + CSV opcional)
+    df_total.attrs.update(metadados)
+    dados_file = output_file.replace('.html', '.parquet')
+    csv_file = output_file.replace('.html', '.csv') if exportar_csv else None
+    with etapa('salvar', linhas=len(df_total)):
+        salvar_pontos(df_total, dados_file, float32=float32, csv=csv_file)
+    print(f"  💾 Pontos consolidados: {dados_file}" + (f" e {csv_file}" if csv_file else ""))
+    
+    # Densidade e cobertura a pé por célula (cada empresa com as suas paradas)
+    with etapa('cobertura', linhas=len(df_total)) as registro:
+        cobertura = analisar_cobertura(df_total)
+        cobertura_file = output_file.replace('.html', '_COBERTURA.parquet')
+        cobertura.to_parquet(cobertura_file, index=False)
+        registro['celulas'] = len(cobertura)
+        # Células sem parada a pé, da mais distante para a mais próxima
+        df_lacunas = lacunas(cobertura)
+        lacunas_file = output_file.replace('.html', '_LACUNAS.parquet')
+        df_lacunas.to_parquet(lacunas_file, index=False)
+        registro['lacunas'] = len(df_lacunas)
+    print(f"  📐 Cobertura a pé ({cobertura.attrs['raio_caminhada_metros']:.0f} m): {cobertura_file}")
+    print(resumo_cobertura(cobertura).to_string())
+    print(f"  🕳️  {len(df_lacunas)} células sem parada a pé: {lacunas_file}")
+    if len(df_lacunas):
+        print(df_lacunas.head(LACUNAS_EXIBIDAS).round(5).to_string(index=False))
+    
+    # Uma linha por parada física, com as empresas que a atendem
+    total_empresas = df_total['empresa'].nunique()
+    with etapa('compartilhadas', linhas=len(df_total)) as registro:
+        df_total = unificar_paradas(df_total, raio_compartilhamento)
+        resumo = resumo_compartilhamento(df_total)
+        registro['compartilhadas'] = resumo['compartilhadas']
+    paradas_file = output_file.replace('.html', '_PARADAS.parquet')
+    paradas_csv = output_file.replace('.html', '_PARADAS.csv') if exportar_csv else None
+    with etapa('salvar', linhas=len(df_total)):
+        salvar_pontos(df_total, paradas_file, float32=float32, csv=paradas_csv)
+    print(f"  🔗 {resumo['compartilhadas']} paradas atendidas por mais de uma empresa "
+          f"({resumo['pontos'] - resumo['paradas']} pontos a menos no mapa): {paradas_file}")
+    cores = {**CORES_EMPRESAS, CAMADA_COMPARTILHADAS: COR_COMPARTILHADAS}
+    
+    # Pirâmide de tiles: o navegador baixa só os tiles da área visível
+    if piramide:
+        diretorio_tiles = output_file.replace('.html', '_TILES')
+        with etapa('piramide', linhas=len(df_total)) as registro:
+            descricao = gerar_piramide(df_total, diretorio_tiles, cores=cores,
+                                       titulo="TODAS AS EMPRESAS",
+                                       popup_template=POPUP_MAPA_CONSOLIDADO,
+                                       tooltip_template=TOOLTIP_MAPA_CONSOLIDADO)
+            registro['tiles'] = descricao['arquivos']
+        print(f"  🧱 Pirâmide de tiles (zoom {descricao['zoomMinimo']}-{descricao['zoomMaximo']}): "
+              f"{diretorio_tiles}/ ({descricao['arquivos']} tiles)")
+    
     # Calcular centro
     lat_centro = df_total['latitude'].mean()
     lon_centro = df_total['longitude'].mean()
     
+    if modo == 'pacote':
+        # Casca HTML reaproveitando os arquivos de dados de cada empresa
+        escrever_mapa_pacote(
+            output_file,
+            [(empresa, df_empresa, cores.get(empresa, '#000000'))
+             for empresa, df_empresa in df_total.groupby('empresa', sort=False)],
+            titulo="TODAS AS EMPRESAS",
+            popup_template=POPUP_MAPA_CONSOLIDADO,
+            tooltip_template=TOOLTIP_MAPA_CONSOLIDADO,
+            centro=[lat_centro, lon_centro],
+            raio=7, opacidade=0.7, peso=2,
+            prefixo_dados='TODAS_'
+        )
+        print(f"  ✅ Mapa consolidado salvo (pacote)!")
+        print(f"  📊 Total: {len(df_total)} pontos de {total_empresas} empresas")
+        return
+    
     # Criar mapa
     mapa = folium.Map(
         location=[lat_centro, lon_centro],
         zoom_start=12,
         tiles='OpenStreetMap',
-        control_scale=True
+        control_scale=True,
+        prefer_canvas=(modo == 'canvas')
     )
     
     # Adicionar tiles
@@ -232,34 +522,49 @@ def criar_mapa_consolidado(lista_dfs, output_file):
     # Adicionar pontos por empresa
     for empresa in df_total['empresa'].unique():
         df_empresa = df_total[df_total['empresa'] == empresa]
-        cor = CORES_EMPRESAS.get(empresa, '#000000')
+        cor = cores.get(empresa, '#000000')
         
-        for _, ponto in df_empresa.iterrows():
-            popup_html = f"""
-            <div style="font-family: Arial; width: 200px;">
-                <h4 style="color: {cor}; margin: 0;">{empresa}</h4>
-                <hr style="margin: 5px 0;">
-                <b>Código:</b> {ponto['codigo']}<br>
-                <b>Coordenadas:</b><br>
-                {ponto['latitude']:.5f}, {ponto['longitude']:.5f}
-            </div>
-            """
-            
+        if modo != 'marcadores':
+            adicionar_pontos(
+                grupos[empresa], df_empresa, cor, modo,
+                propriedades=['codigo', 'empresas'],
+                popup_template=f"""
+                <div style="font-family: Arial; width: 200px;">
+                    <h4 style="color: {cor}; margin: 0;">${{p.empresas}}</h4>
+                    <hr style="margin: 5px 0;">
+                    <b>Código:</b> ${{p.codigo}}<br>
+                    <b>Coordenadas:</b><br>
+                    ${{lat.toFixed(5)}}, ${{lon.toFixed(5)}}
+                </div>
+                """,
+                tooltip_template="${p.empresas}: ${p.codigo}",
+                raio=7, opacidade=0.7, peso=2
+            )
+            continue
+        
+        popups = montar_textos(POPUP_MAPA_CONSOLIDADO, df_empresa, cor=cor)
+        tooltips = montar_textos(TOOLTIP_MAPA_CONSOLIDADO, df_empresa)
+        
+        for lat, lon, popup_html, tooltip in zip(df_empresa['latitude'].to_numpy(),
+                                                 df_empresa['longitude'].to_numpy(),
+                                                 popups, tooltips):
             folium.CircleMarker(
-                location=[ponto['latitude'], ponto['longitude']],
+                location=[lat, lon],
                 radius=7,
                 popup=folium.Popup(popup_html, max_width=300),
-                tooltip=f"{empresa}: {ponto['codigo']}",
+                tooltip=tooltip,
                 color='white',
                 fillColor=cor,
                 fillOpacity=0.7,
                 weight=2
             ).add_to(grupos[empresa])
     
-    # Legenda consolidada
+    # Legenda consolidada: cada empresa conta também as paradas que divide
+    # com outras (as mesmas contagens de antes da unificação)
+    contagens = {**resumo['por_empresa'], CAMADA_COMPARTILHADAS: resumo['compartilhadas']}
     legenda_items = ""
-    for empresa, cor in CORES_EMPRESAS.items():
-        count = len(df_total[df_total['empresa'] == empresa])
+    for empresa, cor in cores.items():
+        count = contagens.get(empresa, 0)
         if count > 0:
             legenda_items += f"""
             <div style="margin: 5px 0;">
@@ -285,30 +590,59 @@ def criar_mapa_consolidado(lista_dfs, output_file):
         <h4 style="margin: 0 0 10px 0;">TODAS AS EMPRESAS</h4>
         {legenda_items}
         <hr style="margin: 10px 0;">
-        <p style="margin: 5px 0;"><b>Total Geral:</b> {len(df_total)} pontos</p>
+        <p style="margin: 5px 0;"><b>Total Geral:</b> {resumo['pontos']} pontos
+           ({resumo['paradas']} paradas)</p>
+        <small><i>As paradas compartilhadas continuam visíveis ao desligar<br>
+           a camada de uma empresa</i></small>
     </div>
     """
     mapa.get_root().html.add_child(folium.Element(legenda_html))
     
+    if mapa_calor:
+        adicionar_mapa_calor(mapa, cobertura)
+    
     # Controles
     folium.LayerControl(collapsed=False).add_to(mapa)
     plugins.Fullscreen().add_to(mapa)
     
     # Salvar
-    mapa.save(output_file)
+    with etapa('salvar_mapa', linhas=len(df_total)):
+        mapa.save(output_file)
     print(f"  ✅ Mapa consolidado salvo!")
-    print(f"  📊 Total: {len(df_total)} pontos de {len(df_total['empresa'].unique())} empresas")
-    
-    # Salvar CSV consolidado
-    csv_file = output_file.replace('.html', '.csv')
-    df_total.to_csv(csv_file, index=False, encoding='utf-8-sig')
-    print(f"  💾 CSV consolidado: {csv_file}")
+    print(f"  📊 Total: {len(df_total)} pontos de {total_empresas} empresas")
 
 # ============ FUNÇÃO PRINCIPAL ============
-def main():
+def main(workers=None, usar_cache=True, incremental=True, modo_mapa='marcadores', comprimir=False,
+         exportar_csv=False, float32=False, mapa_calor=False, paralelo=True, metricas=True,
+         verboso=False, rastrear_memoria=False, piramide=False, observar=False,
+         intervalo=INTERVALO_SEGUNDOS):
     """
     Execução principal do sistema
+    
+    workers: processos usados na extração (None = número de CPUs), divididos
+             entre os PDFs extraídos ao mesmo tempo
+    usar_cache: False força a reextração de todas as páginas de todos os PDFs,
+                sem o estado incremental (--no-cache)
+    incremental: False reextrai todas as páginas de um PDF alterado (--no-incremental)
+    modo_mapa: renderização dos pontos, um de MODOS_RENDERIZACAO (--modo-mapa)
+    comprimir: grava irmãos .gz/.br dos HTML/CSV gerados, em threads (--comprimir)
+    exportar_csv: além dos Parquet, grava os pontos em CSV (--csv)
+    float32: coordenadas dos Parquet em float32 (--float32)
+    mapa_calor: camada de densidade de paradas no mapa consolidado (--mapa-calor)
+    paralelo: extrai todas as empresas ao mesmo tempo (False = uma por vez, --sequencial)
+    metricas: grava o tempo, as contagens e a memória de cada etapa em
+              metricas/execucao_<data_hora>.json e .csv (False = --sem-metricas)
+    verboso: mostra cada ponto extraído (log em DEBUG, --verbose)
+    rastrear_memoria: mede o pico de memória de cada etapa com o tracemalloc
+                      (mais lento, --tracemalloc)
+    piramide: grava a pirâmide de tiles do mapa consolidado (--piramide)
+    observar: depois do processamento, continua observando os PDFs e, quando um
+              deles muda, reextrai só aquela empresa e refaz o mapa dela e o
+              consolidado (--watch, até Ctrl+C)
+    intervalo: segundos entre duas consultas aos PDFs no modo observar (--intervalo)
     """
+    configurar(verboso=verboso, rastrear_memoria=rastrear_memoria)
+    
     print("="*80)
     print("🗺️  SISTEMA DE MAPEAMENTO COM FOLIUM - PONTOS DE ÔNIBUS MACEIÓ/AL")
     print("="*80)
@@ -320,45 +654,100 @@ def main():
         ('CidadeMaceio', 'pontos_Maceio.pdf')
     ]
     
-    todos_dados = []
+    compressor = CompressorArtefatos(ativo=comprimir)
     
-    # Processar cada empresa
+    # PDFs existentes (extraídos ao mesmo tempo, ver pipeline.py)
+    tarefas = []
     for empresa_nome, arquivo_pdf in empresas:
+        if Path(arquivo_pdf).exists():
+            tarefas.append({'empresa': empresa_nome, 'caminho': arquivo_pdf})
+        else:
+            print(f"  ❌ Arquivo não encontrado: {arquivo_pdf}")
+    
+    def dividir_workers(tarefas):
+        workers_pdf = workers_por_pdf(workers, len(tarefas)) if paralelo else workers
+        for tarefa in tarefas:
+            tarefa['kwargs'] = dict(workers=workers_pdf, usar_cache=usar_cache, incremental=incremental,
+                                    exportar_csv=exportar_csv, float32=float32)
+        return tarefas
+    
+    dividir_workers(tarefas)
+    
+    # Estado dos PDFs antes da extração: mudanças durante ela também contam
+    pdfs_empresas = {arquivo_pdf: empresa_nome for empresa_nome, arquivo_pdf in empresas}
+    observador = ObservadorPDFs(list(pdfs_empresas), intervalo=intervalo) if observar else None
+    
+    # Mapa individual de cada empresa, assim que a extração dela termina
+    def processar_empresa(empresa_nome, df):
         print(f"\n{'='*60}")
         print(f"📌 EMPRESA: {empresa_nome}")
         print(f"{'='*60}")
         
-        if Path(arquivo_pdf).exists():
-            # Extrair dados do PDF
-            df = extrair_coordenadas_pdf(arquivo_pdf, empresa_nome)
-            
-            if not df.empty:
-                todos_dados.append(df)
-                
-                # Criar mapa individual em HTML
-                html_file = f'mapa_{empresa_nome}_FOLIUM.html'
-                criar_mapa_folium(df, empresa_nome, html_file)
-                
-                print(f"\n  ✅ Mapa HTML interativo criado!")
-                print(f"  🌐 Abra no navegador: {html_file}")
-            else:
-                print(f"  ⚠️  Pulando {empresa_nome} - sem dados válidos")
-        else:
-            print(f"  ❌ Arquivo não encontrado: {arquivo_pdf}")
+        if df.empty:
+            print(f"  ⚠️  Pulando {empresa_nome} - sem dados válidos")
+            return
+        
+        html_file = f'mapa_{empresa_nome}_FOLIUM.html'
+        with etapa('desenhar', linhas=len(df)):
+            criar_mapa_folium(df, empresa_nome, html_file, modo=modo_mapa)
+        compressor.agendar(html_file)
+        if exportar_csv:
+            compressor.agendar(f'dados_{empresa_nome}.csv')
+        
+        print(f"\n  ✅ Mapa HTML interativo criado!")
+        print(f"  🌐 Abra no navegador: {html_file}")
     
-    # Criar mapa consolidado
-    if todos_dados:
+    # Mapa consolidado, com todas as empresas prontas
+    def consolidar(todos_dados):
         print(f"\n{'='*80}")
         print("🌍 GERANDO MAPA CONSOLIDADO COM TODAS AS EMPRESAS")
         print(f"{'='*80}")
         
-        criar_mapa_consolidado(todos_dados, 'mapa_TODAS_EMPRESAS_FOLIUM.html')
+        with etapa('desenhar', linhas=sum(len(df) for df in todos_dados)):
+            criar_mapa_consolidado(todos_dados, 'mapa_TODAS_EMPRESAS_FOLIUM.html', modo=modo_mapa,
+                                   exportar_csv=exportar_csv, float32=float32, mapa_calor=mapa_calor,
+                                   piramide=piramide)
+        compressor.agendar('mapa_TODAS_EMPRESAS_FOLIUM.html')
+        if piramide:
+            compressor.agendar(*Path('mapa_TODAS_EMPRESAS_FOLIUM_TILES').rglob('*'))
+        if exportar_csv:
+            compressor.agendar('mapa_TODAS_EMPRESAS_FOLIUM.csv',
+                               'mapa_TODAS_EMPRESAS_FOLIUM_PARADAS.csv')
+        
+        # Índice de paradas próximas (só é remontado se algum PDF ou a extração mudou)
+        indice = atualizar_indice(todos_dados, ARQUIVO_INDICE,
+                                  parametros={'raio_deduplicacao': RAIO_DEDUPLICACAO_METROS})
+        print(f"  🔎 Índice de paradas: {ARQUIVO_INDICE} ({len(indice)} paradas)")
+        
+        # Histórico das extrações (SQLite); PDFs já gravados não entram de novo
+        with etapa('historico', linhas=sum(len(df) for df in todos_dados)):
+            novas = registrar_extracoes(todos_dados, CONJUNTO_TODOS)
+        print(f"  🗃️  Histórico: {ARQUIVO_HISTORICO} ({novas} extrações novas)")
+    
+    resultados, tempos = executar_pipeline(tarefas, extrair_coordenadas_pdf, processar_empresa,
+                                           consolidar, paralelo=paralelo)
+    
+    if modo_mapa == 'pacote':
+        compressor.agendar(*Path(DIRETORIO_PACOTE).rglob('*'))
+    # No modo observar as threads de compressão continuam para as atualizações
+    if observar:
+        compressor.aguardar()
+    else:
+        compressor.encerrar()
     
     # Resumo final
     print(f"\n{'='*80}")
     print("🎉 PROCESSAMENTO CONCLUÍDO!")
     print(f"{'='*80}")
     
+    imprimir_tempos(tempos)
+    
+    if metricas:
+        print(f"\n📏 MÉTRICAS POR ETAPA")
+        print(resumo_etapas().to_string())
+        arquivo_json, arquivo_csv = salvar_metricas(extras={'script': 'main.py', 'tempos': tempos})
+        print(f"  💾 {arquivo_json} e {arquivo_csv}")
+    
     print("\n📂 ARQUIVOS GERADOS:")
     for empresa_nome, _ in empresas:
         html_file = f'mapa_{empresa_nome}_FOLIUM.html'
@@ -368,13 +757,113 @@ def main():
     if Path('mapa_TODAS_EMPRESAS_FOLIUM.html').exists():
         print(f"  ✅ mapa_TODAS_EMPRESAS_FOLIUM.html")
     
+    if piramide and Path('mapa_TODAS_EMPRESAS_FOLIUM_TILES').exists():
+        print(f"  ✅ mapa_TODAS_EMPRESAS_FOLIUM_TILES/")
+    
+    if Path(ARQUIVO_INDICE).exists():
+        print(f"  ✅ {ARQUIVO_INDICE}")
+    
+    if Path(ARQUIVO_HISTORICO).exists():
+        print(f"  ✅ {ARQUIVO_HISTORICO}")
+    
     print("\n💡 COMO USAR:")
     print("  1. Abra os arquivos .html no seu navegador")
     print("  2. Clique nos pontos para ver detalhes")
     print("  3. Use os controles no canto para trocar camadas")
     print("  4. Botão de tela cheia disponível")
     print("  5. Mapas são totalmente interativos!")
+    print("  6. Paradas próximas: python indice_paradas.py LAT LON --raio 300")
+    print("  7. Histórico por região: python historico_paradas.py caixa LAT_MIN LON_MIN LAT_MAX LON_MAX")
+    print("  8. Mapa por área visível: python servidor_mapas.py (abrir http://127.0.0.1:8000)")
+    if piramide:
+        print("  9. Pirâmide de tiles: python -m http.server -d mapa_TODAS_EMPRESAS_FOLIUM_TILES")
+    
+    if not observar:
+        return
+    
+    # Modo observar: só a empresa do PDF alterado é reextraída (as páginas
+    # alteradas, com a extração incremental); as outras entram no
+    # consolidado com os dados que já estão em memória
+    def atualizar(alterados):
+        tarefas_alteradas = dividir_workers([{'empresa': pdfs_empresas[caminho], 'caminho': caminho}
+                                             for caminho in alterados])
+        print(f"\n{'='*80}")
+        print(f"🔄 PDF ATUALIZADO: {', '.join(alterados)} → reprocessando "
+              f"{', '.join(tarefa['empresa'] for tarefa in tarefas_alteradas)}")
+        print(f"{'='*80}")
+        try:
+            tempos = reexecutar_empresas(tarefas_alteradas, resultados, extrair_coordenadas_pdf,
+                                         processar_empresa, consolidar, paralelo=paralelo)
+        except Exception as erro:
+            print(f"  ❌ Falha ao reprocessar: {erro}")
+            return
+        if modo_mapa == 'pacote':
+            compressor.agendar(*Path(DIRETORIO_PACOTE).rglob('*'))
+        compressor.aguardar()
+        imprimir_tempos(tempos)
+        print(f"\n👀 Aguardando novas alterações nos PDFs...")
+    
+    print(f"\n👀 Observando {len(pdfs_empresas)} PDFs a cada {intervalo:g}s "
+          f"(espera de {observador.espera:g}s após a última mudança; Ctrl+C para sair)")
+    try:
+        observador.observar(atualizar)
+    except KeyboardInterrupt:
+        print("\n👋 Observação encerrada")
+    finally:
+        compressor.encerrar()
 
 # ============ EXECUTAR ============
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Mapeamento de pontos de ônibus - Maceió/AL")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="processos para extrair as páginas, divididos entre as empresas "
+                             "(padrão: número de CPUs)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="ignora o cache e o estado incremental e reextrai todos os PDFs")
+    parser.add_argument('--no-incremental', action='store_true',
+                        help="reextrai todas as páginas de um PDF alterado")
+    parser.add_argument('--modo-mapa', choices=MODOS_RENDERIZACAO, default='marcadores',
+                        help="'geojson' desenha cada empresa numa única camada (HTML menor); "
+                             "'canvas' e 'cluster' aguentam muitos pontos no mapa consolidado; "
+                             "'pacote' grava cascas HTML + código e dados compartilhados")
+    parser.add_argument('--comprimir', action='store_true',
+                        help="grava versões .gz (e .br, se o pacote brotli estiver instalado) "
+                             "de cada arquivo gerado")
+    parser.add_argument('--csv', action='store_true',
+                        help="além do Parquet, exporta os pontos em CSV")
+    parser.add_argument('--float32', action='store_true',
+                        help="grava as coordenadas dos Parquet em float32 (arquivos menores)")
+    parser.add_argument('--mapa-calor', action='store_true',
+                        help="camada de densidade de paradas (HeatMap) no mapa consolidado")
+    parser.add_argument('--piramide', action='store_true',
+                        help="corta o mapa consolidado numa pirâmide de tiles z/x/y em JSON "
+                             "(mapa_TODAS_EMPRESAS_FOLIUM_TILES/)")
+    parser.add_argument('--sequencial', action='store_true',
+                        help="extrai uma empresa por vez (padrão: todas ao mesmo tempo)")
+    parser.add_argument('--sem-metricas', action='store_true',
+                        help="não grava metricas/execucao_*.json e .csv")
+    parser.add_argument('--verbose', action='store_true',
+                        help="mostra cada ponto extraído")
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help="mede o pico de memória de cada etapa (mais lento)")
+    parser.add_argument('--perfil', metavar='ARQUIVO',
+                        help="roda sob o cProfile e grava as estatísticas em ARQUIVO "
+                             "(use com --sequencial para incluir a extração)")
+    parser.add_argument('--watch', action='store_true',
+                        help="continua rodando e reprocessa a empresa cujo PDF mudar "
+                             "(consulta periódica, Ctrl+C para sair)")
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_SEGUNDOS,
+                        help=f"segundos entre duas consultas aos PDFs no --watch "
+                             f"(padrão: {INTERVALO_SEGUNDOS:g})")
+    args = parser.parse_args()
+    
+    with perfilar(args.perfil):
+        main(workers=args.workers, usar_cache=not args.no_cache,
+             incremental=not args.no_incremental, modo_mapa=args.modo_mapa,
+             comprimir=args.comprimir, exportar_csv=args.csv, float32=args.float32,
+             mapa_calor=args.mapa_calor, paralelo=not args.sequencial,
+             metricas=not args.sem_metricas, verboso=args.verbose,
+             rastrear_memoria=args.tracemalloc, piramide=args.piramide,
+             observar=args.watch, intervalo=args.intervalo)
\ No newline at end of file
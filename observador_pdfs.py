@@ -0,0 +1,150 @@
+"""
+Observa os PDFs das empresas e avisa quando algum foi atualizado (--watch).
+
+Funciona por consulta periódica (os.stat a cada INTERVALO_SEGUNDOS), sem
+inotify nem outros serviços: serve em qualquer Linux, em pastas de rede e
+em contêineres.
+
+- Um PDF conta como alterado quando o tamanho ou a data de modificação
+  mudam E o SHA-256 do conteúdo também (um `touch` não dispara nada).
+- Debounce: a mudança só é entregue depois de ESPERA_SEGUNDOS sem novas
+  alterações em nenhum dos PDFs. Um arquivo ainda sendo copiado, ou vários
+  PDFs publicados juntos, viram uma única atualização.
+- Um PDF removido é só avisado; volta a ser processado quando reaparecer.
+- Um PDF que some entre a consulta e a leitura do conteúdo (removido ou
+  trocado no meio) continua pendente e é verificado de novo.
+
+Uso:
+    observador = ObservadorPDFs(['pontos_real.pdf', 'pontos_Maceio.pdf'])
+    observador.observar(lambda alterados: print(alterados))
+"""
+
+import os
+import time
+
+from cache_extracao import hash_arquivo
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Intervalo entre duas consultas aos arquivos
+INTERVALO_SEGUNDOS = 2.0
+
+# Tempo sem novas alterações antes de reprocessar
+ESPERA_SEGUNDOS = 5.0
+
+# ============================================================================
+# OBSERVADOR
+# ============================================================================
+
+def estado_arquivo(caminho):
+    """
+    (tamanho, data de modificação em ns) do arquivo, ou None se não existir.
+    """
+    try:
+        info = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return info.st_size, info.st_mtime_ns
+
+class ObservadorPDFs:
+    """
+    Detecta, por consulta periódica, os PDFs alterados desde o último aviso.
+
+    Parâmetros:
+    -----------
+    caminhos : list
+        PDFs observados (os que ainda não existem também: são avisados
+        quando aparecerem)
+    intervalo : float
+        Segundos entre duas consultas
+    espera : float
+        Segundos sem alterações antes de avisar (debounce)
+    """
+
+    def __init__(self, caminhos, intervalo=INTERVALO_SEGUNDOS, espera=ESPERA_SEGUNDOS):
+        self.intervalo = intervalo
+        self.espera = espera
+        # Estado e hash de cada PDF no último aviso (o estado inicial conta
+        # como já processado)
+        self._estados = {}
+        self._hashes = {}
+        for caminho in caminhos:
+            estado = estado_arquivo(caminho)
+            conteudo = None
+            if estado is not None:
+                try:
+                    conteudo = hash_arquivo(caminho)
+                except OSError:
+                    estado = None  # Sumiu depois do stat: conta como ausente
+            self._estados[caminho] = estado
+            self._hashes[caminho] = conteudo
+        # Alterações ainda não avisadas: caminho -> (estado, instante da mudança)
+        self._pendentes = {}
+
+    @property
+    def caminhos(self):
+        return list(self._estados)
+
+    def verificar(self, agora=None):
+        """
+        Uma consulta aos arquivos.
+
+        Retorna:
+        --------
+        list
+            PDFs alterados e estáveis há `espera` segundos (vazia enquanto
+            algum PDF ainda estiver mudando), na ordem de `caminhos`
+        """
+        agora = time.monotonic() if agora is None else agora
+
+        for caminho, anterior in self._estados.items():
+            atual = estado_arquivo(caminho)
+            if atual == anterior:
+                self._pendentes.pop(caminho, None)
+            elif caminho not in self._pendentes or self._pendentes[caminho][0] != atual:
+                # Mudou (de novo): o prazo recomeça
+                self._pendentes[caminho] = (atual, agora)
+
+        if not self._pendentes:
+            return []
+        if any(agora - instante < self.espera for _, instante in self._pendentes.values()):
+            return []
+
+        alterados = []
+        for caminho in self.caminhos:
+            if caminho not in self._pendentes:
+                continue
+            estado, _ = self._pendentes.pop(caminho)
+            if estado is None:
+                self._estados[caminho] = estado
+                print(f"⚠️  PDF removido: {caminho} (mantidos os últimos dados)")
+                self._hashes[caminho] = None
+                continue
+            try:
+                conteudo = hash_arquivo(caminho)
+            except OSError:
+                # Removido ou trocado depois do stat: o prazo recomeça
+                self._pendentes[caminho] = (estado, agora)
+                continue
+            self._estados[caminho] = estado
+            if conteudo != self._hashes[caminho]:
+                self._hashes[caminho] = conteudo
+                alterados.append(caminho)
+        return alterados
+
+    def observar(self, ao_alterar, ciclos=None):
+        """
+        Consulta os arquivos a cada `intervalo` segundos e chama
+        ao_alterar(lista de PDFs alterados) a cada atualização.
+
+        Roda até Ctrl+C (ou por `ciclos` consultas, se informado).
+        """
+        ciclo = 0
+        while ciclos is None or ciclo < ciclos:
+            time.sleep(self.intervalo)
+            alterados = self.verificar()
+            if alterados:
+                ao_alterar(alterados)
+            ciclo += 1
@@ -0,0 +1,225 @@
+"""
+Saída dos mapas em PACOTE: cascas HTML mínimas + arquivos compartilhados.
+
+Cada mapa do Folium repete no HTML o mesmo código do Leaflet, as camadas de
+fundo, o CSS da legenda e todos os pontos. No modo 'pacote' a saída fica:
+
+    mapa_<...>.html              casca: referências + configuração do mapa
+    mapas_pacote/mapas.js        código comum a todos os mapas
+    mapas_pacote/mapas.css       estilo comum (legenda)
+    mapas_pacote/dados/<E>.js    pontos da empresa E, em colunas compactas
+
+O Leaflet vem do mesmo CDN usado pelo Folium. Os arquivos só são regravados
+quando o conteúdo muda e as cascas os referenciam com ?v=<hash>, então o
+navegador mantém em cache tudo o que não mudou entre duas atualizações.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from renderizacao import CASAS_DECIMAIS, escapar_html
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Subdiretório (ao lado dos HTML) com os arquivos compartilhados
+DIRETORIO_PACOTE = 'mapas_pacote'
+
+# Originais do código e do estilo comuns, copiados para o pacote
+DIRETORIO_ASSETS = Path(__file__).resolve().parent / 'assets_mapas'
+ARQUIVOS_COMPARTILHADOS = ('mapas.js', 'mapas.css')
+
+# Leaflet (mesma versão e CDN do Folium)
+LEAFLET_JS = 'https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.js'
+LEAFLET_CSS = 'https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.css'
+
+# Camadas de fundo (a primeira é a inicial)
+TILES_PACOTE = [
+    {'nome': 'OpenStreetMap',
+     'url': 'https://tile.openstreetmap.org/{z}/{x}/{y}.png',
+     'atribuicao': '&copy; OpenStreetMap contributors'},
+    {'nome': 'CartoDB Claro',
+     'url': 'https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}.png',
+     'atribuicao': '&copy; OpenStreetMap contributors &copy; CARTO'},
+    {'nome': 'CartoDB Escuro',
+     'url': 'https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}.png',
+     'atribuicao': '&copy; OpenStreetMap contributors &copy; CARTO'},
+]
+
+# Colunas levadas para os arquivos de dados (além de latitude/longitude);
+# 'empresas' só existe na tabela unificada do consolidado
+COLUNAS_DADOS = ('codigo', 'endereco', 'secao', 'empresas')
+
+# ============================================================================
+# ARQUIVOS
+# ============================================================================
+
+def _versao(conteudo):
+    return hashlib.sha256(conteudo).hexdigest()[:10]
+
+def escrever_se_mudou(caminho, conteudo):
+    """
+    Grava o arquivo só se o conteúdo for diferente do atual.
+
+    Retorna:
+    --------
+    str
+        Versão do conteúdo (prefixo do SHA-256), usada como ?v= nas cascas
+    """
+    caminho = Path(caminho)
+    if isinstance(conteudo, str):
+        conteudo = conteudo.encode('utf-8')
+    if not caminho.exists() or caminho.read_bytes() != conteudo:
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        caminho.write_bytes(conteudo)
+    return _versao(conteudo)
+
+def dados_empresa(df):
+    """
+    Converte os pontos de uma empresa para colunas compactas.
+
+    Retorna:
+    --------
+    dict
+        {coluna: lista de valores}; textos já escapados para HTML
+    """
+    colunas = {
+        'latitude': df['latitude'].round(CASAS_DECIMAIS).tolist(),
+        'longitude': df['longitude'].round(CASAS_DECIMAIS).tolist(),
+    }
+    for coluna in COLUNAS_DADOS:
+        if coluna not in df:
+            continue
+        if df[coluna].dtype.kind in 'iuf':
+            colunas[coluna] = df[coluna].tolist()
+        else:
+            colunas[coluna] = escapar_html(df[coluna].to_numpy()).tolist()
+    return colunas
+
+def escrever_dados_empresa(diretorio, empresa, df):
+    """
+    Grava mapas_pacote/dados/<empresa>.js com os pontos da empresa.
+
+    empresa é o nome do arquivo e a chave em MapasDMTT.registrar (ver o
+    prefixo_dados de escrever_mapa_pacote).
+
+    Retorna:
+    --------
+    tuple
+        (caminho relativo ao diretório dos HTML, versão do conteúdo)
+    """
+    relativo = f"{DIRETORIO_PACOTE}/dados/{empresa}.js"
+    conteudo = (f"MapasDMTT.registrar({json.dumps(empresa)}, "
+                f"{json.dumps(dados_empresa(df), ensure_ascii=False, separators=(',', ':'))});\n")
+    return relativo, escrever_se_mudou(Path(diretorio) / relativo, conteudo)
+
+def escrever_compartilhados(diretorio):
+    """
+    Copia mapas.js e mapas.css para o pacote (se mudaram).
+
+    Retorna:
+    --------
+    dict
+        {nome do arquivo: (caminho relativo, versão)}
+    """
+    arquivos = {}
+    for nome in ARQUIVOS_COMPARTILHADOS:
+        relativo = f"{DIRETORIO_PACOTE}/{nome}"
+        conteudo = (DIRETORIO_ASSETS / nome).read_bytes()
+        arquivos[nome] = (relativo, escrever_se_mudou(Path(diretorio) / relativo, conteudo))
+    return arquivos
+
+# ============================================================================
+# CASCA HTML
+# ============================================================================
+
+def escrever_mapa_pacote(output_file, camadas, titulo, popup_template, tooltip_template,
+                         centro=None, zoom=12, raio=8, opacidade=0.8, peso=2, prefixo_dados=''):
+    """
+    Grava a casca HTML de um mapa e os arquivos que ela referencia.
+
+    Parâmetros:
+    -----------
+    output_file : str
+        Caminho do HTML; o pacote fica em DIRETORIO_PACOTE ao lado dele
+    camadas : list
+        Tuplas (empresa, df, cor), uma camada por empresa
+    titulo : str
+        Título da página e da legenda
+    popup_template, tooltip_template : str
+        Templates com a sintaxe de renderizacao.montar_textos ({codigo},
+        {latitude:.5f}, {empresa}, {cor}...), preenchidos no navegador
+    centro : list, opcional
+        [lat, lon] inicial (padrão: média dos pontos)
+    zoom, raio, opacidade, peso :
+        Zoom inicial e estilo dos círculos
+    prefixo_dados : str
+        Prefixo dos arquivos de dados das camadas. Mapas com os mesmos
+        pontos por empresa compartilham os arquivos; um mapa com outros
+        pontos (ex: o consolidado, com as paradas compartilhadas à parte)
+        usa um prefixo próprio para não sobrescrevê-los
+
+    Retorna:
+    --------
+    Path
+        Caminho da casca gravada
+    """
+    output_file = Path(output_file)
+    diretorio = output_file.parent
+
+    compartilhados = escrever_compartilhados(diretorio)
+    scripts_dados = [escrever_dados_empresa(diretorio, prefixo_dados + empresa, df)
+                     for empresa, df, _ in camadas]
+
+    if centro is None:
+        todos = pd.concat([df[['latitude', 'longitude']] for _, df, _ in camadas])
+        centro = [float(todos['latitude'].mean()), float(todos['longitude'].mean())]
+
+    configuracao = {
+        'titulo': titulo,
+        'centro': centro,
+        'zoom': zoom,
+        'tiles': TILES_PACOTE,
+        'camadas': [{'empresa': empresa, 'cor': cor, 'dados': prefixo_dados + empresa}
+                    for empresa, _, cor in camadas],
+        'popup': popup_template,
+        'tooltip': tooltip_template,
+        'raio': raio,
+        'opacidade': opacidade,
+        'peso': peso,
+    }
+
+    js_relativo, js_versao = compartilhados['mapas.js']
+    css_relativo, css_versao = compartilhados['mapas.css']
+    # "</" escapado para o JSON não fechar o <script> da casca
+    configuracao_js = json.dumps(configuracao, ensure_ascii=False).replace('</', '<\\/')
+    linhas_dados = '\n'.join(
+        f'    <script src="{relativo}?v={versao}"></script>' for relativo, versao in scripts_dados
+    )
+
+    casca = f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{titulo}</title>
+    <link rel="stylesheet" href="{LEAFLET_CSS}">
+    <link rel="stylesheet" href="{css_relativo}?v={css_versao}">
+    <script src="{LEAFLET_JS}"></script>
+    <script src="{js_relativo}?v={js_versao}"></script>
+{linhas_dados}
+</head>
+<body>
+    <div id="mapa"></div>
+    <script>
+        MapasDMTT.criar('mapa', {configuracao_js});
+    </script>
+</body>
+</html>
+"""
+    escrever_se_mudou(output_file, casca)
+    return output_file
@@ -0,0 +1,180 @@
+"""
+Paradas atendidas por mais de uma empresa (Real, SaoFrancisco, CidadeMaceio).
+
+Os PDFs de cada empresa trazem as mesmas paradas físicas, então o mapa
+consolidado desenhava até três círculos sobrepostos no mesmo lugar. Aqui os
+pontos de empresas DIFERENTES a menos de `raio_metros` uns dos outros são
+casados com uma KD-tree (query_pairs, O(n log n)) e cada parada física vira
+uma linha da tabela unificada, com a lista das empresas que a atendem.
+
+Os pares são unidos do mais próximo para o mais distante e um grupo nunca
+recebe dois pontos da mesma empresa: pontos próximos de uma mesma empresa
+já foram tratados pela deduplicação espacial e são paradas distintas.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from deduplicacao_espacial import _raiz
+from indice_paradas import corda_para_metros, metros_para_corda, vetores_unitarios
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Distância máxima entre pontos de empresas diferentes na mesma parada física
+# (nos PDFs atuais as paradas em comum têm coordenadas iguais ou quase)
+RAIO_COMPARTILHAMENTO_METROS = 10.0
+
+# Camada/legenda das paradas com mais de uma empresa
+CAMADA_COMPARTILHADAS = 'Compartilhadas'
+COR_COMPARTILHADAS = '#8E44AD'  # Roxo
+
+SEPARADOR_EMPRESAS = ', '
+SEPARADOR_CODIGOS = ' / '
+
+# ============================================================================
+# CASAMENTO ENTRE EMPRESAS
+# ============================================================================
+
+def pares_entre_empresas(latitudes, longitudes, empresas, raio_metros=RAIO_COMPARTILHAMENTO_METROS):
+    """
+    Pares de pontos de empresas diferentes a até raio_metros um do outro.
+
+    Retorna:
+    --------
+    tuple
+        (pares, distancias): matriz (p, 2) de índices e distâncias em metros,
+        do par mais próximo para o mais distante
+    """
+    vetores = vetores_unitarios(latitudes, longitudes)
+    codigos = pd.factorize(np.asarray(empresas))[0]
+    if len(vetores) < 2:
+        return np.empty((0, 2), dtype=np.int64), np.empty(0)
+
+    pares = cKDTree(vetores).query_pairs(metros_para_corda(raio_metros), output_type='ndarray')
+    pares = pares[codigos[pares[:, 0]] != codigos[pares[:, 1]]]
+
+    distancias = corda_para_metros(np.linalg.norm(vetores[pares[:, 0]] - vetores[pares[:, 1]], axis=1))
+    ordem = np.argsort(distancias, kind='stable')
+    return pares[ordem], distancias[ordem]
+
+def agrupar_entre_empresas(latitudes, longitudes, empresas, raio_metros=RAIO_COMPARTILHAMENTO_METROS):
+    """
+    Agrupa pontos de empresas diferentes que são a mesma parada física.
+
+    Retorna:
+    --------
+    np.ndarray
+        Rótulo do grupo de cada ponto (o menor índice do grupo); cada grupo
+        tem no máximo um ponto de cada empresa
+    """
+    codigos = pd.factorize(np.asarray(empresas))[0]
+    n = len(codigos)
+    pais = list(range(n))
+    empresas_grupo = [{codigo} for codigo in codigos.tolist()]
+
+    pares, _ = pares_entre_empresas(latitudes, longitudes, empresas, raio_metros)
+    for i, j in pares.tolist():
+        raiz_i, raiz_j = _raiz(pais, i), _raiz(pais, j)
+        if raiz_i == raiz_j or empresas_grupo[raiz_i] & empresas_grupo[raiz_j]:
+            continue
+        raiz, outra = min(raiz_i, raiz_j), max(raiz_i, raiz_j)
+        pais[outra] = raiz
+        empresas_grupo[raiz] |= empresas_grupo[outra]
+
+    return np.array([_raiz(pais, i) for i in range(n)], dtype=np.int64)
+
+# ============================================================================
+# TABELA UNIFICADA
+# ============================================================================
+
+def unificar_paradas(df, raio_metros=RAIO_COMPARTILHAMENTO_METROS):
+    """
+    Uma linha por parada física, com as empresas que a atendem.
+
+    Parâmetros:
+    -----------
+    df : pd.DataFrame
+        Pontos de várias empresas ('empresa', 'codigo', 'latitude',
+        'longitude' e opcionalmente 'endereco'), já sem duplicatas dentro
+        de cada empresa
+    raio_metros : float
+        Distância máxima entre pontos de empresas diferentes na mesma parada
+
+    Retorna:
+    --------
+    pd.DataFrame
+        Na ordem da primeira ocorrência, com as colunas:
+        - empresa: a empresa, ou CAMADA_COMPARTILHADAS se houver mais de uma
+        - empresas: empresas que atendem a parada (separadas por ', ')
+        - n_empresas: quantidade de empresas
+        - codigo: código de cada empresa, na ordem de 'empresas' (' / ')
+        - latitude, longitude: média dos pontos casados
+        - endereco: o mais completo; demais colunas vêm do primeiro ponto
+        - linhas_origem: índices das linhas de df que formam a parada
+    """
+    trabalho = df.reset_index(drop=True)
+    trabalho['empresa'] = trabalho['empresa'].astype(str)
+    trabalho['codigo'] = trabalho['codigo'].astype(str)
+
+    grupos = agrupar_entre_empresas(trabalho['latitude'].to_numpy(),
+                                    trabalho['longitude'].to_numpy(),
+                                    trabalho['empresa'].to_numpy(), raio_metros)
+    tamanhos = np.bincount(grupos, minlength=len(grupos))[grupos] if len(grupos) else grupos
+
+    trabalho.insert(1, 'empresas', trabalho['empresa'])
+    trabalho.insert(2, 'n_empresas', 1)
+    trabalho['linhas_origem'] = [[indice] for indice in df.index.tolist()]
+    trabalho['_grupo'] = grupos
+
+    # Paradas de uma só empresa ficam como estão
+    exclusivas = trabalho[tamanhos == 1]
+
+    # Paradas compartilhadas: empresas na ordem em que aparecem em df
+    ordem_empresas = {empresa: i for i, empresa in enumerate(pd.unique(trabalho['empresa']))}
+    membros = trabalho[tamanhos > 1]
+    membros = membros.assign(_ordem=membros['empresa'].map(ordem_empresas)).sort_values(
+        ['_grupo', '_ordem'], kind='stable')
+
+    linhas = []
+    for grupo, pontos in membros.groupby('_grupo', sort=False):
+        linha = pontos.iloc[0].copy()
+        linha['empresa'] = CAMADA_COMPARTILHADAS
+        linha['empresas'] = SEPARADOR_EMPRESAS.join(pontos['empresa'])
+        linha['n_empresas'] = len(pontos)
+        linha['codigo'] = SEPARADOR_CODIGOS.join(pontos['codigo'])
+        linha['latitude'] = pontos['latitude'].mean()
+        linha['longitude'] = pontos['longitude'].mean()
+        if 'endereco' in pontos:
+            enderecos = pontos['endereco'].astype(str)
+            linha['endereco'] = enderecos.iloc[enderecos.str.len().argmax()]
+        linha['linhas_origem'] = [indice for origem in pontos['linhas_origem'] for indice in origem]
+        linhas.append(linha)
+
+    compartilhadas = pd.DataFrame(linhas, columns=trabalho.columns)
+    resultado = pd.concat([exclusivas, compartilhadas.astype(exclusivas.dtypes.to_dict())])
+    resultado = resultado.sort_values('_grupo', kind='stable').drop(columns=['_grupo', '_ordem'],
+                                                                       errors='ignore')
+    resultado = resultado.reset_index(drop=True)
+    resultado.attrs.update(df.attrs)
+    return resultado
+
+def resumo_compartilhamento(df_unificado):
+    """
+    Contagens para legendas e mensagens.
+
+    Retorna:
+    --------
+    dict
+        paradas (físicas), compartilhadas, pontos (antes da unificação) e
+        por_empresa {empresa: paradas atendidas}
+    """
+    empresas = df_unificado['empresas'].str.split(SEPARADOR_EMPRESAS).explode()
+    return {
+        'paradas': len(df_unificado),
+        'compartilhadas': int((df_unificado['n_empresas'] > 1).sum()),
+        'pontos': int(df_unificado['n_empresas'].sum()),
+        'por_empresa': empresas.value_counts(sort=False).to_dict(),
+    }
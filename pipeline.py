@@ -0,0 +1,194 @@
+"""
+Processamento das empresas em paralelo, com tempos por etapa.
+
+Antes cada empresa era extraída, salva e desenhada em sequência, e só
+depois vinha a próxima. Aqui:
+
+1. os PDFs de todas as empresas são extraídos ao mesmo tempo num pool de
+   processos (um processo por PDF);
+2. no processo principal, cada empresa é salva e ganha o seu mapa assim que
+   a extração dela termina, enquanto as outras ainda estão sendo extraídas;
+3. com todas prontas, o mapa consolidado é montado (na ordem das tarefas,
+   não na ordem em que terminaram).
+
+Ao final, imprimir_tempos mostra quanto cada etapa levou e quanto o
+paralelismo economizou em relação à soma das etapas. As métricas detalhadas
+de cada processo (instrumentacao.py) voltam para o processo principal junto
+com o DataFrame.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import instrumentacao
+
+# ============================================================================
+# TAREFAS
+# ============================================================================
+
+def workers_por_pdf(workers, quantidade_pdfs):
+    """
+    Divide os processos disponíveis entre os PDFs extraídos ao mesmo tempo
+    (os extratores que paralelizam por página recebem a sua fatia).
+    """
+    total = workers or os.cpu_count() or 1
+    return max(1, total // max(1, quantidade_pdfs))
+
+def _extrair_cronometrado(extrair, caminho, empresa, kwargs, configuracao=None):
+    # Roda no processo do pool: o tempo medido é só o da extração
+    if configuracao is not None:
+        instrumentacao.configurar(**configuracao)
+    marca = instrumentacao.marcar()
+    inicio = time.perf_counter()
+    with instrumentacao.contexto(empresa):
+        df = extrair(caminho, empresa, **kwargs)
+    return df, time.perf_counter() - inicio, instrumentacao.registros_desde(marca)
+
+# ============================================================================
+# EXECUÇÃO
+# ============================================================================
+
+def executar_pipeline(tarefas, extrair, processar_empresa=None, consolidar=None, paralelo=True):
+    """
+    Extrai, processa e consolida as empresas.
+
+    Parâmetros:
+    -----------
+    tarefas : list
+        Dicionários com 'empresa', 'caminho' (PDF) e opcionalmente 'kwargs'
+        (argumentos extras de extrair)
+    extrair : callable
+        extrair(caminho, empresa, **kwargs) -> pd.DataFrame. Roda em outro
+        processo: precisa ser uma função de módulo (serializável)
+    processar_empresa : callable, opcional
+        processar_empresa(empresa, df), chamada no processo principal logo
+        que a extração da empresa termina (salvar, desenhar o mapa...)
+    consolidar : callable, opcional
+        consolidar(lista_dfs), chamada com os DataFrames não vazios, na
+        ordem das tarefas
+    paralelo : bool
+        False extrai um PDF por vez, no próprio processo
+
+    Retorna:
+    --------
+    tuple
+        (resultados, tempos): {empresa: df} na ordem das tarefas e
+        {empresa: {etapa: segundos}}, com a chave 'TOTAL' para o
+        consolidado e o tempo total
+    """
+    inicio = time.perf_counter()
+    resultados = {}
+    tempos = {tarefa['empresa']: {} for tarefa in tarefas}
+
+    def concluir(empresa, df, segundos_extracao):
+        tempos[empresa]['extracao'] = segundos_extracao
+        tempos[empresa]['pronta_em'] = time.perf_counter() - inicio
+        resultados[empresa] = df
+        if processar_empresa is not None:
+            inicio_etapa = time.perf_counter()
+            with instrumentacao.contexto(empresa):
+                processar_empresa(empresa, df)
+            tempos[empresa]['mapa'] = time.perf_counter() - inicio_etapa
+
+    if paralelo and len(tarefas) > 1:
+        with ProcessPoolExecutor(max_workers=len(tarefas)) as pool:
+            futuros = {
+                pool.submit(_extrair_cronometrado, extrair, tarefa['caminho'], tarefa['empresa'],
+                            tarefa.get('kwargs', {}), instrumentacao.configuracao()): tarefa['empresa']
+                for tarefa in tarefas
+            }
+            for futuro in as_completed(futuros):
+                empresa = futuros[futuro]
+                try:
+                    df, segundos, registros = futuro.result()
+                except Exception as erro:
+                    print(f"❌ Falha na extração de {empresa}: {erro}")
+                    continue
+                instrumentacao.incorporar(registros)
+                concluir(empresa, df, segundos)
+    else:
+        for tarefa in tarefas:
+            # Aqui as etapas já ficam registradas neste processo
+            try:
+                df, segundos, _ = _extrair_cronometrado(extrair, tarefa['caminho'], tarefa['empresa'],
+                                                        tarefa.get('kwargs', {}))
+            except Exception as erro:
+                print(f"❌ Falha na extração de {tarefa['empresa']}: {erro}")
+                continue
+            concluir(tarefa['empresa'], df, segundos)
+
+    # Ordem das tarefas (não a de término) para o consolidado ser estável
+    resultados = {tarefa['empresa']: resultados[tarefa['empresa']]
+                  for tarefa in tarefas if tarefa['empresa'] in resultados}
+
+    tempos['TOTAL'] = {}
+    lista_dfs = [df for df in resultados.values() if not df.empty]
+    if consolidar is not None and lista_dfs:
+        inicio_etapa = time.perf_counter()
+        with instrumentacao.contexto('TODAS'):
+            consolidar(lista_dfs)
+        tempos['TOTAL']['consolidado'] = time.perf_counter() - inicio_etapa
+    tempos['TOTAL']['total'] = time.perf_counter() - inicio
+
+    return resultados, tempos
+
+def reexecutar_empresas(tarefas, resultados, extrair, processar_empresa=None, consolidar=None,
+                        paralelo=True):
+    """
+    Reextrai só as empresas de `tarefas` e refaz o consolidado com todas.
+
+    Usado pelo modo --watch: as demais empresas entram no consolidado com
+    os DataFrames da execução anterior.
+
+    Parâmetros:
+    -----------
+    tarefas : list
+        Tarefas das empresas alteradas (como em executar_pipeline)
+    resultados : dict
+        {empresa: df} de todas as empresas (o retorno de executar_pipeline);
+        atualizado com os novos DataFrames, mantendo a ordem
+    extrair, processar_empresa, consolidar, paralelo :
+        Como em executar_pipeline
+
+    Retorna:
+    --------
+    dict
+        Tempos, como em executar_pipeline
+    """
+    inicio = time.perf_counter()
+    novos, tempos = executar_pipeline(tarefas, extrair, processar_empresa, paralelo=paralelo)
+    resultados.update(novos)
+
+    lista_dfs = [df for df in resultados.values() if not df.empty]
+    if consolidar is not None and lista_dfs:
+        inicio_etapa = time.perf_counter()
+        with instrumentacao.contexto('TODAS'):
+            consolidar(lista_dfs)
+        tempos['TOTAL']['consolidado'] = time.perf_counter() - inicio_etapa
+    tempos['TOTAL']['total'] = time.perf_counter() - inicio
+    return tempos
+
+# ============================================================================
+# RELATÓRIO
+# ============================================================================
+
+def imprimir_tempos(tempos):
+    """
+    Tabela com os tempos de cada etapa por empresa.
+    """
+    print(f"\n⏱️  TEMPOS POR ETAPA")
+    print(f"  {'Empresa':<16}{'Extração':>10}{'Pronta em':>11}{'Mapa':>9}")
+    soma_etapas = 0.0
+    for empresa, etapas in tempos.items():
+        if empresa == 'TOTAL' or 'extracao' not in etapas:
+            continue
+        mapa = etapas.get('mapa', 0.0)
+        soma_etapas += etapas['extracao'] + mapa
+        print(f"  {empresa:<16}{etapas['extracao']:>9.1f}s{etapas['pronta_em']:>10.1f}s{mapa:>8.1f}s")
+
+    total = tempos['TOTAL']
+    consolidado = total.get('consolidado', 0.0)
+    soma_etapas += consolidado
+    print(f"  {'Consolidado':<16}{'':>10}{'':>11}{consolidado:>8.1f}s")
+    print(f"  Total: {total['total']:.1f}s (soma das etapas: {soma_etapas:.1f}s)")
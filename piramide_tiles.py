@@ -0,0 +1,308 @@
+"""
+Pirâmide de tiles z/x/y em JSON com as paradas do mapa consolidado.
+
+Em vez de um HTML com todos os pontos, os dados ficam cortados na grade de
+tiles do Web Mercator (a mesma do OpenStreetMap), um arquivo por tile:
+
+    <diretório>/index.html          visualizador (Leaflet)
+    <diretório>/tiles.json          descrição da pirâmide (zooms, limites, empresas)
+    <diretório>/<z>/<x>/<y>.json    FeatureCollection com as paradas do tile
+
+O navegador só baixa os tiles da área que está mostrando.
+
+- Abaixo de ZOOM_PONTOS cada tile traz células agregadas por empresa
+  (CELULAS_POR_TILE por lado), com a quantidade de paradas e a posição
+  média delas; a partir de ZOOM_PONTOS, as paradas.
+- A projeção, as células e a divisão em tiles são feitas sobre os arrays
+  NumPy de coordenadas, um zoom inteiro de cada vez; os zooms são gerados
+  em paralelo, um processo por zoom.
+- Tiles são regravados só quando mudam (pacote_mapas.escrever_se_mudou) e
+  os que ficaram sem paradas são apagados, com os irmãos .gz/.br. O
+  tiles.json traz a versão de cada tile e o visualizador pede cada um com
+  ?v=<versão do tile>: o navegador guarda em cache os tiles que não mudaram
+  entre duas execuções, e tiles sem paradas nem são pedidos.
+
+O visualizador usa fetch, então precisa ser aberto por HTTP:
+    python -m http.server -d mapa_TODAS_EMPRESAS_FOLIUM_TILES
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pacote_mapas import (DIRETORIO_ASSETS, LEAFLET_CSS, LEAFLET_JS, TILES_PACOTE,
+                          escrever_se_mudou)
+from renderizacao import montar_feature_collection
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Zooms gerados (cidade inteira -> rua)
+ZOOM_MINIMO = 10
+ZOOM_MAXIMO = 17
+
+# A partir deste zoom os tiles trazem as paradas (abaixo: células)
+ZOOM_PONTOS = 14
+
+# Células por lado de tile nos zooms agregados (tile de 256 px -> 64 px)
+CELULAS_POR_TILE = 4
+
+# Latitude máxima do Web Mercator
+LATITUDE_MERCATOR = 85.0511287798
+
+# Propriedades de cada parada e de cada célula nos tiles
+PROPRIEDADES_PONTOS = ('empresa', 'empresas', 'codigo', 'endereco')
+PROPRIEDADES_CELULAS = ['empresa', 'quantidade']
+
+# Código da página, copiado de assets_mapas para a pirâmide
+ARQUIVOS_VISUALIZADOR = ('mapas.js', 'mapas.css', 'visor.js', 'piramide.js')
+
+ARQUIVO_DESCRICAO = 'tiles.json'
+
+# ============================================================================
+# PROJEÇÃO
+# ============================================================================
+
+def projetar(latitudes, longitudes):
+    """
+    Coordenadas em graus -> posição no Web Mercator normalizada em [0, 1).
+
+    x cresce para leste e y para o sul, como na grade de tiles z/x/y: no
+    zoom z o tile de um ponto é (floor(x * 2**z), floor(y * 2**z)).
+
+    Retorna:
+    --------
+    tuple
+        (x, y), arrays float64
+    """
+    latitudes = np.clip(np.asarray(latitudes, dtype=np.float64),
+                        -LATITUDE_MERCATOR, LATITUDE_MERCATOR)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    x = (longitudes + 180.0) / 360.0
+    y = (1.0 - np.arcsinh(np.tan(np.radians(latitudes))) / np.pi) / 2.0
+    limite = np.nextafter(1.0, 0.0)
+    return np.clip(x, 0.0, limite), np.clip(y, 0.0, limite)
+
+# ============================================================================
+# TILES DE UM ZOOM
+# ============================================================================
+
+def _celulas(df, x, y, zoom, celulas_por_tile):
+    """
+    Agrega as paradas em células da grade do zoom, por empresa.
+
+    Retorna:
+    --------
+    tuple
+        (DataFrame com empresa, latitude, longitude e quantidade de cada
+        célula, tile x de cada célula, tile y de cada célula)
+    """
+    escala = 2 ** zoom * celulas_por_tile
+    empresas, codigos = np.unique(df['empresa'].to_numpy(dtype=str), return_inverse=True)
+    chaves = np.column_stack((codigos.ravel(),
+                              (x * escala).astype(np.int64),
+                              (y * escala).astype(np.int64)))
+    celulas, grupos, quantidades = np.unique(chaves, axis=0, return_inverse=True,
+                                             return_counts=True)
+    grupos = grupos.ravel()
+
+    tabela = pd.DataFrame({
+        'empresa': empresas[celulas[:, 0]],
+        'latitude': np.bincount(grupos, weights=df['latitude'].to_numpy(dtype=np.float64)) / quantidades,
+        'longitude': np.bincount(grupos, weights=df['longitude'].to_numpy(dtype=np.float64)) / quantidades,
+        'quantidade': quantidades,
+    })
+    return tabela, celulas[:, 1] // celulas_por_tile, celulas[:, 2] // celulas_por_tile
+
+def gerar_zoom(df, x, y, zoom, diretorio, zoom_pontos=ZOOM_PONTOS,
+               celulas_por_tile=CELULAS_POR_TILE):
+    """
+    Grava os tiles de um zoom (roda num processo do pool de gerar_piramide).
+
+    Parâmetros:
+    -----------
+    df : pd.DataFrame
+        Paradas (latitude, longitude, empresa e as colunas de PROPRIEDADES_PONTOS)
+    x, y : np.ndarray
+        Posição de cada parada no Web Mercator normalizado (ver projetar)
+    zoom : int
+    diretorio : str ou Path
+        Raiz da pirâmide
+
+    Retorna:
+    --------
+    dict
+        zoom, agregado, tiles gravados ({caminho relativo: versão}), feições
+        e a faixa de tiles [x_min, y_min, x_max, y_max]
+    """
+    agregado = zoom < zoom_pontos
+    if agregado:
+        tabela, tiles_x, tiles_y = _celulas(df, x, y, zoom, celulas_por_tile)
+        propriedades = PROPRIEDADES_CELULAS
+    else:
+        tabela = df
+        tiles_x = (x * 2 ** zoom).astype(np.int64)
+        tiles_y = (y * 2 ** zoom).astype(np.int64)
+        propriedades = [coluna for coluna in PROPRIEDADES_PONTOS if coluna in df]
+
+    # Ordena por tile: cada tile vira uma fatia contígua das feições
+    ordem = np.lexsort((tiles_y, tiles_x))
+    tiles_x, tiles_y = tiles_x[ordem], tiles_y[ordem]
+    feicoes = montar_feature_collection(tabela.take(ordem), propriedades)['features']
+    inicios = np.flatnonzero(np.r_[True, (np.diff(tiles_x) != 0) | (np.diff(tiles_y) != 0)])
+    fins = np.r_[inicios[1:], len(feicoes)]
+
+    tiles = {}
+    for inicio, fim in zip(inicios.tolist(), fins.tolist()):
+        relativo = f"{zoom}/{tiles_x[inicio]}/{tiles_y[inicio]}.json"
+        conteudo = json.dumps({'type': 'FeatureCollection', 'features': feicoes[inicio:fim],
+                               'agregado': agregado},
+                              ensure_ascii=False, separators=(',', ':'))
+        tiles[relativo] = escrever_se_mudou(Path(diretorio) / relativo, conteudo)
+
+    return {
+        'zoom': zoom,
+        'agregado': agregado,
+        'tiles': tiles,
+        'feicoes': len(feicoes),
+        'faixa': ([int(tiles_x.min()), int(tiles_y.min()), int(tiles_x.max()), int(tiles_y.max())]
+                  if len(feicoes) else None),
+    }
+
+# ============================================================================
+# PIRÂMIDE
+# ============================================================================
+
+def _remover_antigos(diretorio, gravados):
+    """
+    Apaga tiles de execuções anteriores que não foram gravados agora, com
+    as versões comprimidas (.json.gz / .json.br, ver compressao.py).
+    """
+    removidos = 0
+    for caminho in Path(diretorio).glob('*/*/*.json*'):
+        relativo = caminho.relative_to(diretorio).as_posix()
+        tile, _, sufixo = relativo.partition('.json')
+        if sufixo not in ('', '.gz', '.br') or not relativo.split('/', 1)[0].isdigit():
+            continue
+        if f"{tile}.json" not in gravados:
+            caminho.unlink()
+            removidos += not sufixo
+    return removidos
+
+def _escrever_visualizador(diretorio, descricao, titulo):
+    versoes = {nome: escrever_se_mudou(Path(diretorio) / nome, (DIRETORIO_ASSETS / nome).read_bytes())
+               for nome in ARQUIVOS_VISUALIZADOR}
+    # "</" escapado para o JSON não fechar o <script>
+    configuracao_js = json.dumps(descricao, ensure_ascii=False).replace('</', '<\\/')
+    scripts = '\n'.join(f'    <script src="{nome}?v={versoes[nome]}"></script>'
+                        for nome in ARQUIVOS_VISUALIZADOR if nome.endswith('.js'))
+    pagina = f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{titulo}</title>
+    <link rel="stylesheet" href="{LEAFLET_CSS}">
+    <link rel="stylesheet" href="mapas.css?v={versoes['mapas.css']}">
+    <script src="{LEAFLET_JS}"></script>
+{scripts}
+</head>
+<body>
+    <div id="mapa"></div>
+    <script>
+        PiramideDMTT.criar('mapa', {configuracao_js});
+    </script>
+</body>
+</html>
+"""
+    escrever_se_mudou(Path(diretorio) / 'index.html', pagina)
+
+def gerar_piramide(df, diretorio, cores=None, titulo="TODAS AS EMPRESAS", popup_template='',
+                   tooltip_template='', zoom_minimo=ZOOM_MINIMO, zoom_maximo=ZOOM_MAXIMO,
+                   zoom_pontos=ZOOM_PONTOS, workers=None):
+    """
+    Corta as paradas na pirâmide de tiles e grava o visualizador.
+
+    Parâmetros:
+    -----------
+    df : pd.DataFrame
+        Paradas com latitude, longitude e empresa (a camada de cada uma)
+    diretorio : str ou Path
+        Raiz da pirâmide (criada se não existir)
+    cores : dict, opcional
+        {empresa: cor} da legenda e dos pontos
+    titulo, popup_template, tooltip_template : str
+        Título da página e templates dos pontos (sintaxe de
+        renderizacao.montar_textos, preenchidos no navegador)
+    zoom_minimo, zoom_maximo, zoom_pontos : int
+        Zooms gerados e o primeiro com as paradas em vez de células
+    workers : int, opcional
+        Processos (um zoom por processo; padrão: número de CPUs, 1 = sem pool)
+
+    Retorna:
+    --------
+    dict
+        A descrição gravada em tiles.json, mais 'arquivos' (tiles gravados)
+        e 'removidos' (tiles antigos apagados)
+    """
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    cores = cores or {}
+
+    colunas = ['latitude', 'longitude', 'empresa'] + [coluna for coluna in PROPRIEDADES_PONTOS
+                                                     if coluna in df and coluna != 'empresa']
+    df = df[colunas].reset_index(drop=True)
+    # Textos vazios em vez de 'None'/'nan' nos popups
+    for coluna in colunas[2:]:
+        df[coluna] = df[coluna].astype(object).where(df[coluna].notna(), '')
+    x, y = projetar(df['latitude'], df['longitude'])
+
+    zooms = list(range(zoom_minimo, zoom_maximo + 1))
+    workers = min(workers or os.cpu_count() or 1, len(zooms))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            resultados = list(pool.map(gerar_zoom, *zip(*[(df, x, y, zoom, diretorio, zoom_pontos)
+                                                           for zoom in zooms])))
+    else:
+        resultados = [gerar_zoom(df, x, y, zoom, diretorio, zoom_pontos) for zoom in zooms]
+
+    gravados = {relativo: versao for resultado in resultados
+                for relativo, versao in resultado['tiles'].items()}
+    removidos = _remover_antigos(diretorio, gravados)
+
+    # Versão da pirâmide: muda se qualquer tile mudar
+    versao = hashlib.sha256(json.dumps(sorted(gravados.items())).encode()).hexdigest()[:10]
+    contagem = df['empresa'].value_counts()
+    descricao = {
+        'titulo': titulo,
+        'versao': versao,
+        'zoomMinimo': zoom_minimo,
+        'zoomMaximo': zoom_maximo,
+        'zoomPontos': zoom_pontos,
+        'zoom': max(min(12, zoom_maximo), zoom_minimo),
+        'centro': [float(df['latitude'].mean()), float(df['longitude'].mean())],
+        'limites': [float(df['longitude'].min()), float(df['latitude'].min()),
+                    float(df['longitude'].max()), float(df['latitude'].max())],
+        'faixas': {str(resultado['zoom']): resultado['faixa'] for resultado in resultados},
+        # Versão de cada tile ("z/x/y"): só o que mudou é baixado de novo
+        'versoes': {relativo[:-len('.json')]: versao_tile
+                    for relativo, versao_tile in sorted(gravados.items())},
+        'empresas': [{'empresa': empresa, 'cor': cores.get(empresa, '#000000'),
+                      'total': int(contagem[empresa])}
+                     for empresa in pd.unique(df['empresa'])],
+        'total': len(df),
+        'tiles': TILES_PACOTE,
+        'popup': popup_template,
+        'tooltip': tooltip_template,
+    }
+    escrever_se_mudou(diretorio / ARQUIVO_DESCRICAO,
+                      json.dumps(descricao, ensure_ascii=False, indent=2))
+    _escrever_visualizador(diretorio, descricao, titulo)
+
+    return {**descricao, 'arquivos': len(gravados), 'removidos': removidos}
@@ -0,0 +1,150 @@
+"""
+Buffer compacto de pontos, coluna a coluna, para os extratores.
+
+Uma lista de dicionários guarda, para cada ponto, um dict com as mesmas
+chaves, floats e ints como objetos Python e uma string de empresa/código
+por linha; o DataFrame montado a partir dela ainda passa por colunas object.
+Aqui cada coluna numérica é um array.array (8 bytes por valor, sem objeto
+por ponto), empresa e código são guardados como índices de categorias
+internadas (cada texto distinto é guardado uma vez) e a conversão para
+DataFrame reaproveita esses buffers sem copiar.
+"""
+
+from array import array
+
+import numpy as np
+import pandas as pd
+
+# ============================================================================
+# CATEGORIAS
+# ============================================================================
+
+class _Categorias:
+    """
+    Textos internados: cada valor distinto recebe um índice estável.
+    """
+
+    __slots__ = ('valores', 'indices', 'codigos')
+
+    def __init__(self):
+        self.valores = []          # índice -> texto
+        self.indices = {}          # texto -> índice
+        self.codigos = array('i')  # índice de cada linha
+
+    def adicionar(self, valor):
+        indice = self.indices.get(valor)
+        if indice is None:
+            indice = self.indices[valor] = len(self.valores)
+            self.valores.append(valor)
+        self.codigos.append(indice)
+
+    def __getitem__(self, linha):
+        return self.valores[self.codigos[linha]]
+
+    def para_categorical(self):
+        codigos = np.frombuffer(self.codigos, dtype=np.int32) if self.codigos else np.empty(0, np.int32)
+        return pd.Categorical.from_codes(codigos, categories=pd.Index(self.valores))
+
+# ============================================================================
+# BUFFER
+# ============================================================================
+
+class BufferPontos:
+    """
+    Acumula pontos extraídos em colunas compactas.
+
+    Uso:
+        pontos = BufferPontos(com_secao=True)
+        pontos.adicionar(empresa, codigo, endereco, lat, lon, pagina, secao)
+        df = pontos.para_dataframe()
+
+    Parâmetros:
+    -----------
+    com_secao : bool
+        Se True, o DataFrame tem a coluna 'secao' (extratores por seção)
+    """
+
+    __slots__ = ('empresas', 'codigos', 'enderecos', 'latitudes', 'longitudes',
+                 'paginas', 'secoes', 'com_secao', 'convertido')
+
+    def __init__(self, com_secao=False):
+        self.empresas = _Categorias()
+        self.codigos = _Categorias()
+        self.enderecos = []
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self.paginas = array('q')
+        self.secoes = array('q')
+        self.com_secao = com_secao
+        self.convertido = False     # para_dataframe() já foi chamado
+
+    def adicionar(self, empresa, codigo, endereco, latitude, longitude, pagina, secao=0):
+        """
+        Acrescenta um ponto ao final do buffer.
+
+        Depois de para_dataframe() o buffer fica fechado: os arrays estão
+        exportados para o DataFrame e não podem crescer (o array.array
+        levantaria BufferError).
+        """
+        if self.convertido:
+            raise RuntimeError("BufferPontos já convertido em DataFrame (as colunas "
+                               "numéricas são vistas dos arrays); crie outro buffer")
+        self.empresas.adicionar(empresa)
+        self.codigos.adicionar(codigo)
+        self.enderecos.append(endereco)
+        self.latitudes.append(latitude)
+        self.longitudes.append(longitude)
+        self.paginas.append(pagina)
+        if self.com_secao:
+            self.secoes.append(secao)
+
+    def ponto(self, linha):
+        """
+        Um ponto como dicionário (para mensagens e depuração).
+        """
+        ponto = {
+            'empresa': self.empresas[linha],
+            'codigo': self.codigos[linha],
+            'endereco': self.enderecos[linha],
+            'latitude': self.latitudes[linha],
+            'longitude': self.longitudes[linha],
+            'pagina': self.paginas[linha],
+        }
+        if self.com_secao:
+            ponto['secao'] = self.secoes[linha]
+        return ponto
+
+    def __len__(self):
+        return len(self.latitudes)
+
+    def para_dataframe(self):
+        """
+        Converte para DataFrame sem copiar as colunas numéricas.
+
+        As colunas numéricas do DataFrame são vistas dos arrays do buffer:
+        depois da conversão adicionar() levanta RuntimeError.
+
+        Retorna:
+        --------
+        pd.DataFrame
+            Colunas empresa, codigo, endereco, latitude, longitude, pagina e
+            (com com_secao=True) secao; 'empresa' e 'codigo' categóricas
+        """
+        colunas = {
+            'empresa': self.empresas.para_categorical(),
+            'codigo': self.codigos.para_categorical(),
+            'endereco': self.enderecos,
+            'latitude': _visao(self.latitudes, np.float64),
+            'longitude': _visao(self.longitudes, np.float64),
+            'pagina': _visao(self.paginas, np.int64),
+        }
+        if self.com_secao:
+            colunas['secao'] = _visao(self.secoes, np.int64)
+
+        self.convertido = True
+        return pd.DataFrame(colunas, copy=False)
+
+def _visao(valores, dtype):
+    if not valores:
+        return np.empty(0, dtype=dtype)
+    return np.frombuffer(valores, dtype=dtype)
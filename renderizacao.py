@@ -0,0 +1,275 @@
+"""
+Renderização dos pontos no mapa Folium.
+
+Modos disponíveis:
+- 'marcadores': um folium.CircleMarker + folium.Popup por ponto (modo
+  original - cada ponto vira um bloco de JavaScript no HTML)
+- 'geojson': todos os pontos de uma empresa numa única FeatureCollection
+  GeoJSON compacta, com um estilo compartilhado e popups/tooltips montados
+  no navegador a partir das propriedades de cada ponto
+- 'canvas': a mesma camada GeoJSON, mas o mapa é criado com
+  prefer_canvas=True - os círculos são pintados num <canvas> em vez de
+  virarem milhares de elementos SVG
+- 'cluster': pontos agrupados em clusters (Leaflet.markercluster) por
+  empresa, criados no navegador a partir de uma lista compacta de linhas
+- 'pacote': não usa o Folium - cascas HTML mínimas que referenciam código e
+  dados compartilhados entre os mapas (ver pacote_mapas.py)
+
+Os modos de camada ('geojson', 'canvas', 'cluster') usam os mesmos templates
+de popup/tooltip (ver adicionar_pontos). No modo 'marcadores' os textos dos
+popups/tooltips são montados de uma vez, coluna a coluna (montar_textos),
+em vez de um f-string por linha do iterrows().
+"""
+
+import json
+from string import Formatter
+
+import folium
+import numpy as np
+import pandas as pd
+from folium import plugins
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+MODOS_RENDERIZACAO = ('marcadores', 'geojson', 'canvas', 'cluster', 'pacote')
+
+# Casas decimais das coordenadas no GeoJSON (os PDFs trazem 5)
+CASAS_DECIMAIS = 5
+
+# A partir deste zoom os clusters se desfazem em pontos individuais
+ZOOM_SEM_CLUSTER = 17
+
+# Substituições de html.escape(texto, quote=True), na mesma ordem
+ESCAPES_HTML = (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;'), ("'", '&#x27;'))
+
+# ============================================================================
+# TEXTOS (POPUPS / TOOLTIPS)
+# ============================================================================
+
+def escapar_html(valores):
+    """
+    Escapa uma coluna inteira para HTML (equivale a html.escape em cada valor).
+
+    Retorna:
+    --------
+    pd.Series
+        Textos escapados (dtype object)
+    """
+    textos = pd.Series(valores, copy=False).astype(str)
+    for caractere, entidade in ESCAPES_HTML:
+        textos = textos.str.replace(caractere, entidade, regex=False)
+    return textos.astype(object)
+
+def _coluna_texto(valores, formato):
+    valores = np.asarray(valores)
+    if valores.dtype.kind in 'iuf':
+        if formato:
+            return np.char.mod(f'%{formato}', valores).astype(object)
+        return valores.astype(str).astype(object)
+    return escapar_html(valores).to_numpy()
+
+def montar_textos(template, df, **constantes):
+    """
+    Preenche um template para todas as linhas do DataFrame de uma vez.
+
+    O template usa a sintaxe de str.format: cada campo é uma coluna do df
+    (ex: {codigo}, {latitude:.5f}) ou um dos valores passados em
+    constantes (ex: {cor}). Textos das colunas são escapados para HTML;
+    números aceitam o formato printf equivalente (.5f, d, ...).
+
+    Retorna:
+    --------
+    np.ndarray
+        Um texto por linha (dtype object)
+    """
+    textos = np.full(len(df), '', dtype=object)
+    for literal, campo, formato, _ in Formatter().parse(template):
+        if literal:
+            textos += literal
+        if campo is None:
+            continue
+        if campo in constantes:
+            textos += format(constantes[campo], formato or '')
+        else:
+            textos += _coluna_texto(df[campo].to_numpy(), formato)
+    return textos
+
+# ============================================================================
+# GEOJSON
+# ============================================================================
+
+def _colunas_pontos(df, propriedades):
+    latitudes = df['latitude'].round(CASAS_DECIMAIS).tolist()
+    longitudes = df['longitude'].round(CASAS_DECIMAIS).tolist()
+    colunas = [
+        df[coluna].tolist() if df[coluna].dtype.kind in 'iuf'
+        else escapar_html(df[coluna].to_numpy()).tolist()
+        for coluna in propriedades
+    ]
+    return latitudes, longitudes, colunas
+
+def montar_feature_collection(df, propriedades):
+    """
+    Monta uma FeatureCollection com um Point por linha do DataFrame.
+
+    Parâmetros:
+    -----------
+    df : pd.DataFrame
+        Pontos com 'latitude' e 'longitude'
+    propriedades : list
+        Colunas copiadas para as propriedades de cada ponto. Textos são
+        escapados para HTML, já que vão direto para o popup
+
+    Retorna:
+    --------
+    dict
+        FeatureCollection GeoJSON
+    """
+    latitudes, longitudes, colunas = _colunas_pontos(df, propriedades)
+
+    features = [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+            'properties': dict(zip(propriedades, valores)),
+        }
+        for lat, lon, *valores in zip(latitudes, longitudes, *colunas)
+    ]
+
+    return {'type': 'FeatureCollection', 'features': features}
+
+def adicionar_camada_geojson(destino, df, cor, propriedades, popup_template, tooltip_template,
+                             raio=8, opacidade=0.8, peso=2, max_width=300):
+    """
+    Adiciona os pontos como uma única camada GeoJSON.
+
+    Os templates são corpos de template literals JavaScript: podem usar
+    ${p.<propriedade>} e as variáveis lat/lon (números) de cada ponto.
+
+    Parâmetros:
+    -----------
+    destino : folium.Map ou folium.FeatureGroup
+        Onde a camada será adicionada
+    df : pd.DataFrame
+        Pontos a desenhar
+    cor : str
+        Cor de preenchimento dos círculos
+    propriedades : list
+        Colunas levadas para o navegador (usadas pelos templates)
+    popup_template, tooltip_template : str
+        HTML do popup e texto do tooltip
+    raio, opacidade, peso :
+        Estilo dos círculos (igual ao folium.CircleMarker)
+
+    Retorna:
+    --------
+    folium.GeoJson
+    """
+    # Estilo único para todos os pontos da camada
+    marcador = folium.CircleMarker(
+        radius=raio,
+        color='white',
+        fill=True,
+        fill_color=cor,
+        fill_opacity=opacidade,
+        weight=peso,
+    )
+
+    # Popup e tooltip montados no navegador, uma função para a camada toda
+    por_ponto = folium.JsCode(f"""
+        function(feature, layer) {{
+            var p = feature.properties;
+            var lon = feature.geometry.coordinates[0];
+            var lat = feature.geometry.coordinates[1];
+            layer.bindPopup(`{popup_template}`, {{maxWidth: {max_width}}});
+            layer.bindTooltip(`{tooltip_template}`);
+        }}
+    """)
+
+    camada = folium.GeoJson(
+        montar_feature_collection(df, propriedades),
+        marker=marcador,
+        on_each_feature=por_ponto,
+        control=False,
+    )
+    camada.add_to(destino)
+    return camada
+
+# ============================================================================
+# CLUSTERS
+# ============================================================================
+
+def _icone_cluster(cor):
+    # Cluster com a cor da empresa (o padrão do plugin é verde/amarelo/laranja)
+    return f"""
+        function(cluster) {{
+            return L.divIcon({{
+                html: '<div style="background-color: {cor}; color: white;">'
+                      + '<span>' + cluster.getChildCount() + '</span></div>',
+                className: 'marker-cluster',
+                iconSize: new L.Point(40, 40)
+            }});
+        }}
+    """
+
+def adicionar_camada_cluster(destino, df, cor, propriedades, popup_template, tooltip_template,
+                             raio=8, opacidade=0.8, peso=2, max_width=300):
+    """
+    Adiciona os pontos como um cluster (FastMarkerCluster) da empresa.
+
+    Cada ponto vai para o HTML como uma linha [lat, lon, propriedades...] e
+    o círculo é criado no navegador. Mesmos parâmetros e templates de
+    adicionar_camada_geojson.
+
+    Retorna:
+    --------
+    folium.plugins.FastMarkerCluster
+    """
+    latitudes, longitudes, colunas = _colunas_pontos(df, propriedades)
+    linhas = [list(linha) for linha in zip(latitudes, longitudes, *colunas)]
+
+    criar_ponto = f"""
+        function(row) {{
+            var lat = row[0];
+            var lon = row[1];
+            var p = {{}};
+            {json.dumps(list(propriedades))}.forEach(function(nome, i) {{ p[nome] = row[i + 2]; }});
+            var marker = L.circleMarker(new L.LatLng(lat, lon), {{
+                radius: {raio}, color: 'white', fill: true, fillColor: '{cor}',
+                fillOpacity: {opacidade}, weight: {peso}
+            }});
+            marker.bindPopup(`{popup_template}`, {{maxWidth: {max_width}}});
+            marker.bindTooltip(`{tooltip_template}`);
+            return marker;
+        }}
+    """
+
+    camada = plugins.FastMarkerCluster(
+        linhas,
+        callback=criar_ponto,
+        control=False,
+        icon_create_function=_icone_cluster(cor),
+        disableClusteringAtZoom=ZOOM_SEM_CLUSTER,
+        chunkedLoading=True,
+    )
+    camada.add_to(destino)
+    return camada
+
+# ============================================================================
+# SELEÇÃO DO MODO
+# ============================================================================
+
+def adicionar_pontos(destino, df, cor, modo, **kwargs):
+    """
+    Adiciona os pontos no modo de camada escolhido ('geojson', 'canvas' ou
+    'cluster'). kwargs são os de adicionar_camada_geojson.
+
+    No modo 'canvas' o mapa deve ter sido criado com prefer_canvas=True.
+    """
+    if modo == 'cluster':
+        return adicionar_camada_cluster(destino, df, cor, **kwargs)
+    if modo in ('geojson', 'canvas'):
+        return adicionar_camada_geojson(destino, df, cor, **kwargs)
+    raise ValueError(f"Modo de renderização inválido: {modo!r} (use {MODOS_RENDERIZACAO})")
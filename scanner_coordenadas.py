@@ -0,0 +1,128 @@
+"""
+Scanner de coordenadas compartilhado pelos extratores.
+
+Os padrões são compilados uma única vez no carregamento do módulo e cada
+linha/página é percorrida em UMA passada: o padrão de coordenadas aceita
+vírgula ou ponto como separador decimal, e o código do ponto é procurado
+no máximo uma vez por linha.
+
+O antigo segundo padrão (só com ponto) achava pares que o primeiro
+engolia: em "1,5 -9.53 -35.78" o primeiro casa "1,5 -9.53", que cai fora
+dos limites. Por isso um par fora dos limites não consome o segundo
+número - a busca recomeça nele.
+"""
+
+import re
+
+# ============================================================================
+# PADRÕES PRÉ-COMPILADOS
+# ============================================================================
+
+# -9,53802 -35,78683 ou -9.53802 -35.78683
+PADRAO_COORDENADAS = re.compile(r'(-?\d{1,2}[,.]\d+)\s+(-?\d{1,2}[,.]\d+)')
+
+# Códigos de ponto (ex: PN987, PP52)
+PADRAO_CODIGO = re.compile(r'[A-Z]{2,}\d+')
+
+# Limites geográficos de Maceió (validação)
+LIMITES_MACEIO = {
+    'lat_min': -9.8,
+    'lat_max': -9.4,
+    'lon_min': -35.9,
+    'lon_max': -35.6
+}
+
+# ============================================================================
+# VARREDURA
+# ============================================================================
+
+def iterar_coordenadas(texto, limites=LIMITES_MACEIO, contagem=None):
+    """
+    Percorre o texto uma única vez e gera as coordenadas dentro dos limites.
+
+    Parâmetros:
+    -----------
+    texto : str
+        Texto de uma linha, página ou seção
+    limites : dict
+        Limites geográficos aceitos (lat_min, lat_max, lon_min, lon_max)
+    contagem : dict, opcional
+        Soma em contagem['correspondencias'] os pares casados pelo regex,
+        antes do filtro de limites (ex: o registro de instrumentacao.etapa)
+
+    Retorna:
+    --------
+    generator
+        Tuplas (lat, lon, match), onde match é o re.Match da coordenada
+        (dá acesso aos textos originais e à posição no texto)
+    """
+    lat_min, lat_max = limites['lat_min'], limites['lat_max']
+    lon_min, lon_max = limites['lon_min'], limites['lon_max']
+
+    posicao = 0
+    correspondencias = 0
+    while True:
+        match = PADRAO_COORDENADAS.search(texto, posicao)
+        if match is None:
+            break
+        correspondencias += 1
+        lat_str, lon_str = match.groups()
+        lat = float(lat_str.replace(',', '.'))
+        lon = float(lon_str.replace(',', '.'))
+
+        if lat_min < lat < lat_max and lon_min < lon < lon_max:
+            posicao = match.end()
+            yield lat, lon, match
+        else:
+            # O segundo número pode ser a latitude do par verdadeiro
+            posicao = match.start(2)
+
+    if contagem is not None:
+        contagem['correspondencias'] = contagem.get('correspondencias', 0) + correspondencias
+
+def varrer_linhas(linhas, limites=LIMITES_MACEIO, codigo_padrao="DESCONHECIDO", contagem=None):
+    """
+    Varre as linhas de uma página e gera cada coordenada uma única vez.
+
+    O código do ponto é o primeiro código da própria linha ou, se não
+    houver, o da linha anterior. A busca é feita só para linhas que têm
+    coordenadas, e no máximo uma vez por linha.
+
+    Parâmetros:
+    -----------
+    linhas : iterable
+        Linhas de texto (ex: texto.split('\\n'))
+    limites : dict
+        Limites geográficos aceitos
+    codigo_padrao : str
+        Código usado quando nenhum código é encontrado
+    contagem : dict, opcional
+        Como em iterar_coordenadas
+
+    Retorna:
+    --------
+    generator
+        Tuplas (lat, lon, codigo, contexto), onde contexto é a linha
+    """
+    linha_anterior = None
+
+    for linha in linhas:
+        linha = linha.strip()
+        codigo = None
+
+        for lat, lon, _ in iterar_coordenadas(linha, limites, contagem):
+            if codigo is None:
+                encontrado = PADRAO_CODIGO.search(linha)
+                if not encontrado and linha_anterior is not None:
+                    encontrado = PADRAO_CODIGO.search(linha_anterior)
+                codigo = encontrado.group(0) if encontrado else codigo_padrao
+
+            yield lat, lon, codigo, linha
+
+        linha_anterior = linha
+
+def varrer_pagina(texto, limites=LIMITES_MACEIO, codigo_padrao="DESCONHECIDO", contagem=None):
+    """
+    Atalho para varrer o texto completo de uma página.
+    """
+    return varrer_linhas(texto.split('\n'), limites, codigo_padrao, contagem)
@@ -0,0 +1,393 @@
+"""
+Servidor local dos dados do mapa: o navegador só recebe o que está na tela.
+
+Os mapas HTML gerados por main.py trazem todas as paradas dentro do arquivo.
+Aqui a página (/) é só o mapa, e a cada movimento pede as paradas da área
+visível:
+
+    GET /stops?bbox=LON_MIN,LAT_MIN,LON_MAX,LAT_MAX&zoom=Z&empresa=Real
+
+- As paradas vêm do histórico (historico_paradas.py), pela R-tree: o estado
+  atual de cada empresa, sem carregar o banco inteiro. Novas extrações
+  gravadas por main.py aparecem na próxima requisição.
+- A caixa pedida é ampliada até a grade de tiles do zoom: pequenos
+  deslocamentos do mapa caem na mesma caixa e reaproveitam a resposta.
+- Abaixo de ZOOM_PONTOS (ou com mais de MAXIMO_PONTOS na caixa) a resposta
+  traz células agregadas por empresa, com a quantidade de paradas de cada
+  uma, em vez dos pontos.
+- Cada resposta tem um ETag derivado das execuções vigentes e da consulta:
+  o navegador revalida (304, sem corpo) e o servidor guarda as últimas
+  TAMANHO_CACHE respostas prontas, já comprimidas com gzip.
+
+A resposta é uma FeatureCollection GeoJSON com 'agregado', 'total' (paradas
+na caixa) e 'bbox' (a caixa usada). Outras rotas: /empresas (empresas e
+cores) e /assets/<arquivo> (código da página, em assets_mapas).
+
+Uso:
+    python servidor_mapas.py                       # http://127.0.0.1:8000
+    python servidor_mapas.py --porta 8080 --conjunto ativos
+"""
+
+import gzip
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from estilo_mapas import CORES_EMPRESAS, MACEIO_CENTRO, POPUP_MAPA_EMPRESA, TOOLTIP_MAPA_EMPRESA
+from historico_paradas import HistoricoParadas, ARQUIVO_HISTORICO, CONJUNTO_TODOS, CONJUNTO_ATIVOS
+from instrumentacao import configurar, log
+from pacote_mapas import DIRETORIO_ASSETS, LEAFLET_CSS, LEAFLET_JS, TILES_PACOTE
+from renderizacao import montar_feature_collection
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+PORTA_PADRAO = 8000
+
+# Zoom a partir do qual a resposta traz os pontos (abaixo: células)
+ZOOM_PONTOS = 14
+ZOOM_MAXIMO = 19
+
+# Células por lado de tile na agregação (tile de 256 px -> células de 64 px)
+CELULAS_POR_TILE = 4
+
+# Acima disso a caixa é agregada mesmo com zoom alto
+MAXIMO_PONTOS = 5000
+
+# Respostas prontas guardadas em memória
+TAMANHO_CACHE = 256
+
+# Compressão por requisição: rápida, não máxima (ver compressao.py)
+NIVEL_GZIP = 6
+
+# Propriedades de cada ponto e de cada célula na resposta
+PROPRIEDADES_PONTOS = ['empresa', 'codigo', 'endereco']
+PROPRIEDADES_CELULAS = ['empresa', 'quantidade']
+
+# Arquivos de assets_mapas servidos em /assets/
+ASSETS = {'mapas.js': 'application/javascript', 'mapas.css': 'text/css',
+          'visor.js': 'application/javascript'}
+
+# ============================================================================
+# CAIXAS E AGREGAÇÃO
+# ============================================================================
+
+def ler_caixa(texto):
+    """
+    'LON_MIN,LAT_MIN,LON_MAX,LAT_MAX' -> (lat_min, lon_min, lat_max, lon_max).
+    """
+    try:
+        lon_min, lat_min, lon_max, lat_max = (float(valor) for valor in texto.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError("bbox deve ser LON_MIN,LAT_MIN,LON_MAX,LAT_MAX") from None
+    if not all(math.isfinite(valor) for valor in (lon_min, lat_min, lon_max, lat_max)):
+        raise ValueError("bbox com valores inválidos")
+    if lat_min > lat_max or lon_min > lon_max:
+        raise ValueError("bbox com mínimo maior que máximo")
+    return lat_min, lon_min, lat_max, lon_max
+
+def passo_tile(zoom):
+    """
+    Largura em graus de um tile no zoom.
+    """
+    return 360.0 / 2 ** zoom
+
+def ajustar_caixa(caixa, zoom):
+    """
+    Amplia a caixa até a grade de tiles do zoom (no máximo um tile por lado).
+
+    Retorna:
+    --------
+    tuple
+        (lat_min, lon_min, lat_max, lon_max) alinhada à grade
+    """
+    passo = passo_tile(zoom)
+    lat_min, lon_min, lat_max, lon_max = caixa
+    return (max(math.floor(lat_min / passo) * passo, -90.0),
+            max(math.floor(lon_min / passo) * passo, -180.0),
+            min(math.ceil(lat_max / passo) * passo, 90.0),
+            min(math.ceil(lon_max / passo) * passo, 180.0))
+
+def agregar_celulas(df, passo):
+    """
+    Agrupa as paradas em células quadradas de `passo` graus, por empresa.
+
+    Retorna:
+    --------
+    pd.DataFrame
+        Uma linha por (empresa, célula): empresa, latitude e longitude
+        (média das paradas da célula) e quantidade
+    """
+    if df.empty:
+        return pd.DataFrame({'empresa': [], 'latitude': [], 'longitude': [], 'quantidade': []})
+
+    latitudes = df['latitude'].to_numpy(dtype=np.float64)
+    longitudes = df['longitude'].to_numpy(dtype=np.float64)
+    empresas, codigos = np.unique(df['empresa'].to_numpy(dtype=str), return_inverse=True)
+    chaves = np.column_stack((codigos.ravel(),
+                              np.floor(latitudes / passo).astype(np.int64),
+                              np.floor(longitudes / passo).astype(np.int64)))
+    celulas, grupos, quantidades = np.unique(chaves, axis=0, return_inverse=True,
+                                             return_counts=True)
+    grupos = grupos.ravel()
+
+    return pd.DataFrame({
+        'empresa': empresas[celulas[:, 0]],
+        'latitude': np.bincount(grupos, weights=latitudes) / quantidades,
+        'longitude': np.bincount(grupos, weights=longitudes) / quantidades,
+        'quantidade': quantidades,
+    })
+
+# ============================================================================
+# DADOS
+# ============================================================================
+
+class DadosMapa:
+    """
+    Respostas de /stops e /empresas a partir do histórico, com cache.
+
+    Parâmetros:
+    -----------
+    caminho : str ou Path
+        Banco do histórico (ARQUIVO_HISTORICO)
+    conjunto : str
+        CONJUNTO_TODOS (main.py) ou CONJUNTO_ATIVOS (main(1).py)
+    """
+
+    def __init__(self, caminho=ARQUIVO_HISTORICO, conjunto=CONJUNTO_TODOS,
+                 tamanho_cache=TAMANHO_CACHE):
+        self.historico = HistoricoParadas(caminho, entre_threads=True)
+        self.conjunto = conjunto
+        self.tamanho_cache = tamanho_cache
+        self._cache = OrderedDict()
+        # Uma conexão para todas as threads do servidor: as consultas são
+        # de milissegundos e as respostas em cache nem chegam ao banco
+        self._trava = threading.Lock()
+
+    def fechar(self):
+        self.historico.fechar()
+
+    def _vigentes(self, empresa=None):
+        with self._trava:
+            return tuple(self.historico.execucoes_vigentes(self.conjunto, empresa=empresa))
+
+    def empresas(self):
+        """
+        Empresas com extração no conjunto e as cores de cada uma.
+        """
+        vigentes = self._vigentes()
+        with self._trava:
+            execucoes = self.historico.execucoes(conjunto=self.conjunto)
+        empresas = sorted(execucoes.loc[execucoes['id'].isin(vigentes), 'empresa'])
+        return [{'empresa': empresa, 'cor': CORES_EMPRESAS.get(empresa, '#000000')}
+                for empresa in empresas]
+
+    def paradas(self, caixa, zoom, empresa=None):
+        """
+        Resposta de /stops para a caixa e o zoom.
+
+        Retorna:
+        --------
+        tuple
+            (etag, corpo JSON em bytes, corpo com gzip)
+        """
+        zoom = min(max(int(zoom), 0), ZOOM_MAXIMO)
+        caixa = ajustar_caixa(caixa, zoom)
+        vigentes = self._vigentes(empresa)
+
+        # As execuções vigentes entram na chave: uma extração nova muda o ETag
+        chave = (vigentes, caixa, zoom, empresa)
+        etag = '"' + hashlib.sha256(repr((self.conjunto, chave)).encode()).hexdigest()[:20] + '"'
+
+        with self._trava:
+            if chave in self._cache:
+                self._cache.move_to_end(chave)
+                return self._cache[chave]
+
+        with self._trava:
+            df = self.historico.na_caixa(*caixa, empresa=empresa, execucoes=list(vigentes))
+
+        agregado = zoom < ZOOM_PONTOS or len(df) > MAXIMO_PONTOS
+        if agregado:
+            colecao = montar_feature_collection(
+                agregar_celulas(df, passo_tile(zoom) / CELULAS_POR_TILE), PROPRIEDADES_CELULAS)
+        else:
+            colecao = montar_feature_collection(df.fillna({'codigo': '', 'endereco': ''}),
+                                                PROPRIEDADES_PONTOS)
+        colecao.update(agregado=agregado, total=len(df),
+                       bbox=[caixa[1], caixa[0], caixa[3], caixa[2]])
+
+        corpo = json.dumps(colecao, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        resposta = (etag, corpo, gzip.compress(corpo, compresslevel=NIVEL_GZIP, mtime=0))
+
+        with self._trava:
+            self._cache[chave] = resposta
+            while len(self._cache) > self.tamanho_cache:
+                self._cache.popitem(last=False)
+        return resposta
+
+# ============================================================================
+# PÁGINA
+# ============================================================================
+
+def montar_pagina(empresas, titulo="Pontos de Ônibus - Maceió/AL"):
+    """
+    HTML da página do mapa (o código fica em assets_mapas/visor.js).
+    """
+    configuracao = {
+        'titulo': titulo,
+        'centro': MACEIO_CENTRO,
+        'zoom': ZOOM_PONTOS - 1,
+        'zoomPontos': ZOOM_PONTOS,
+        'tiles': TILES_PACOTE,
+        'empresas': empresas,
+        'popup': POPUP_MAPA_EMPRESA,
+        'tooltip': TOOLTIP_MAPA_EMPRESA,
+    }
+    # "</" escapado para o JSON não fechar o <script>
+    configuracao_js = json.dumps(configuracao, ensure_ascii=False).replace('</', '<\\/')
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{titulo}</title>
+    <link rel="stylesheet" href="{LEAFLET_CSS}">
+    <link rel="stylesheet" href="/assets/mapas.css">
+    <script src="{LEAFLET_JS}"></script>
+    <script src="/assets/mapas.js"></script>
+    <script src="/assets/visor.js"></script>
+</head>
+<body>
+    <div id="mapa"></div>
+    <script>
+        VisorDMTT.criar('mapa', {configuracao_js});
+    </script>
+</body>
+</html>
+"""
+
+# ============================================================================
+# SERVIDOR
+# ============================================================================
+
+class ManipuladorMapa(BaseHTTPRequestHandler):
+    """
+    Rotas: /, /stops, /empresas e /assets/<arquivo>.
+    """
+
+    dados = None  # DadosMapa, definido em criar_servidor
+
+    def log_message(self, formato, *argumentos):
+        log.debug("%s - %s", self.address_string(), formato % argumentos)
+
+    def _enviar(self, status, corpo, tipo, etag=None, comprimido=None, cache='no-cache'):
+        if comprimido is not None and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            corpo, codificacao = comprimido, 'gzip'
+        else:
+            codificacao = None
+
+        self.send_response(status)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.send_header('Cache-Control', cache)
+        if etag is not None:
+            self.send_header('ETag', etag)
+        if comprimido is not None:
+            self.send_header('Vary', 'Accept-Encoding')
+        if codificacao is not None:
+            self.send_header('Content-Encoding', codificacao)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _enviar_json(self, status, conteudo):
+        corpo = json.dumps(conteudo, ensure_ascii=False).encode('utf-8')
+        self._enviar(status, corpo, 'application/json; charset=utf-8')
+
+    def _nao_modificado(self, etag):
+        if etag not in self.headers.get('If-None-Match', ''):
+            return False
+        self.send_response(HTTPStatus.NOT_MODIFIED)
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        return True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parametros = {nome: valores[-1] for nome, valores in parse_qs(url.query).items()}
+
+        if url.path == '/stops':
+            try:
+                caixa = ler_caixa(parametros.get('bbox'))
+                zoom = int(parametros.get('zoom', ZOOM_PONTOS))
+            except ValueError as erro:
+                self._enviar_json(HTTPStatus.BAD_REQUEST, {'erro': str(erro)})
+                return
+            etag, corpo, comprimido = self.dados.paradas(caixa, zoom, parametros.get('empresa') or None)
+            if not self._nao_modificado(etag):
+                self._enviar(HTTPStatus.OK, corpo, 'application/geo+json; charset=utf-8',
+                             etag=etag, comprimido=comprimido)
+        elif url.path == '/empresas':
+            self._enviar_json(HTTPStatus.OK, self.dados.empresas())
+        elif url.path in ('/', '/index.html'):
+            corpo = montar_pagina(self.dados.empresas()).encode('utf-8')
+            self._enviar(HTTPStatus.OK, corpo, 'text/html; charset=utf-8')
+        elif url.path.startswith('/assets/') and url.path[len('/assets/'):] in ASSETS:
+            nome = url.path[len('/assets/'):]
+            corpo = (DIRETORIO_ASSETS / nome).read_bytes()
+            etag = '"' + hashlib.sha256(corpo).hexdigest()[:20] + '"'
+            if not self._nao_modificado(etag):
+                self._enviar(HTTPStatus.OK, corpo, f'{ASSETS[nome]}; charset=utf-8', etag=etag,
+                             comprimido=gzip.compress(corpo, compresslevel=NIVEL_GZIP, mtime=0))
+        else:
+            self._enviar_json(HTTPStatus.NOT_FOUND, {'erro': f"rota desconhecida: {url.path}"})
+
+def criar_servidor(dados, host='127.0.0.1', porta=PORTA_PADRAO):
+    """
+    Servidor HTTP (uma thread por requisição) sobre um DadosMapa.
+    """
+    manipulador = type('Manipulador', (ManipuladorMapa,), {'dados': dados})
+    return ThreadingHTTPServer((host, porta), manipulador)
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Servidor local do mapa de paradas - Maceió/AL")
+    parser.add_argument('--banco', default=ARQUIVO_HISTORICO,
+                        help=f"histórico das extrações (padrão: {ARQUIVO_HISTORICO})")
+    parser.add_argument('--conjunto', default=CONJUNTO_TODOS, choices=(CONJUNTO_TODOS, CONJUNTO_ATIVOS))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--verbose', action='store_true', help="mostra cada requisição")
+    args = parser.parse_args()
+
+    if not Path(args.banco).exists():
+        parser.error(f"histórico não encontrado: {args.banco} (rode main.py)")
+
+    configurar(verboso=args.verbose)
+    dados = DadosMapa(args.banco, args.conjunto)
+    servidor = criar_servidor(dados, args.host, args.porta)
+    print(f"🌐 Mapa em http://{args.host}:{args.porta}/ ({args.conjunto}: "
+          f"{', '.join(e['empresa'] for e in dados.empresas()) or 'sem extrações'})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Servidor encerrado")
+    finally:
+        servidor.server_close()
+        dados.fechar()
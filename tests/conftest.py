@@ -0,0 +1,22 @@
+"""
+Configuração dos testes: os módulos do projeto ficam na raiz do repositório.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+@pytest.fixture(scope='session')
+def main_ativos():
+    """
+    O script main(1).py (o nome não é importável com import).
+    """
+    spec = importlib.util.spec_from_file_location('main_ativos', RAIZ / 'main(1).py')
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
@@ -0,0 +1,49 @@
+"""
+Testes da grade de densidade e cobertura (cobertura.py).
+"""
+
+import numpy as np
+import pandas as pd
+
+from cobertura import analisar_cobertura, celulas_dos_pontos, lacunas, montar_grade
+
+LIMITES = {'lat_min': -9.70, 'lat_max': -9.60, 'lon_min': -35.80, 'lon_max': -35.70}
+
+def test_celulas_dos_pontos():
+    grade = montar_grade(LIMITES, 1000)
+    primeira = celulas_dos_pontos([-9.6999], [-35.7999], grade)
+    vizinha_norte = celulas_dos_pontos([-9.6999 + grade['passo_lat']], [-35.7999], grade)
+    assert primeira.tolist() == [0]
+    assert vizinha_norte.tolist() == [grade['colunas']]
+    # Fora da grade
+    assert celulas_dos_pontos([-9.5, -9.65], [-35.75, -36.0], grade).tolist() == [-1, -1]
+
+def test_contagens_por_empresa():
+    df = pd.DataFrame({
+        'empresa': ['Real', 'Real', 'SaoFrancisco', 'Real'],
+        'latitude': [-9.6501, -9.6502, -9.6501, -9.5],     # o último fora da caixa
+        'longitude': [-35.7501, -35.7502, -35.7501, -35.75],
+    })
+    tabela = analisar_cobertura(df, tamanho_celula_metros=500, limites=LIMITES)
+
+    assert tabela['paradas'].sum() == 3
+    assert tabela['paradas_Real'].sum() == 2
+    assert tabela['paradas_SaoFrancisco'].sum() == 1
+    assert tabela['paradas'].max() == 3
+    assert tabela.attrs['empresas'] == ['Real', 'SaoFrancisco']
+
+def test_cobertura_e_lacunas():
+    df = pd.DataFrame({'empresa': ['Real'], 'latitude': [-9.65], 'longitude': [-35.75]})
+    tabela = analisar_cobertura(df, tamanho_celula_metros=500, raio_caminhada_metros=400,
+                                limites=LIMITES)
+
+    cobertas = tabela[tabela['coberta_Real']]
+    assert len(cobertas) > 0
+    assert (cobertas['distancia_parada_m'] <= 400).all()
+    assert ((tabela['empresas_cobrindo'] > 0) == tabela['coberta_Real']).all()
+
+    todas = lacunas(tabela)
+    assert len(todas) == len(tabela) - len(cobertas)
+    assert (np.diff(todas['distancia_parada_m']) <= 0).all()
+    assert (todas['distancia_parada_m'] > 400).all()
+    assert lacunas(tabela, 3).equals(todas.head(3))
@@ -0,0 +1,57 @@
+"""
+Testes do código de cada ponto no motor de regex de main(1).py (índice de
+códigos da seção + busca pela posição da coordenada).
+"""
+
+import pytest
+
+from registros_pontos import BufferPontos
+
+def extrair(main_ativos, linhas):
+    pontos = BufferPontos(com_secao=True)
+    main_ativos.extrair_coordenadas_secao(linhas, 'Real', 1, pontos)
+    return pontos.para_dataframe()
+
+def test_indice_de_codigos(main_ativos):
+    texto = "PN576 Rua A\nPONTO 12 e PP 52"
+    posicoes, codigos = main_ativos.indexar_codigos_secao(texto)
+    assert codigos == ['PN576', 'PONTO12', 'PP52']
+    assert posicoes == sorted(posicoes) and posicoes[0] == 0
+
+def test_codigo_antes_da_coordenada(main_ativos):
+    indice = ([0, 30], ['PN1', 'PN2'])
+    assert main_ativos.extrair_codigo_ponto(indice, 20, 0, -9.6, -35.7) == 'PN1'
+    assert main_ativos.extrair_codigo_ponto(indice, 40, 25, -9.6, -35.7) == 'PN2'
+
+def test_codigo_da_linha_de_cima_nao_vale(main_ativos):
+    # O único código está antes do fim da coordenada anterior
+    indice = ([0], ['PN1'])
+    assert main_ativos.extrair_codigo_ponto(indice, 40, 25, -9.6, -35.7) == 'Ponto_-96000_-357000'
+
+def test_codigo_no_fim_da_coordenada_anterior_vale(main_ativos):
+    # posicoes[i] >= fim_anterior: um código logo após a coordenada anterior
+    indice = ([25], ['PN2'])
+    assert main_ativos.extrair_codigo_ponto(indice, 40, 25, -9.6, -35.7) == 'PN2'
+
+def test_codigo_gerado_sem_indice(main_ativos):
+    codigo = main_ativos.extrair_codigo_ponto(([], []), 10, 0, -9.61234, -35.71234)
+    assert codigo == f"Ponto_{int(-9.61234 * 10000)}_{int(-35.71234 * 10000)}"
+
+@pytest.mark.parametrize('linha', [
+    "PN576 PN576 Rua A, 10 - Centro -9.60000 -35.70000",
+    "PN576 PN576 PN576 Rua A -9.60000 -35.70000",
+])
+def test_codigo_repetido(main_ativos, linha):
+    df = extrair(main_ativos, [(1, linha)])
+    assert df['codigo'].tolist() == ['PN576']
+
+def test_secao_com_varias_linhas(main_ativos):
+    df = extrair(main_ativos, [
+        (1, "PN576 PN576 Rua A, 10 - Centro -9.60000 -35.70000"),
+        (1, "Rua sem código -9.61000 -35.71000"),
+        (2, "PP 52 PP 52 Av. B -9,62000 -35,72000"),
+    ])
+    # A linha sem código não herda o PN576 da linha de cima
+    assert df['codigo'].tolist() == ['PN576', 'Ponto_-96100_-357100', 'PP52']
+    assert df['pagina'].tolist() == [1, 1, 2]
+    assert df['latitude'].tolist() == [-9.6, -9.61, -9.62]
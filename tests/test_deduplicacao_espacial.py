@@ -0,0 +1,57 @@
+"""
+Testes da deduplicação por proximidade (grade + union-find).
+"""
+
+import pandas as pd
+
+from deduplicacao_espacial import METROS_POR_GRAU, agrupar_proximos, deduplicar_espacial
+
+# Deslocamento de ~1 m em latitude
+UM_METRO = 1 / METROS_POR_GRAU
+
+def test_vazio():
+    assert agrupar_proximos([], []).tolist() == []
+
+def test_agrupa_so_dentro_do_raio():
+    latitudes = [-9.6, -9.6 + 3 * UM_METRO, -9.6 + 20 * UM_METRO]
+    longitudes = [-35.7] * 3
+    assert agrupar_proximos(latitudes, longitudes, raio_metros=5).tolist() == [0, 0, 2]
+
+def test_cadeia_vira_um_grupo():
+    # Vizinhos a 4 m um do outro: 0-1-2-3 formam um grupo só (transitivo),
+    # mesmo com 0 e 3 a 12 m de distância
+    latitudes = [-9.6 + i * 4 * UM_METRO for i in (3, 0, 2, 1)]
+    assert agrupar_proximos(latitudes, [-35.7] * 4, raio_metros=5).tolist() == [0, 0, 0, 0]
+
+def test_chaves_separam_grupos():
+    grupos = agrupar_proximos([-9.6, -9.6, -9.6], [-35.7] * 3, raio_metros=5,
+                              chaves=['Real', 'SaoFrancisco', 'Real'])
+    assert grupos.tolist() == [0, 1, 0]
+
+def test_vizinho_em_outra_celula():
+    # Pontos a 1 m de distância, um de cada lado da borda de uma célula
+    raio = 5.0
+    borda = -9.6 - (-9.6 * METROS_POR_GRAU % raio) / METROS_POR_GRAU
+    grupos = agrupar_proximos([borda - 0.5 * UM_METRO, borda + 0.5 * UM_METRO], [-35.7] * 2, raio)
+    assert grupos.tolist() == [0, 0]
+
+def test_deduplicar_mantem_o_melhor_ponto():
+    df = pd.DataFrame({
+        'empresa': ['Real', 'Real', 'Real'],
+        'codigo': ['DESCONHECIDO', 'PN987', 'PP52'],
+        'endereco': ['Av. Fernandes Lima, 100', 'Av. F. Lima', 'Rua B'],
+        'latitude': [-9.6, -9.6 + 2 * UM_METRO, -9.61],
+        'longitude': [-35.7, -35.7, -35.7],
+    }, index=[10, 11, 12])
+    resultado = deduplicar_espacial(df, raio_metros=5)
+
+    assert resultado['codigo'].tolist() == ['PN987', 'PP52']
+    assert resultado.index.tolist() == [11, 12]
+    assert resultado['linhas_mescladas'].tolist() == [[10, 11], [12]]
+
+def test_deduplicar_duas_vezes_junta_origens():
+    df = pd.DataFrame({'empresa': ['Real'] * 3, 'codigo': ['PN1', 'PN2', 'PN3'],
+                       'latitude': [-9.6, -9.6, -9.6 + 8 * UM_METRO], 'longitude': [-35.7] * 3})
+    primeira = deduplicar_espacial(df, raio_metros=5)
+    segunda = deduplicar_espacial(primeira, raio_metros=10)
+    assert segunda['linhas_mescladas'].tolist() == [[0, 1, 2]]
@@ -0,0 +1,107 @@
+"""
+Testes do motor de layout (extracao_layout.py) sobre palavras com a mesma
+geometria das páginas do PDF: cabeçalho, linhas da tabela a ~18 pontos,
+endereço quebrado a ~13 pontos e rodapé da página.
+"""
+
+from extracao_layout import interpretar_paginas
+
+# Início (x0) de cada coluna, como no PDF
+X_NOME, X_ABREV, X_ENDERECO, X_ORDEM, X_VEL, X_LAT, X_LON = 11, 127, 236, 610, 655, 717, 776
+
+def palavras(top, *itens):
+    """Palavras de uma linha: itens (x0, texto), uma palavra por espaço."""
+    resultado = []
+    for x0, texto in itens:
+        for parte in texto.split():
+            resultado.append({'text': parte, 'x0': x0, 'x1': x0 + 5 * len(parte), 'top': top})
+            x0 += 5 * len(parte) + 3
+    return resultado
+
+def secao(top, ativo='Sim', quebrado=False):
+    linhas = palavras(top, (129, 'Atendimento'), (312, 'Principal:'), (384, 'Sim'), (459, 'Linha:'))
+    if quebrado:
+        linhas += palavras(top + 12, (312, 'Ativo:')) + palavras(top + 24, (312, ativo))
+    else:
+        linhas += palavras(top + 12, (312, 'Ativo:'), (384, ativo))
+    return linhas
+
+def cabecalho(top):
+    return palavras(
+        top, (12, 'Nome'), (X_ABREV, 'Nome Abrev.'), (X_ENDERECO, 'Endereço'),
+        (607, 'Ordem'), (651, 'Vel. Limite'), (716, 'Latitude'), (775, 'Longitude'),
+    )
+
+def ponto(top, codigo, endereco, lat='-9,63875', lon='-35,72611'):
+    return palavras(
+        top, (X_NOME, codigo), (X_ABREV, codigo), (X_ENDERECO, endereco),
+        (X_ORDEM, '32'), (X_VEL, '60'), (X_LAT, lat), (X_LON, lon),
+    )
+
+def rodape(top=551):
+    return (palavras(top, (353, 'Cadastro/Operacional/Atendimento 04/12/2025 10:32:03'))
+            + palavras(top + 12, (400, '42 - 208')))
+
+def interpretar(*paginas, apenas_ativos=True):
+    pontos, estatisticas = interpretar_paginas(
+        enumerate(paginas, 1), 'São Francisco', apenas_ativos=apenas_ativos
+    )
+    return pontos.para_dataframe(), estatisticas
+
+def test_tabela_e_coluna_de_codigo():
+    df, estatisticas = interpretar(
+        secao(100) + cabecalho(160)
+        + ponto(178, 'PN30', 'Rua A, 10')
+        + ponto(196, 'Sem código', 'Rua B', lat='-9,64000', lon='-35,73000')
+    )
+    assert df['codigo'].tolist() == ['PN30', f"Ponto_{int(-9.64 * 10000)}_{int(-35.73 * 10000)}"]
+    assert df['endereco'].tolist() == ['Rua A, 10', 'Rua B']
+    assert df['latitude'].tolist() == [-9.63875, -9.64]
+    assert estatisticas['secoes_ativas'] == 1
+
+def test_ativo_com_valor_na_linha_seguinte():
+    df, estatisticas = interpretar(
+        secao(100, 'Sim', quebrado=True) + cabecalho(160) + ponto(178, 'PN30', 'Rua A')
+        + secao(220, 'Não', quebrado=True) + cabecalho(280) + ponto(298, 'PN31', 'Rua B')
+    )
+    assert df['codigo'].tolist() == ['PN30']
+    assert estatisticas['secoes_ativas'] == 1
+
+def test_secao_inativa_entra_sem_filtro():
+    df, _ = interpretar(
+        secao(100, 'Não') + cabecalho(160) + ponto(178, 'PN30', 'Rua A'),
+        apenas_ativos=False,
+    )
+    assert df['codigo'].tolist() == ['PN30']
+
+def test_endereco_em_varias_linhas():
+    df, _ = interpretar(
+        secao(100) + cabecalho(160)
+        + ponto(178, 'PN30', 'Rua A, 10 - Centro, Maceió - AL, República')
+        + palavras(190.8, (X_ENDERECO, 'Federativa do'))
+        + palavras(203.6, (X_ENDERECO, 'Brasil'))
+        + ponto(215.7, 'PN31', 'Rua B')
+    )
+    assert df['endereco'].tolist() == [
+        'Rua A, 10 - Centro, Maceió - AL, República Federativa do Brasil',
+        'Rua B',
+    ]
+
+def test_rodape_nao_entra_no_endereco():
+    df, _ = interpretar(
+        secao(100) + cabecalho(160)
+        + ponto(500, 'PN30', 'Rua A, República Federativa do')
+        + palavras(512.8, (X_ENDERECO, 'Brasil'))
+        + rodape(),
+        cabecalho(30) + ponto(48, 'PN31', 'Rua B') + rodape(),
+    )
+    assert df['endereco'].tolist() == ['Rua A, República Federativa do Brasil', 'Rua B']
+    assert df['pagina'].tolist() == [1, 2]
+
+def test_linha_fora_da_coluna_de_endereco_nao_continua():
+    df, _ = interpretar(
+        secao(100) + cabecalho(160)
+        + ponto(178, 'PN30', 'Rua A')
+        + palavras(190.8, (X_NOME, 'Observação'), (X_ENDERECO, 'Brasil'))
+    )
+    assert df['endereco'].tolist() == ['Rua A']
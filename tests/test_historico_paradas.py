@@ -0,0 +1,50 @@
+"""
+Testes do histórico das extrações (historico_paradas.py).
+"""
+
+import pandas as pd
+
+from historico_paradas import HistoricoParadas, _faixas
+
+def extracao(pdf_hash, latitude, extraido_em, empresa='Real'):
+    df = pd.DataFrame({'codigo': ['PN1'], 'endereco': ['Rua A'],
+                       'latitude': [latitude], 'longitude': [-35.7]})
+    df.attrs = {'pdf_sha256': {empresa: pdf_hash}, 'versao_extrator': '1',
+                'extraido_em': extraido_em}
+    return df
+
+def test_faixas():
+    assert _faixas([]) == []
+    assert _faixas([7]) == [(7, 7)]
+    assert _faixas([1, 2, 3, 7]) == [(1, 3), (7, 7)]
+    assert _faixas([9, 3, 2, 2, 10, 5]) == [(2, 3), (5, 5), (9, 10)]
+
+def test_mesma_extracao_nao_e_gravada_de_novo(tmp_path):
+    with HistoricoParadas(tmp_path / 'h.sqlite') as historico:
+        assert historico.registrar_execucao(extracao('A', -9.6, '2025-01-01'), 'todos') == (1, True)
+        assert historico.registrar_execucao(extracao('A', -9.6, '2025-01-02'), 'todos') == (1, False)
+        assert len(historico.execucoes()) == 1
+
+def test_versao_que_volta_e_a_vigente(tmp_path):
+    with HistoricoParadas(tmp_path / 'h.sqlite') as historico:
+        historico.registrar_execucao(extracao('A', -9.60, '2025-01-01'), 'todos')
+        historico.registrar_execucao(extracao('B', -9.61, '2025-01-02'), 'todos')
+        # Publicação desfeita: A de novo (do cache, com a data da 1ª extração)
+        execucao, nova = historico.registrar_execucao(extracao('A', -9.60, '2025-01-01'), 'todos')
+
+        assert nova
+        assert historico.execucoes_vigentes() == [execucao]
+        atual = historico.na_caixa(-9.7, -35.8, -9.5, -35.6)
+        assert atual['latitude'].tolist() == [-9.60]
+        assert atual['execucao'].tolist() == [execucao]
+        # O estado antigo continua consultável
+        antes = historico.na_caixa(-9.7, -35.8, -9.5, -35.6, em='2025-01-03')
+        assert antes['latitude'].tolist() == [-9.61]
+        assert historico.pontos_execucao(execucao)['latitude'].tolist() == [-9.60]
+
+def test_extracao_parcial_e_ignorada(tmp_path):
+    parcial = extracao('A', -9.6, '2025-01-01')
+    parcial.attrs = {}
+    with HistoricoParadas(tmp_path / 'h.sqlite') as historico:
+        assert historico.registrar([parcial], 'todos') == 0
+        assert historico.registrar([extracao('A', -9.6, '2025-01-01')], 'todos') == 1
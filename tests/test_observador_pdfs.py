@@ -0,0 +1,111 @@
+"""
+Testes do debounce do ObservadorPDFs (modo --watch).
+"""
+
+import os
+
+import observador_pdfs
+from observador_pdfs import ObservadorPDFs
+
+def gravar(caminho, conteudo, mtime_ns):
+    caminho.write_bytes(conteudo)
+    os.utime(caminho, ns=(mtime_ns, mtime_ns))
+
+def test_sem_mudancas(tmp_path):
+    pdf = tmp_path / 'a.pdf'
+    gravar(pdf, b'v1', 1_000_000_000)
+    observador = ObservadorPDFs([str(pdf)], espera=5)
+    assert observador.verificar(agora=0) == []
+    assert observador.verificar(agora=100) == []
+
+def test_avisa_depois_da_espera(tmp_path):
+    pdf = tmp_path / 'a.pdf'
+    gravar(pdf, b'v1', 1_000_000_000)
+    observador = ObservadorPDFs([str(pdf)], espera=5)
+
+    gravar(pdf, b'v2', 2_000_000_000)
+    assert observador.verificar(agora=10) == []
+    assert observador.verificar(agora=14) == []
+    assert observador.verificar(agora=15) == [str(pdf)]
+    # Já avisado: não repete
+    assert observador.verificar(agora=30) == []
+
+def test_nova_alteracao_reinicia_o_prazo(tmp_path):
+    pdf = tmp_path / 'a.pdf'
+    gravar(pdf, b'v1', 1_000_000_000)
+    observador = ObservadorPDFs([str(pdf)], espera=5)
+
+    gravar(pdf, b'v2', 2_000_000_000)
+    assert observador.verificar(agora=10) == []
+    gravar(pdf, b'v2 maior', 3_000_000_000)
+    assert observador.verificar(agora=13) == []
+    assert observador.verificar(agora=17) == []
+    assert observador.verificar(agora=18) == [str(pdf)]
+
+def test_espera_todos_os_pdfs_estabilizarem(tmp_path):
+    a, b = tmp_path / 'a.pdf', tmp_path / 'b.pdf'
+    gravar(a, b'a1', 1_000_000_000)
+    gravar(b, b'b1', 1_000_000_000)
+    observador = ObservadorPDFs([str(a), str(b)], espera=5)
+
+    gravar(a, b'a2', 2_000_000_000)
+    assert observador.verificar(agora=10) == []
+    gravar(b, b'b2', 2_000_000_000)
+    assert observador.verificar(agora=14) == []
+    # a está estável, mas b mudou há menos de 5 s
+    assert observador.verificar(agora=16) == []
+    assert observador.verificar(agora=19) == [str(a), str(b)]
+
+def test_touch_nao_dispara(tmp_path):
+    pdf = tmp_path / 'a.pdf'
+    gravar(pdf, b'v1', 1_000_000_000)
+    observador = ObservadorPDFs([str(pdf)], espera=5)
+
+    os.utime(pdf, ns=(2_000_000_000, 2_000_000_000))
+    assert observador.verificar(agora=10) == []
+    assert observador.verificar(agora=15) == []
+
+def test_pdf_removido_e_recriado(tmp_path):
+    pdf = tmp_path / 'a.pdf'
+    gravar(pdf, b'v1', 1_000_000_000)
+    observador = ObservadorPDFs([str(pdf)], espera=5)
+
+    pdf.unlink()
+    assert observador.verificar(agora=10) == []
+    assert observador.verificar(agora=15) == []
+
+    gravar(pdf, b'v1', 1_000_000_000)
+    assert observador.verificar(agora=20) == []
+    assert observador.verificar(agora=25) == [str(pdf)]
+
+def test_pdf_some_antes_do_hash(tmp_path, monkeypatch):
+    pdf = tmp_path / 'a.pdf'
+    gravar(pdf, b'v1', 1_000_000_000)
+    observador = ObservadorPDFs([str(pdf)], espera=5)
+    gravar(pdf, b'v2', 2_000_000_000)
+    assert observador.verificar(agora=10) == []
+
+    # Trocado entre o stat e a leitura: não derruba o observador
+    hash_original = observador_pdfs.hash_arquivo
+    def hash_falha(caminho):
+        monkeypatch.setattr(observador_pdfs, 'hash_arquivo', hash_original)
+        raise FileNotFoundError(caminho)
+    monkeypatch.setattr(observador_pdfs, 'hash_arquivo', hash_falha)
+    assert observador.verificar(agora=15) == []
+
+    # Continua pendente e é avisado depois de uma nova espera
+    assert observador.verificar(agora=19) == []
+    assert observador.verificar(agora=20) == [str(pdf)]
+
+def test_pdf_some_antes_do_hash_inicial(tmp_path, monkeypatch):
+    pdf = tmp_path / 'a.pdf'
+    gravar(pdf, b'v1', 1_000_000_000)
+    def hash_falha(caminho):
+        raise FileNotFoundError(caminho)
+    monkeypatch.setattr(observador_pdfs, 'hash_arquivo', hash_falha)
+    observador = ObservadorPDFs([str(pdf)], espera=5)
+    monkeypatch.undo()
+
+    # Tratado como ausente no início: o PDF existente conta como novo
+    assert observador.verificar(agora=0) == []
+    assert observador.verificar(agora=5) == [str(pdf)]
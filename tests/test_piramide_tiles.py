@@ -0,0 +1,64 @@
+"""
+Testes da projeção e da agregação em células da pirâmide de tiles.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from piramide_tiles import _celulas, _remover_antigos, projetar
+
+def tile_osm(latitude, longitude, zoom):
+    """Fórmula da wiki do OpenStreetMap (a mesma de assets_mapas/piramide.js)."""
+    n = 2 ** zoom
+    radianos = math.radians(latitude)
+    return (int((longitude + 180) / 360 * n),
+            int((1 - math.log(math.tan(radianos) + 1 / math.cos(radianos)) / math.pi) / 2 * n))
+
+def test_projetar_cantos():
+    x, y = projetar([0.0, 85.0511287798, -85.0511287798], [-180.0, 0.0, 180.0])
+    assert x[0] == 0.0 and x[1] == 0.5
+    assert y[0] == 0.5 and np.isclose(y[1], 0.0)
+    # Sempre em [0, 1): o tile da borda é o último, não um a mais
+    assert x[2] < 1.0 and y[2] < 1.0
+
+def test_projetar_igual_aos_tiles_do_osm():
+    latitudes = [-9.6498, -9.4, -9.8, 0.5, 51.5]
+    longitudes = [-35.7089, -35.6, -35.9, 10.0, -0.12]
+    x, y = projetar(latitudes, longitudes)
+    for zoom in (10, 14, 17):
+        assert [(int(px * 2 ** zoom), int(py * 2 ** zoom)) for px, py in zip(x, y)] == [
+            tile_osm(lat, lon, zoom) for lat, lon in zip(latitudes, longitudes)]
+
+def test_projetar_limita_latitude():
+    _, y = projetar([90.0, -90.0], [0.0, 0.0])
+    assert np.isclose(y[0], 0.0) and y[1] < 1.0
+
+def test_celulas_agrega_por_empresa():
+    df = pd.DataFrame({
+        'latitude': [-9.60, -9.6001, -9.60, -9.70],
+        'longitude': [-35.70, -35.7001, -35.70, -35.80],
+        'empresa': ['Real', 'Real', 'SaoFrancisco', 'Real'],
+    })
+    x, y = projetar(df['latitude'], df['longitude'])
+    tabela, tiles_x, tiles_y = _celulas(df, x, y, zoom=10, celulas_por_tile=4)
+
+    assert sorted(zip(tabela['empresa'], tabela['quantidade'])) == [
+        ('Real', 1), ('Real', 2), ('SaoFrancisco', 1)]
+    juntas = tabela[tabela['quantidade'] == 2].iloc[0]
+    assert np.isclose(juntas['latitude'], -9.60005)
+    assert np.isclose(juntas['longitude'], -35.70005)
+    # O tile de cada célula é o dos seus pontos
+    assert set(zip(tiles_x.tolist(), tiles_y.tolist())) == {
+        (int(px * 2 ** 10), int(py * 2 ** 10)) for px, py in zip(x, y)}
+
+def test_remover_antigos_apaga_irmaos_comprimidos(tmp_path):
+    for relativo in ('10/1/1.json', '10/1/1.json.gz', '10/1/2.json', '10/1/2.json.gz',
+                     '10/1/2.json.br'):
+        (tmp_path / relativo).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / relativo).write_text('{}')
+
+    assert _remover_antigos(tmp_path, {'10/1/1.json': 'v'}) == 1
+    restantes = sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob('*.json*'))
+    assert restantes == ['10/1/1.json', '10/1/1.json.gz']
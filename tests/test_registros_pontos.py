@@ -0,0 +1,30 @@
+"""
+Testes do BufferPontos (registros_pontos.py).
+"""
+
+import pytest
+
+from registros_pontos import BufferPontos
+
+def test_para_dataframe():
+    pontos = BufferPontos(com_secao=True)
+    pontos.adicionar('Real', 'PN1', 'Rua A', -9.6, -35.7, 1, 2)
+    pontos.adicionar('Real', 'PN2', 'Rua B', -9.61, -35.71, 3, 4)
+    df = pontos.para_dataframe()
+    assert df['codigo'].tolist() == ['PN1', 'PN2']
+    assert df['latitude'].tolist() == [-9.6, -9.61]
+    assert df['secao'].tolist() == [2, 4]
+    assert str(df['empresa'].dtype) == 'category'
+
+def test_buffer_vazio():
+    df = BufferPontos().para_dataframe()
+    assert len(df) == 0 and 'secao' not in df.columns
+
+def test_adicionar_depois_da_conversao():
+    pontos = BufferPontos()
+    pontos.adicionar('Real', 'PN1', 'Rua A', -9.6, -35.7, 1)
+    df = pontos.para_dataframe()
+    with pytest.raises(RuntimeError, match='já convertido'):
+        pontos.adicionar('Real', 'PN2', 'Rua B', -9.61, -35.71, 1)
+    # O DataFrame e o buffer continuam consistentes
+    assert len(pontos) == 1 and df['latitude'].tolist() == [-9.6]
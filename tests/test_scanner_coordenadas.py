@@ -0,0 +1,44 @@
+"""
+Testes do scanner de coordenadas de passada única.
+"""
+
+from benchmarks.bench_scanner import pagina_sintetica, varrer_pagina_antigo
+from scanner_coordenadas import iterar_coordenadas, varrer_linhas, varrer_pagina
+
+def coordenadas(texto):
+    return [(lat, lon) for lat, lon, _ in iterar_coordenadas(texto)]
+
+def test_virgula_e_ponto():
+    assert coordenadas("-9,53802 -35,78683") == [(-9.53802, -35.78683)]
+    assert coordenadas("-9.53802 -35.78683") == [(-9.53802, -35.78683)]
+
+def test_fora_dos_limites_e_ignorado():
+    assert coordenadas("-8.5 -35.7 -9.5 -36.1") == []
+
+def test_numero_antes_do_par():
+    # "1,5 -9.53" casa primeiro e cai fora dos limites; o par real vem depois
+    assert coordenadas("1,5 -9.53 -35.78") == [(-9.53, -35.78)]
+    assert coordenadas("Ordem 12 65,0 -9,6 -35,7") == [(-9.6, -35.7)]
+
+def test_codigo_da_linha_anterior():
+    linhas = ["PN987 Av. Fernandes Lima", "Farol -9.6 -35.7"]
+    assert list(varrer_linhas(linhas)) == [(-9.6, -35.7, 'PN987', "Farol -9.6 -35.7")]
+
+def test_codigo_padrao():
+    assert [codigo for _, _, codigo, _ in varrer_linhas(["-9.6 -35.7"])] == ['DESCONHECIDO']
+
+def test_equivalente_a_implementacao_antiga():
+    paginas = [
+        pagina_sintetica(),
+        "PP52 Rua A, 1,5 -9.53 -35.78\nPN3 -9,61 -35,72 -9.62 -35.73",
+    ]
+    for texto in paginas:
+        antigo = list(dict.fromkeys(varrer_pagina_antigo(texto)))
+        novo = list(dict.fromkeys(varrer_pagina(texto)))
+        assert novo == antigo
+
+def test_contagem_inclui_pares_fora_dos_limites():
+    contagem = {}
+    list(varrer_pagina("1,5 -9.53 -35.78\nPN1 -8.1 -30.2", contagem=contagem))
+    # "1,5 -9.53", "-9.53 -35.78" e "-8.1 -30.2"
+    assert contagem == {'correspondencias': 3}